@@ -9,13 +9,31 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import json
+import asyncio
+import importlib.util
+import smtplib
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
 import os
+import sys
+import uuid
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import time
-import random
-from typing import Dict, List, Optional, Tuple
+import threading
+import socketserver
+import sqlite3
+import tempfile
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from collections import OrderedDict
+from functools import partial, wraps
 from pathlib import Path
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
 
 # Page configuration
 st.set_page_config(
@@ -108,6 +126,70 @@ CONFIG = {
     "refresh_interval": 30,
     "cache_ttl": 300,
     "proactive_notification_hours": 72,
+    "anomaly": {
+        "min_samples": 30,
+        "cusum_k": 0.5,
+        "cusum_h": 8.0
+    },
+    "predictive": {
+        "window_hours": 24,
+        "ewma_alpha": 0.3,
+        "high_risk": 0.8,
+        "medium_risk": 0.5,
+        "urgent_hours": 24
+    },
+    "shared_cache": {
+        "max_mb": 1024
+    },
+    "instrumentation": {
+        "export_seconds": 10,
+        "session_ttl_seconds": 3600
+    },
+    "status_snapshot": {
+        "max_age_seconds": 180
+    },
+    "notifications": {
+        "enabled": True,
+        # Stand-in SMTP and SMS servers that write messages to data/outbox, for replay and
+        # load tests only; started when the process runs with POWERSYSTEM_LOCAL_SINKS=1
+        "local_sinks": os.environ.get("POWERSYSTEM_LOCAL_SINKS") == "1",
+        "smtp": {"host": "127.0.0.1", "port": 8025, "sender": "alerts@powersystem.sa"},
+        "gateway": {"host": "127.0.0.1", "port": 8026},
+        "rate_limits": {"email": 20, "sms": 10, "phone": 2},
+        "pool_size": 4,
+        "max_retries": 3,
+        "batch_window_seconds": 2.0,
+        "digest_seconds": {"hourly": 3600, "daily": 86400}
+    },
+    "dispatch": {
+        "generators_per_technician": 40,
+        "shift_start_hour": 7,
+        "shift_hours": 9,
+        "speed_kmh": 70,
+        "road_factor": 1.3,
+        "site_radius_km": 20,
+        "candidate_technicians": 6,
+        # Most jobs scored against the plan in one pass while placing them
+        "score_block_jobs": 512,
+        "reach_km": 150,
+        "service_minutes": {"CRITICAL": 180, "HIGH": 120, "MEDIUM": 90},
+        "eta_weights": {"CRITICAL": 2.0, "HIGH": 0.5, "MEDIUM": 0.0}
+    },
+    "export": {
+        "chunk_rows": 20_000
+    },
+    "portal": {
+        "page_size": 25,
+        "alert_callouts": 5
+    },
+    "telemetry": {
+        # The ingest socket is unauthenticated, so only processes started with
+        # POWERSYSTEM_TELEMETRY=1 listen on it and drain the inbox
+        "enabled": os.environ.get("POWERSYSTEM_TELEMETRY") == "1",
+        "host": "127.0.0.1",
+        "port": 9750,
+        "inbox_poll_seconds": 0.5
+    },
     "currency": {
         "symbol": "SAR",
         "rate": 3.75,
@@ -128,323 +210,4065 @@ DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 
 # ========================================
-# DATA MODELS AND GENERATION
+# SENSOR THRESHOLD RULES
 # ========================================
 
-@st.cache_data(ttl=CONFIG["cache_ttl"])
-def load_base_generator_data() -> pd.DataFrame:
-    """Load base generator data with enhanced status tracking."""
-    generators_file = DATA_DIR / "generators.csv"
-    
-    if not generators_file.exists():
-        generators_data = generate_enhanced_generator_data()
-        df = pd.DataFrame(generators_data)
-        df.to_csv(generators_file, index=False)
-        return df
-    
-    df = pd.read_csv(generators_file)
-    
-    contact_columns = ['primary_contact_name', 'primary_contact_phone', 'primary_contact_email', 
-                      'alt_contact_name', 'alt_contact_phone', 'alt_contact_email']
-    
-    missing_columns = [col for col in contact_columns if col not in df.columns]
-    
-    if missing_columns:
-        contact_mapping = {
-            'King Faisal Medical City': {
-                'primary_contact_name': 'Ahmed Al-Rashid', 'primary_contact_phone': '+966-11-464-7272', 
-                'primary_contact_email': 'ahmed.alrashid@kfmc.sa',
-                'alt_contact_name': 'Fahad Al-Mahmoud', 'alt_contact_phone': '+966-11-464-7273', 
-                'alt_contact_email': 'fahad.mahmoud@kfmc.sa'
-            },
-            'Riyadh Mall Complex': {
-                'primary_contact_name': 'Mohammed Al-Saud', 'primary_contact_phone': '+966-11-234-5678', 
-                'primary_contact_email': 'mohammed.saud@riyadhmall.com',
-                'alt_contact_name': 'Khalid Operations', 'alt_contact_phone': '+966-11-234-5679', 
-                'alt_contact_email': 'ops@riyadhmall.com'
-            }
-        }
+# Alert levels in increasing severity; a sensor's level is the number of limits it has crossed
+ALERT_LEVELS = ["NORMAL", "ADVISORY", "WARNING", "CRITICAL", "FAULT"]
+ADVISORY, WARNING, CRITICAL, FAULT = 1, 2, 3, 4
+
+# Declarative threshold table shared by status classification, tickets, alerts and sensor badges.
+# 'limits' holds one limit per level from ADVISORY to FAULT; "below" sensors trip when the
+# reading drops under the limit, "above" sensors when it rises over it.
+SENSOR_RULES = {
+    'oil_pressure': {
+        'direction': 'below', 'limits': (28, 28, 25, 25),
+        'label': 'Oil Pressure', 'icon': '🛢️', 'unit': ' PSI',
+        'fault_label': 'Low oil pressure', 'warning_note': 'Below normal', 'caution_label': 'Warning',
+        'normal_range': 'Normal: 28-35 PSI', 'advisory_caption': '⚠️ Below normal range'
+    },
+    'coolant_temp': {
+        'direction': 'above', 'limits': (95, 95, 105, 105),
+        'label': 'Coolant Temp', 'icon': '🌡️', 'unit': '°C',
+        'fault_label': 'High coolant temperature', 'warning_note': 'Above normal', 'caution_label': 'Warning',
+        'normal_range': 'Normal: 75-95°C', 'advisory_caption': '⚠️ Above normal range'
+    },
+    'vibration': {
+        'direction': 'above', 'limits': (4.0, 4.0, 5.0, 5.0),
+        'label': 'Vibration', 'icon': '🔧', 'unit': ' mm/s',
+        'fault_label': 'High vibration', 'warning_note': 'Above normal', 'caution_label': 'Warning',
+        'normal_range': 'Normal: 1.0-4.0 mm/s', 'advisory_caption': '⚠️ Above normal range'
+    },
+    'fuel_level': {
+        'direction': 'below', 'limits': (50, 30, 20, 15),
+        'label': 'Fuel Level', 'icon': '⛽', 'unit': '%',
+        'fault_label': 'Low fuel', 'warning_note': 'Low', 'caution_label': 'Low',
+        'normal_range': 'Normal: >50%', 'advisory_caption': '⚠️ Consider refueling'
+    }
+}
+
+PRIORITY_LEVELS = ["CRITICAL", "HIGH", "MEDIUM"]
+
+def compile_sensor_rules(rules: Dict) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Compile the rule table into sign-normalised limit arrays.
+
+    Readings are multiplied by the sign so every rule becomes a strict "greater than"
+    test, which lets all sensors and levels be evaluated in a single comparison.
+    """
+    sensors = list(rules)
+    signs = np.array([-1.0 if rules[s]['direction'] == 'below' else 1.0 for s in sensors])
+    limits = np.array([rules[s]['limits'] for s in sensors], dtype=float) * signs[:, None]
+    return sensors, signs, limits
+
+RULE_SENSORS, RULE_SIGNS, RULE_LIMITS = compile_sensor_rules(SENSOR_RULES)
+
+def sensor_alert_levels(readings: np.ndarray, level_limits: Optional[List[np.ndarray]] = None) -> np.ndarray:
+    """Map an (n, sensors) reading matrix to an (n, sensors) matrix of alert levels.
+
+    ``level_limits`` holds one signed limit array per level from ADVISORY to FAULT, each
+    either per sensor (global rules) or per row and sensor (customer profiles).
+    """
+    signed = readings * RULE_SIGNS
+    levels = np.zeros(signed.shape, dtype=np.int8)
+    for limits in (RULE_LIMITS.T if level_limits is None else level_limits):
+        levels += signed > limits
+    return levels
+
+# Customer profiles override the WARNING limit of each rule sensor; CRITICAL and FAULT stay global
+THRESHOLD_SENSORS = RULE_SENSORS
+DEFAULT_THRESHOLDS = {sensor: SENSOR_RULES[sensor]['limits'][WARNING - ADVISORY] for sensor in THRESHOLD_SENSORS}
+
+class ThresholdProfiles:
+    """Compiled per-customer warning limits, broadcast to status rows by customer lookup.
+
+    Row 0 of each limit table holds the global rules; customer rows follow in the order
+    of ``customers``. A custom warning limit may not be less severe than the critical
+    limit, and the advisory limit moves with it so levels stay ordered.
+    """
+    
+    def __init__(self, customers: pd.Index, warning_limits: np.ndarray, version: int = 0):
+        critical = RULE_LIMITS[:, CRITICAL - ADVISORY]
+        signed = np.minimum(np.asarray(warning_limits, dtype=float).reshape(-1, len(RULE_SENSORS)) * RULE_SIGNS, critical)
+        self.customers = pd.Index(customers)
+        self.warning = np.vstack([RULE_LIMITS[:, WARNING - ADVISORY], signed])
+        self.advisory = np.minimum(RULE_LIMITS[:, 0], self.warning)
+        self.version = version
+    
+    def __len__(self) -> int:
+        return len(self.customers)
+    
+    def profile_rows(self, customers: pd.Series) -> np.ndarray:
+        """Limit table row per status row: 0 for customers without a profile."""
+        if isinstance(customers.dtype, pd.CategoricalDtype):
+            category_rows = np.append(self.customers.get_indexer(customers.cat.categories) + 1, 0)
+            return category_rows[customers.cat.codes.to_numpy()]
+        return self.customers.get_indexer(customers) + 1
+    
+    def level_limits(self, customers: pd.Series) -> Optional[List[np.ndarray]]:
+        """Per-row limit arrays for sensor_alert_levels, or None when no customer has a profile."""
+        if not len(self.customers):
+            return None
+        rows = self.profile_rows(customers)
+        return [self.advisory[rows], self.warning[rows],
+                RULE_LIMITS[:, CRITICAL - ADVISORY], RULE_LIMITS[:, FAULT - ADVISORY]]
+
+def build_warning_text(readings: pd.DataFrame, levels: np.ndarray) -> np.ndarray:
+    """Join the warning strings of every sensor at WARNING or above, one string per row.
+
+    Readings are rounded to a fixed grid, so each sensor only has a few hundred distinct
+    values; those are formatted once and broadcast back through factorize codes.
+    """
+    text = np.full(len(readings), "", dtype=object)
+    for j, sensor in enumerate(RULE_SENSORS):
+        flagged = levels[:, j] >= WARNING
+        if not flagged.any():
+            continue
+        rule = SENSOR_RULES[sensor]
+        codes, uniques = pd.factorize(readings[sensor].to_numpy()[flagged])
+        labels = np.array(
+            [f"{rule['label']}: {value}{rule['unit']} ({rule['warning_note']})" for value in uniques],
+            dtype=object
+        )
+        separator = np.where(text[flagged] != "", "; ", "").astype(object)
+        text[flagged] = text[flagged] + separator + labels[codes]
+    return text
+
+def evaluate_alerts(readings: pd.DataFrame, has_fault: np.ndarray, needs_proactive_contact: np.ndarray,
+                    level_limits: Optional[List[np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """Evaluate the rule table once over the fleet.
+
+    Returns per-sensor levels, the overall alert level, joined warning text and the
+    ticket priority (NaN where no ticket is due).
+    """
+    levels = sensor_alert_levels(readings[RULE_SENSORS].to_numpy(dtype=float), level_limits)
+    alert_level = levels.max(axis=1)
+    
+    # -1 = no ticket, 0 = CRITICAL, 1 = HIGH, 2 = MEDIUM
+    priority_code = np.select(
+        [has_fault, alert_level >= CRITICAL, alert_level >= WARNING, needs_proactive_contact],
+        [0, 1, 2, 2],
+        default=-1
+    )
+    
+    return {
+        **{f"{sensor}_level": levels[:, j] for j, sensor in enumerate(RULE_SENSORS)},
+        'alert_level': alert_level,
+        'warning_text': build_warning_text(readings, levels),
+        'priority': pd.Categorical.from_codes(priority_code, PRIORITY_LEVELS, ordered=True)
+    }
+
+# ========================================
+# RANDOM STREAMS
+# ========================================
+
+# Philox4x64-10 (Salmon et al. 2011) constants, as used by numpy.random.Philox
+PHILOX_MULTIPLIERS = (0xD2E7470EE14C6C93, 0xCA5A826395121157)
+PHILOX_KEY_STEPS = (0x9E3779B97F4A7C15, 0xBB67AE8584CAA73B)
+PHILOX_ROUNDS = 10
+# Counter blocks evaluated per vectorized pass, small enough for the working arrays to stay in cache
+PHILOX_CHUNK_BLOCKS = 1 << 15
+
+# Stream families: the second key word, so each use of a serial number draws from its own stream
+STREAM_SENSORS = 1
+STREAM_HISTORY = 2
+STREAM_FLEET = 3
+
+def stream_keys(names) -> np.ndarray:
+    """Stable 64-bit key per name (usually a serial number), the same in every process and run."""
+    return pd.util.hash_array(np.asarray(names, dtype=object), categorize=False)
+
+def _mulhi64(a: np.ndarray, m: int) -> np.ndarray:
+    """High 64 bits of the 128-bit products a * m, built from 32-bit partial products."""
+    low_mask, shift = np.uint64(0xFFFFFFFF), np.uint64(32)
+    m_lo, m_hi = np.uint64(m & 0xFFFFFFFF), np.uint64(m >> 32)
+    a_lo, a_hi = a & low_mask, a >> shift
+    lo_hi, hi_lo = a_lo * m_hi, a_hi * m_lo
+    carry = ((a_lo * m_lo) >> shift) + (lo_hi & low_mask) + (hi_lo & low_mask)
+    return a_hi * m_hi + (lo_hi >> shift) + (hi_lo >> shift) + (carry >> shift)
+
+def philox_raw(keys: np.ndarray, family: int, counter: int, count: int) -> np.ndarray:
+    """The first ``count`` raw 64-bit outputs of every key's Philox stream, shape (len(keys), count).
+
+    Row i equals ``generator_stream`` for key i at the same counter, via ``random_raw(count)``:
+    block b (from 1, since numpy advances the counter before each block) encrypts the
+    counter (b, counter, 0, 0) under the key (keys[i], family). Rows never depend on each
+    other, so any subset of keys, in any order or chunking, gets the same values.
+    """
+    blocks = -(-count // 4)
+    keys = np.asarray(keys, dtype=np.uint64)
+    out = np.empty((len(keys), blocks * 4), dtype=np.uint64)
+    block_ids = np.arange(1, blocks + 1, dtype=np.uint64)
+    rows = max(1, PHILOX_CHUNK_BLOCKS // blocks)
+    
+    for start in range(0, len(keys), rows):
+        chunk = keys[start:start + rows]
+        key0, key1 = np.repeat(chunk, blocks), family
+        c0 = np.tile(block_ids, len(chunk))
+        c1 = np.full_like(c0, counter)
+        c2 = np.zeros_like(c0)
+        c3 = np.zeros_like(c0)
+        for round_no in range(PHILOX_ROUNDS):
+            if round_no:
+                key0 = key0 + np.uint64(PHILOX_KEY_STEPS[0])
+                key1 = (key1 + PHILOX_KEY_STEPS[1]) & 0xFFFFFFFFFFFFFFFF
+            hi0, lo0 = _mulhi64(c0, PHILOX_MULTIPLIERS[0]), c0 * np.uint64(PHILOX_MULTIPLIERS[0])
+            hi1, lo1 = _mulhi64(c2, PHILOX_MULTIPLIERS[1]), c2 * np.uint64(PHILOX_MULTIPLIERS[1])
+            c0, c1, c2, c3 = hi1 ^ c1 ^ key0, lo1, hi0 ^ c3 ^ np.uint64(key1), lo0
+        out[start:start + len(chunk)] = np.column_stack([c0, c1, c2, c3]).reshape(len(chunk), blocks * 4)
+    return out[:, :count]
+
+def stream_uniforms(keys: np.ndarray, family: int, counter: int, count: int) -> np.ndarray:
+    """(len(keys), count) doubles in [0, 1); row i matches ``generator_stream(...).random(count)``."""
+    return (philox_raw(keys, family, counter, count) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+def stream_normals(keys: np.ndarray, family: int, counter: int, count: int) -> np.ndarray:
+    """(len(keys), count) standard normals, Box-Muller transformed from each key's uniforms."""
+    uniforms = stream_uniforms(keys, family, counter, 2 * count)
+    radius = np.sqrt(-2.0 * np.log1p(-uniforms[:, :count]))
+    return radius * np.cos(2.0 * np.pi * uniforms[:, count:])
+
+def generator_stream(name: str, family: int, counter: int) -> np.random.Generator:
+    """numpy Generator over one name's stream, for reproducing a single generator's draws."""
+    key = np.array([stream_keys([name])[0], family], dtype=np.uint64)
+    return np.random.Generator(np.random.Philox(key=key, counter=[0, counter, 0, 0]))
+
+# ========================================
+# VECTORIZED STATUS ENGINE
+# ========================================
+
+# Sensor sampling ranges, in the order the per-generator draws are consumed
+SENSOR_RANGES = {
+    'oil_pressure': (20, 35),
+    'coolant_temp': (75, 110),
+    'vibration': (1.0, 6.0),
+    'fuel_level': (10, 95),
+    'load_percent': (0, 100)
+}
+
+SENSOR_DECIMALS = {
+    'oil_pressure': 1,
+    'coolant_temp': 1,
+    'vibration': 2,
+    'fuel_level': 1,
+    'load_percent': 1
+}
+
+FAULT_LABELS = [SENSOR_RULES[sensor]['fault_label'] for sensor in RULE_SENSORS]
+
+STATUS_CODES = ["FAULT", "RUNNING", "STANDBY", "MAINTENANCE"]
+STATUS_COLORS = ["fault", "running", "standby", "maintenance"]
+STATUS_DESCRIPTIONS = ["Not required - standby mode", "Scheduled maintenance"]
+SERVICE_TYPES = [
+    "Regular Maintenance", "Overdue Maintenance", "Urgent Service Due", "Scheduled Service Due", "Predicted Failure Risk"
+]
+
+# Every combination of the fault flags (bit j = j-th rule sensor) mapped to its description.
+# Code 0 (no fault) is the empty string used for RUNNING, followed by the standby/maintenance notes.
+FAULT_DESCRIPTIONS = [
+    ", ".join(label for bit, label in enumerate(FAULT_LABELS) if code & (1 << bit))
+    for code in range(1 << len(FAULT_LABELS))
+] + STATUS_DESCRIPTIONS
+
+def sample_sensor_matrix(serials, minute: int) -> np.ndarray:
+    """Draw all sensor readings plus the demand flag for every generator in one call.
+
+    Row i of the (n, 6) result comes from generator i's own (serial number, minute)
+    stream: the sensors in SENSOR_RANGES order, then the demand draw. A generator's
+    readings therefore do not depend on the rest of the fleet or its order, and
+    ``generator_stream(serial, STREAM_SENSORS, minute)`` reproduces them exactly.
+    """
+    draws = stream_uniforms(stream_keys(serials), STREAM_SENSORS, minute, len(SENSOR_RANGES) + 1)
+    for j, (low, high) in enumerate(SENSOR_RANGES.values()):
+        draws[:, j] = low + (high - low) * draws[:, j]
+    return draws
+
+def compute_fleet_status(generators_df: pd.DataFrame, seed: int,
+                         thresholds: Optional[ThresholdProfiles] = None) -> pd.DataFrame:
+    """Simulate and classify the whole fleet in one vectorized pass; ``seed`` is the simulation minute."""
+    draws = sample_sensor_matrix(generators_df['serial_number'], seed)
+    readings = {name: draws[:, j] for j, name in enumerate(SENSOR_RANGES)}
+    is_needed = draws[:, len(SENSOR_RANGES)] < 0.7
+    return classify_fleet_status(generators_df, readings, is_needed, thresholds)
+
+def classify_fleet_status(generators_df: pd.DataFrame, readings: Dict[str, np.ndarray], is_needed: np.ndarray,
+                          thresholds: Optional[ThresholdProfiles] = None) -> pd.DataFrame:
+    """Build status rows for generators from their raw sensor readings and demand flags.
+
+    Alerts use each customer's threshold profile when ``thresholds`` is given; faults
+    always use the global rules.
+    """
+    n = len(generators_df)
+    
+    # Fault classification uses the raw readings; alert levels below use the displayed values
+    raw_levels = sensor_alert_levels(np.column_stack([readings[sensor] for sensor in RULE_SENSORS]))
+    fault_code = ((raw_levels == FAULT) << np.arange(len(RULE_SENSORS))).sum(axis=1)
+    has_fault = fault_code > 0
+    
+    # 0 = FAULT, 1 = RUNNING, 2 = STANDBY, 3 = MAINTENANCE
+    status_code = np.select(
+        [has_fault, is_needed & (readings['fuel_level'] > 20), ~is_needed],
+        [0, 1, 2],
+        default=3
+    )
+    description_code = np.select(
+        [has_fault, status_code == 2, status_code == 3],
+        [fault_code, len(FAULT_DESCRIPTIONS) - 2, len(FAULT_DESCRIPTIONS) - 1],
+        default=0
+    )
+    
+    service_hours = (
+        generators_df['next_service_hours'].to_numpy()
+        if 'next_service_hours' in generators_df.columns else np.full(n, 500)
+    )
+    runtime_hours = (
+        generators_df['total_runtime_hours'].to_numpy()
+        if 'total_runtime_hours' in generators_df.columns else np.full(n, 5000)
+    )
+    customer_contact = (
+        generators_df['customer_contact'].reset_index(drop=True)
+        if 'customer_contact' in generators_df.columns else np.full(n, 'contact@customer.sa', dtype=object)
+    )
+    
+    # 0 = regular, 1 = overdue, 2 = urgent, 3 = scheduled (first matching band wins)
+    service_code = np.select(
+        [service_hours < 0, service_hours < 48, service_hours < CONFIG["proactive_notification_hours"]],
+        [1, 2, 3],
+        default=0
+    )
+    needs_proactive_contact = service_code > 0
+    
+    displayed = pd.DataFrame({name: np.round(values, SENSOR_DECIMALS[name]) for name, values in readings.items()})
+    
+    status_df = pd.DataFrame({
+        'serial_number': generators_df['serial_number'].reset_index(drop=True),
+        'customer_name': generators_df['customer_name'].reset_index(drop=True),
+        'customer_contact': customer_contact,
+        'operational_status': pd.Categorical.from_codes(status_code, STATUS_CODES),
+        'status_color': pd.Categorical.from_codes(status_code, STATUS_COLORS),
+        'fault_description': pd.Categorical.from_codes(description_code, FAULT_DESCRIPTIONS),
+        **{name: displayed[name].to_numpy() for name in readings},
+        'next_service_hours': service_hours,
+        'service_type': pd.Categorical.from_codes(service_code, SERVICE_TYPES),
+        'runtime_hours': runtime_hours,
+        'needs_proactive_contact': needs_proactive_contact,
+        'revenue_opportunity': has_fault | needs_proactive_contact
+    })
+    level_limits = thresholds.level_limits(status_df['customer_name']) if thresholds is not None else None
+    alerts = evaluate_alerts(displayed, has_fault, needs_proactive_contact, level_limits)
+    return status_df.assign(**alerts)
+
+# ========================================
+# SENSOR HISTORY STORE
+# ========================================
+
+HISTORY_DIR = DATA_DIR / "history"
+HISTORY_SENSORS = list(SENSOR_RANGES)
+
+# Rollup tiers: bucket width and how long each tier keeps data (its retention policy)
+HISTORY_TIERS = {
+    '1min': {'bucket_seconds': 60, 'retention_seconds': 24 * 3600},
+    '1h': {'bucket_seconds': 3600, 'retention_seconds': 30 * 24 * 3600},
+    '1d': {'bucket_seconds': 86400, 'retention_seconds': 365 * 24 * 3600}
+}
+
+# Jitter (standard deviation) and clip range used to seed history for generators without any
+HISTORY_SEED_JITTER = {
+    'oil_pressure': (1.0, 20, 35),
+    'coolant_temp': (2.0, 70, 110),
+    'vibration': (0.3, 0.5, 6),
+    'fuel_level': (1.5, 10, 100),
+    'load_percent': (5.0, 0, 100)
+}
+
+class SensorHistoryStore:
+    """Round-robin time-series store for per-generator sensor history.
+
+    Each tier is a ring of buckets held in memory-mapped .npy files laid out slot-major
+    (slot, generator, ...), so appending a fleet snapshot writes one contiguous slab. A
+    reading for bucket b lands in slot b % capacity: appends are O(1) per generator, data
+    older than the tier's retention is overwritten in place, and coarser tiers are rolled
+    up incrementally as running sums and counts. Stored bucket ids of 0 mark empty slots,
+    which keeps freshly created files sparse on disk.
+    """
+    
+    def __init__(self, root: Path = HISTORY_DIR, tiers: Dict = HISTORY_TIERS,
+                 sensors: List[str] = HISTORY_SENSORS, initial_rows: int = 1024):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.tiers = tiers
+        self.sensors = list(sensors)
+        self._lock = threading.Lock()
         
-        default_contact = {
-            'primary_contact_name': 'Facility Manager', 'primary_contact_phone': '+966-11-000-0000', 
-            'primary_contact_email': 'contact@customer.sa',
-            'alt_contact_name': 'Operations Team', 'alt_contact_phone': '+966-11-000-0001', 
-            'alt_contact_email': 'ops@customer.sa'
-        }
+        self._serials_file = self.root / "serials.txt"
+        self._serials = self._serials_file.read_text().split() if self._serials_file.exists() else []
+        self._index = pd.Index(self._serials, dtype=object)
+        
+        self._rows = max(initial_rows, len(self._serials))
+        self._arrays = {}
+        self._open_arrays()
+        self.version = 0
+    
+    def _capacity(self, tier: str) -> int:
+        spec = self.tiers[tier]
+        return spec['retention_seconds'] // spec['bucket_seconds']
+    
+    def _array_shape(self, name: str, rows: int) -> Tuple[Tuple, type]:
+        if name == 'last_seen':
+            return (rows,), np.int64
+        tier, field = name.rsplit('_', 1)
+        cap = self._capacity(tier)
+        if field == 'sum':
+            return (cap, rows, len(self.sensors)), np.float32
+        return (cap, rows), np.int32
+    
+    def _array_names(self) -> List[str]:
+        return ['last_seen'] + [f"{tier}_{field}" for tier in self.tiers for field in ('bucket', 'count', 'sum')]
+    
+    def _open_arrays(self) -> None:
+        for name in self._array_names():
+            path = self.root / f"{name}.npy"
+            if path.exists():
+                array = np.lib.format.open_memmap(path, mode='r+')
+                rows = array.shape[0] if name == 'last_seen' else array.shape[1]
+                self._rows = max(self._rows, rows)
+            else:
+                shape, dtype = self._array_shape(name, self._rows)
+                array = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+            self._arrays[name] = array
+        for name in self._array_names():
+            self._ensure_rows(name)
+    
+    def _ensure_rows(self, name: str) -> None:
+        """Grow an array to the current row count, copying only slots that hold data."""
+        array = self._arrays[name]
+        shape, dtype = self._array_shape(name, self._rows)
+        if array.shape == shape:
+            return
+        path = self.root / f"{name}.npy"
+        tmp_path = path.with_suffix(".tmp.npy")
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=shape)
+        if name == 'last_seen':
+            grown[:len(array)] = array
+        else:
+            for slot in range(array.shape[0]):
+                if array[slot].any():
+                    grown[slot, :array.shape[1]] = array[slot]
+        grown.flush()
+        del grown
+        self._arrays[name] = None
+        del array
+        os.replace(tmp_path, path)
+        self._arrays[name] = np.lib.format.open_memmap(path, mode='r+')
+    
+    def rows_for(self, serials, create: bool = False) -> np.ndarray:
+        """Map serial numbers to storage rows; unknown serials get -1 unless created."""
+        serials = pd.Index(serials, dtype=object)
+        rows = self._index.get_indexer(serials)
+        if create and (rows < 0).any():
+            new_serials = [str(s) for s in serials[rows < 0].unique()]
+            self._serials.extend(new_serials)
+            self._index = pd.Index(self._serials, dtype=object)
+            rows = self._index.get_indexer(serials)
+            with open(self._serials_file, "a") as f:
+                f.write("\n".join(new_serials) + "\n")
+            if len(self._serials) > self._rows:
+                self._rows = max(len(self._serials), 2 * self._rows)
+                for name in self._array_names():
+                    self._ensure_rows(name)
+        return rows.astype(np.int64)
+    
+    def last_seen(self, serials) -> np.ndarray:
+        """Epoch seconds of each generator's latest reading (0 if none)."""
+        rows = self.rows_for(serials)
+        seen = np.zeros(len(rows), dtype=np.int64)
+        known = rows >= 0
+        seen[known] = self._arrays['last_seen'][rows[known]]
+        return seen
+    
+    def append(self, serials, timestamps, readings: np.ndarray) -> None:
+        """Append one reading per serial. Readings older than a slot's current bucket are dropped."""
+        readings = np.asarray(readings, dtype=np.float32).reshape(-1, len(self.sensors))
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=np.int64), (len(readings),))
+        
+        with self._lock:
+            rows = self.rows_for(serials, create=True)
+            last_seen = self._arrays['last_seen']
+            last_seen[rows] = np.maximum(last_seen[rows], timestamps)
+            
+            for tier, spec in self.tiers.items():
+                bucket_ids = self._arrays[f"{tier}_bucket"]
+                counts = self._arrays[f"{tier}_count"]
+                sums = self._arrays[f"{tier}_sum"]
+                
+                bucket = (timestamps // spec['bucket_seconds']).astype(np.int32)
+                slot = bucket % self._capacity(tier)
+                stored = bucket_ids[slot, rows]
+                
+                stale = stored < bucket
+                bucket_ids[slot[stale], rows[stale]] = bucket[stale]
+                counts[slot[stale], rows[stale]] = 0
+                sums[slot[stale], rows[stale]] = 0
+                
+                live = stored <= bucket
+                np.add.at(counts, (slot[live], rows[live]), 1)
+                np.add.at(sums, (slot[live], rows[live]), readings[live])
+            self.version += 1
+    
+    def query_matrix(self, serials, start: int, end: int, resolution: str = '1min') -> Tuple[np.ndarray, np.ndarray]:
+        """Bucket means for several generators over [start, end].
+
+        Returns the bucket start times and an (n_serials, n_buckets, n_sensors) array,
+        with NaN where a generator has no data for a bucket.
+        """
+        spec = self.tiers[resolution]
+        cap = self._capacity(resolution)
+        first = max(int(start) // spec['bucket_seconds'], int(end) // spec['bucket_seconds'] - cap + 1)
+        buckets = np.arange(first, int(end) // spec['bucket_seconds'] + 1, dtype=np.int64)
+        slots = buckets % cap
+        
+        rows = self.rows_for(serials)
+        values = np.full((len(rows), len(buckets), len(self.sensors)), np.nan, dtype=np.float32)
+        known = np.flatnonzero(rows >= 0)
+        if len(known) and len(buckets):
+            index = (slots[:, None], rows[known][None, :])
+            valid = self._arrays[f"{resolution}_bucket"][index] == buckets[:, None]
+            counts = np.maximum(self._arrays[f"{resolution}_count"][index], 1)
+            means = self._arrays[f"{resolution}_sum"][index] / counts[:, :, None]
+            values[known] = np.where(valid[:, :, None], means, np.nan).transpose(1, 0, 2)
+        return buckets * spec['bucket_seconds'], values
+    
+    def query(self, serial: str, start: int, end: int, resolution: str = '1min') -> pd.DataFrame:
+        """Range query for one generator at the given rollup resolution."""
+        times, values = self.query_matrix([serial], start, end, resolution)
+        history = pd.DataFrame(values[0], columns=self.sensors)
+        history.insert(0, 'timestamp', pd.to_datetime(times, unit='s'))
+        return history.dropna(how='all', subset=self.sensors).reset_index(drop=True)
+    
+    def flush(self) -> None:
+        for array in self._arrays.values():
+            array.flush()
+
+@st.cache_resource
+def get_sensor_history() -> SensorHistoryStore:
+    """Process-wide sensor history store."""
+    return SensorHistoryStore()
+
+def seed_sensor_history(store: SensorHistoryStore, status_df: pd.DataFrame, now: int, hours: int = 24) -> None:
+    """Give generators with no recorded history an hourly backfill around their current readings."""
+    new = status_df[store.last_seen(status_df['serial_number']) == 0]
+    if new.empty:
+        return
+    
+    current = new[store.sensors].to_numpy(dtype=float)
+    jitter = np.array([HISTORY_SEED_JITTER[s][0] for s in store.sensors])
+    lower = np.array([HISTORY_SEED_JITTER[s][1] for s in store.sensors])
+    upper = np.array([HISTORY_SEED_JITTER[s][2] for s in store.sensors])
+    # Each generator's backfill comes from its own stream for the seeding minute
+    noise = stream_normals(stream_keys(new['serial_number']), STREAM_HISTORY, now // 60, hours * len(store.sensors))
+    noise = noise.reshape(len(new), hours, len(store.sensors))
+    
+    for step, hours_ago in enumerate(range(hours, 0, -1)):
+        readings = np.clip(current + noise[:, step] * jitter, lower, upper)
+        store.append(new['serial_number'], now - hours_ago * 3600, readings)
+
+def record_status_snapshot(status_df: pd.DataFrame, now: Optional[int] = None) -> None:
+    """Append a status snapshot's readings to the sensor history and the anomaly detector."""
+    now = int(time.time()) if now is None else now
+    store = get_sensor_history()
+    seed_sensor_history(store, status_df, now)
+    store.append(status_df['serial_number'], now, status_df[store.sensors].to_numpy(dtype=float))
+    store.flush()
+    get_anomaly_detector().update(status_df['serial_number'], now, status_df[ANOMALY_SENSORS].to_numpy(dtype=float))
+
+# ========================================
+# PREDICTIVE MAINTENANCE
+# ========================================
+
+# Sensors whose hourly history feeds the failure-risk model, and the features taken from each
+PREDICTIVE_SENSORS = ['oil_pressure', 'coolant_temp', 'vibration']
+PREDICTIVE_FEATURES = ['fault_margin', 'daily_drift', 'zscore']
+
+# Logistic model over the (generator, sensor x feature) matrix. Margins and drifts are in units of
+# each sensor's sampling span, so one weight per feature serves every sensor.
+PREDICTIVE_WEIGHTS = np.tile([-9.0, 6.0, 0.35], len(PREDICTIVE_SENSORS))
+PREDICTIVE_BIAS = -0.5
+
+PREDICTIVE_SIGNS = RULE_SIGNS[[RULE_SENSORS.index(sensor) for sensor in PREDICTIVE_SENSORS]]
+PREDICTIVE_FAULT_LIMITS = RULE_LIMITS[[RULE_SENSORS.index(sensor) for sensor in PREDICTIVE_SENSORS], FAULT - ADVISORY]
+PREDICTIVE_SPANS = np.array([SENSOR_RANGES[sensor][1] - SENSOR_RANGES[sensor][0] for sensor in PREDICTIVE_SENSORS])
+PREDICTIVE_MIN_STD = np.array([HISTORY_SEED_JITTER[sensor][0] for sensor in PREDICTIVE_SENSORS])
+
+def predictive_features(values: np.ndarray, current: np.ndarray,
+                        alpha: float = CONFIG["predictive"]["ewma_alpha"]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rolling features from hourly bucket means.
+
+    ``values`` is (n, hours, sensors) with NaN for missing buckets and ``current`` the
+    latest (n, sensors) readings. Everything is computed in the signed space where larger
+    means closer to a fault. Returns the (n, sensors, features) matrix, the EWMA level
+    and the least-squares slope per hour.
+    """
+    signed = values * PREDICTIVE_SIGNS
+    current = current * PREDICTIVE_SIGNS
+    valid = ~np.isnan(signed)
+    filled = np.where(valid, signed, 0.0)
+    counts = valid.sum(axis=1)
+    
+    # EWMA as one weighted mean: bucket t carries (1 - alpha) ** age, renormalized over present buckets
+    hours = signed.shape[1]
+    decay = ((1 - alpha) ** np.arange(hours - 1, -1, -1))[None, :, None] * valid
+    ewma = np.where(counts > 0, (filled * decay).sum(axis=1) / np.maximum(decay.sum(axis=1), 1e-12), current)
+    
+    # Least-squares slope over the present buckets
+    t = np.arange(hours, dtype=float)[None, :, None]
+    t_mean = (t * valid).sum(axis=1) / np.maximum(counts, 1)
+    y_mean = filled.sum(axis=1) / np.maximum(counts, 1)
+    dt = np.where(valid, t - t_mean[:, None, :], 0.0)
+    slope = np.where(
+        counts >= 3, (dt * (filled - y_mean[:, None, :])).sum(axis=1) / np.maximum((dt ** 2).sum(axis=1), 1e-12), 0.0
+    )
+    
+    variance = (np.where(valid, filled - y_mean[:, None, :], 0.0) ** 2).sum(axis=1) / np.maximum(counts - 1, 1)
+    zscore = np.clip((current - y_mean) / np.maximum(np.sqrt(variance), PREDICTIVE_MIN_STD), -5, 5)
+    zscore = np.where(counts >= 3, zscore, 0.0)
+    
+    features = np.stack([
+        (PREDICTIVE_FAULT_LIMITS - ewma) / PREDICTIVE_SPANS,
+        slope * 24 / PREDICTIVE_SPANS,
+        zscore
+    ], axis=2)
+    return features, ewma, slope
+
+def score_sensor_history(values: np.ndarray, current: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Failure risk (0-1) and predicted hours to the first fault limit for a batch of generators.
+
+    Risk is one matrix-vector product over the flattened feature matrix followed by a
+    logistic. Time to fault extrapolates each sensor's EWMA along its slope; NaN where no
+    sensor is trending towards a fault.
+    """
+    features, ewma, slope = predictive_features(values, current)
+    logit = features.reshape(len(features), -1) @ PREDICTIVE_WEIGHTS + PREDICTIVE_BIAS
+    risk = 1 / (1 + np.exp(-logit))
+    
+    margin = PREDICTIVE_FAULT_LIMITS - ewma
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hours = np.where(margin <= 0, 0.0, np.where(slope > 0, margin / slope, np.inf)).min(axis=1)
+    return risk, np.where(np.isinf(hours), np.nan, hours)
+
+def predicted_priority(status_df: pd.DataFrame, risk: np.ndarray, hours_to_fault: np.ndarray) -> Dict[str, object]:
+    """Raise ticket priority where the model predicts a fault; rule priorities are never lowered.
+
+    Generators without a rule ticket that the model flags get a "Predicted Failure Risk"
+    service ticket.
+    """
+    config = CONFIG["predictive"]
+    predicted_code = np.select(
+        [(risk >= config["high_risk"]) | (hours_to_fault <= config["urgent_hours"]),
+         (risk >= config["medium_risk"]) | (hours_to_fault <= CONFIG["proactive_notification_hours"])],
+        [1, 2],
+        default=-1
+    )
+    rule_code = status_df['priority'].cat.codes.to_numpy()
+    raise_priority = (predicted_code >= 0) & ((rule_code < 0) | (predicted_code < rule_code))
+    new_ticket = raise_priority & (rule_code < 0)
+    
+    service_code = status_df['service_type'].cat.codes.to_numpy()
+    service_code = np.where(new_ticket, SERVICE_TYPES.index("Predicted Failure Risk"), service_code)
+    needs_proactive_contact = status_df['needs_proactive_contact'].to_numpy() | new_ticket
+    return {
+        'service_type': pd.Categorical.from_codes(service_code, SERVICE_TYPES),
+        'needs_proactive_contact': needs_proactive_contact,
+        'revenue_opportunity': status_df['revenue_opportunity'].to_numpy() | new_ticket,
+        'priority': pd.Categorical.from_codes(
+            np.where(raise_priority, predicted_code, rule_code), PRIORITY_LEVELS, ordered=True
+        )
+    }
+
+class PredictiveScorer:
+    """Failure-risk scores per generator, refreshed only where sensor history moved on.
+
+    Scores are kept in arrays indexed by serial number together with the history time
+    they were computed from. A refresh re-featurizes and re-scores, as one batch, only the
+    generators whose last-seen time in the history store is newer than their score.
+    """
+    
+    def __init__(self, history: SensorHistoryStore):
+        self.history = history
+        self._lock = threading.Lock()
+        self._index = pd.Index([], dtype=object)
+        self._risk = np.zeros(0, dtype=np.float32)
+        self._hours = np.zeros(0, dtype=np.float32)
+        self._scored_at = np.zeros(0, dtype=np.int64)
+        self._last = (None, -1, None)
+        self.stats = {'refreshes': 0, 'scored': 0, 'reused': 0}
+    
+    def _rows_for(self, serials: pd.Index) -> np.ndarray:
+        rows = self._index.get_indexer(serials)
+        if (rows < 0).any():
+            self._index = self._index.append(serials[rows < 0].unique())
+            grow = len(self._index) - len(self._risk)
+            self._risk = np.append(self._risk, np.zeros(grow, dtype=np.float32))
+            self._hours = np.append(self._hours, np.full(grow, np.nan, dtype=np.float32))
+            self._scored_at = np.append(self._scored_at, np.zeros(grow, dtype=np.int64))
+            rows = self._index.get_indexer(serials)
+        return rows
+    
+    def score(self, serials, current: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Risk and hours to fault for each serial, given their latest (n, sensors) readings."""
+        serials = pd.Index(serials, dtype=object)
+        with self._lock:
+            rows = self._rows_for(serials)
+            seen = self.history.last_seen(serials)
+            stale = np.flatnonzero(seen > self._scored_at[rows])
+            if len(stale):
+                end = int(seen[stale].max())
+                start = end - CONFIG["predictive"]["window_hours"] * 3600
+                _, values = self.history.query_matrix(serials[stale], start, end, '1h')
+                columns = [self.history.sensors.index(sensor) for sensor in PREDICTIVE_SENSORS]
+                risk, hours = score_sensor_history(values[:, :, columns].astype(float), current[stale])
+                self._risk[rows[stale]] = risk
+                self._hours[rows[stale]] = hours
+                self._scored_at[rows[stale]] = seen[stale]
+            self.stats['refreshes'] += 1
+            self.stats['scored'] += len(stale)
+            self.stats['reused'] += len(rows) - len(stale)
+            return self._risk[rows].astype(float), self._hours[rows].astype(float)
+    
+    def apply(self, status_df: pd.DataFrame) -> pd.DataFrame:
+        """Status frame with failure_risk and hours_to_fault columns and predicted priorities.
+
+        The last result is reused while the same frame is passed and the history is
+        unchanged, so every session reading a shared status frame shares its scores.
+        """
+        last_input, last_version, last_output = self._last
+        if status_df is last_input and last_version == self.history.version:
+            return last_output
+        version = self.history.version
+        risk, hours = self.score(status_df['serial_number'], status_df[PREDICTIVE_SENSORS].to_numpy(dtype=float))
+        scored = status_df.assign(
+            failure_risk=risk.round(3),
+            hours_to_fault=hours.round(1),
+            **predicted_priority(status_df, risk, hours)
+        )
+        self._last = (status_df, version, scored)
+        return scored
+
+@st.cache_resource
+def get_predictive_scorer() -> PredictiveScorer:
+    """Process-wide predictive scorer over the shared sensor history."""
+    return PredictiveScorer(get_sensor_history())
+
+# ========================================
+# ANOMALY DETECTION
+# ========================================
+
+# Fuel is left out: it drains steadily while a generator runs, which is not a drift
+ANOMALY_SENSORS = ['oil_pressure', 'coolant_temp', 'vibration']
+ANOMALY_SIGNS = RULE_SIGNS[[RULE_SENSORS.index(sensor) for sensor in ANOMALY_SENSORS]]
+ANOMALY_MIN_STD = np.array([HISTORY_SEED_JITTER[sensor][0] for sensor in ANOMALY_SENSORS], dtype=np.float32)
+
+class AnomalyDetector:
+    """Online drift detection with constant memory per generator.
+
+    Each generator owns one row of preallocated arrays: a Welford running mean and sum of
+    squared deviations per sensor as its baseline, and a one-sided CUSUM of the
+    standardized deviation towards the sensor's fault limit. A sensor is flagged while its
+    CUSUM is above the decision interval h; flagged generators stop learning so a slow
+    drift is not absorbed into their baseline.
+    """
+    
+    def __init__(self, initial_rows: int = 1024, config: Dict = CONFIG["anomaly"]):
+        self._lock = threading.Lock()
+        self._index = pd.Index([], dtype=object)
+        self.min_samples = config["min_samples"]
+        self.k = config["cusum_k"]
+        self.h = config["cusum_h"]
+        self._count = np.zeros(initial_rows, dtype=np.int32)
+        self._last_seen = np.zeros(initial_rows, dtype=np.int64)
+        self._mean = np.zeros((initial_rows, len(ANOMALY_SENSORS)), dtype=np.float32)
+        self._m2 = np.zeros((initial_rows, len(ANOMALY_SENSORS)), dtype=np.float32)
+        self._cusum = np.zeros((initial_rows, len(ANOMALY_SENSORS)), dtype=np.float32)
+        self._last = (None, -1, None)
+        self.version = 0
+        self.stats = {'updates': 0, 'readings': 0, 'flagged': 0}
+    
+    def _rows_for(self, serials: pd.Index, create: bool = False) -> np.ndarray:
+        rows = self._index.get_indexer(serials)
+        if create and (rows < 0).any():
+            self._index = self._index.append(serials[rows < 0].unique())
+            rows = self._index.get_indexer(serials)
+            if len(self._index) > len(self._count):
+                capacity = max(len(self._index), 2 * len(self._count))
+                for name in ('_count', '_last_seen', '_mean', '_m2', '_cusum'):
+                    array = getattr(self, name)
+                    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+                    grown[:len(array)] = array
+                    setattr(self, name, grown)
+        return rows
+    
+    def update(self, serials, timestamp: int, readings: np.ndarray) -> None:
+        """Feed one (n, sensors) batch of readings; readings not newer than a generator's last are ignored."""
+        serials = pd.Index(serials, dtype=object)
+        readings = np.asarray(readings, dtype=np.float32).reshape(-1, len(ANOMALY_SENSORS))
+        with self._lock:
+            rows = self._rows_for(serials, create=True)
+            _, last = np.unique(rows[::-1], return_index=True)
+            keep = len(rows) - 1 - last
+            keep = keep[self._last_seen[rows[keep]] < timestamp]
+            rows, signed = rows[keep], readings[keep] * ANOMALY_SIGNS
+            
+            count, mean, m2 = self._count[rows], self._mean[rows], self._m2[rows]
+            std = np.maximum(np.sqrt(m2 / np.maximum(count - 1, 1)[:, None]), ANOMALY_MIN_STD)
+            warm = (count >= self.min_samples)[:, None]
+            cusum = np.where(warm, np.maximum(0, self._cusum[rows] + (signed - mean) / std - self.k), 0)
+            flagged = (cusum > self.h).any(axis=1)
+            
+            learn = ~flagged
+            learn_rows = rows[learn]
+            n = count[learn] + 1
+            delta = signed[learn] - mean[learn]
+            new_mean = mean[learn] + delta / n[:, None]
+            self._m2[learn_rows] = m2[learn] + delta * (signed[learn] - new_mean)
+            self._mean[learn_rows] = new_mean
+            self._count[learn_rows] = n
+            self._cusum[rows] = cusum
+            self._last_seen[rows] = timestamp
+            
+            self.version += 1
+            self.stats['updates'] += 1
+            self.stats['readings'] += len(rows)
+            self.stats['flagged'] = int((self._cusum[:len(self._index)] > self.h).any(axis=1).sum())
+    
+    def flags(self, serials) -> Tuple[np.ndarray, np.ndarray]:
+        """Bitmask of drifting sensors (bit j = j-th anomaly sensor) and the baseline means, per serial."""
+        with self._lock:
+            rows = self._index.get_indexer(pd.Index(serials, dtype=object))
+            known = rows >= 0
+            drifting = np.zeros((len(rows), len(ANOMALY_SENSORS)), dtype=bool)
+            drifting[known] = self._cusum[rows[known]] > self.h
+            baseline = np.full((len(rows), len(ANOMALY_SENSORS)), np.nan)
+            baseline[known] = self._mean[rows[known]] * ANOMALY_SIGNS
+        return (drifting << np.arange(len(ANOMALY_SENSORS))).sum(axis=1), baseline
+    
+    def apply(self, status_df: pd.DataFrame) -> pd.DataFrame:
+        """Status frame with anomaly_code and anomaly_text columns.
+
+        Drifting generators without a ticket get a MEDIUM one; ticket_kinds files it as an
+        anomaly while the hard limits have not yet reached WARNING.
+        """
+        last_input, last_version, last_output = self._last
+        if status_df is last_input and last_version == self.version:
+            return last_output
+        version = self.version
+        code, baseline = self.flags(status_df['serial_number'])
+        
+        text = np.full(len(status_df), "", dtype=object)
+        for j, sensor in enumerate(ANOMALY_SENSORS):
+            drifting = np.flatnonzero(code & (1 << j))
+            if not len(drifting):
+                continue
+            rule = SENSOR_RULES[sensor]
+            direction = "down" if rule['direction'] == 'below' else "up"
+            labels = np.array([
+                f"{rule['label']} drifting {direction} from {value:.1f}{rule['unit']} baseline"
+                for value in baseline[drifting, j]
+            ], dtype=object)
+            separator = np.where(text[drifting] != "", "; ", "").astype(object)
+            text[drifting] = text[drifting] + separator + labels
+        
+        new_ticket = (code > 0) & status_df['priority'].isna().to_numpy()
+        priority_code = np.where(new_ticket, PRIORITY_LEVELS.index("MEDIUM"), status_df['priority'].cat.codes.to_numpy())
+        flagged = status_df.assign(
+            anomaly_code=code.astype(np.int8),
+            anomaly_text=text,
+            needs_proactive_contact=status_df['needs_proactive_contact'].to_numpy() | new_ticket,
+            revenue_opportunity=status_df['revenue_opportunity'].to_numpy() | new_ticket,
+            priority=pd.Categorical.from_codes(priority_code, PRIORITY_LEVELS, ordered=True)
+        )
+        self._last = (status_df, version, flagged)
+        return flagged
+
+@st.cache_resource
+def get_anomaly_detector() -> AnomalyDetector:
+    """Process-wide streaming anomaly detector."""
+    return AnomalyDetector()
+
+# ========================================
+# FLEET SUMMARIES
+# ========================================
+
+# Materialized summary rows are keyed by these fleet attributes; coarser levels are maintained alongside
+SUMMARY_KEYS = ['customer_name', 'location_city', 'model_series', 'service_contract']
+SUMMARY_LEVELS = {
+    'group': SUMMARY_KEYS,
+    'customer': ['customer_name'],
+    'region': ['location_city'],
+    'fleet': []
+}
+SUMMARY_METRICS = ['generators', 'rated_kw'] + STATUS_CODES + ['load_sum']
+SUMMARY_STATUS_OFFSET = SUMMARY_METRICS.index(STATUS_CODES[0])
+SUMMARY_LOAD = SUMMARY_METRICS.index('load_sum')
+
+class FleetSummary:
+    """Pre-aggregated fleet metrics maintained incrementally as generator statuses change.
+
+    Rows are aligned with the fleet frame passed to ``attach_fleet``. Each generator's
+    last status and load are kept so a change only subtracts the old contribution and
+    adds the new one at every summary level; reading a customer's or region's metrics
+    is a single keyed lookup.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._levels = {}
+        self._serial_index = None
+        self._status = None
+        self._load = None
+        self.version = 0
+    
+    @property
+    def fleet_size(self) -> int:
+        return 0 if self._serial_index is None else len(self._serial_index)
+    
+    def attach_fleet(self, generators_df: pd.DataFrame, baseline: pd.DataFrame) -> None:
+        """Register the fleet's grouping keys and capacity, then apply a baseline status frame."""
+        fleet = generators_df.reset_index(drop=True)
+        with self._lock:
+            self._serial_index = pd.Index(fleet['serial_number'])
+            self._status = np.full(len(fleet), -1, dtype=np.int8)
+            self._load = np.zeros(len(fleet), dtype=np.float64)
+            self._levels = {}
+            for level, keys in SUMMARY_LEVELS.items():
+                if keys:
+                    codes, uniques = pd.factorize(pd.MultiIndex.from_frame(fleet[keys]) if len(keys) > 1 else fleet[keys[0]])
+                else:
+                    codes, uniques = np.zeros(len(fleet), dtype=np.int64), pd.Index(['ALL'])
+                values = np.zeros((len(uniques), len(SUMMARY_METRICS)), dtype=np.float64)
+                values[:, 0] = np.bincount(codes, minlength=len(uniques))
+                values[:, 1] = np.bincount(codes, weights=fleet['rated_kw'].to_numpy(dtype=np.float64), minlength=len(uniques))
+                index = uniques if isinstance(uniques, pd.MultiIndex) else pd.Index(uniques)
+                if keys:
+                    index.names = keys
+                self._levels[level] = (codes, index, values)
+        self.update(baseline)
+    
+    def apply(self, rows: np.ndarray, status_codes: np.ndarray, loads: np.ndarray) -> None:
+        """Move the given fleet rows to new status codes (index into STATUS_CODES, -1 = none) and loads."""
+        if len(rows) == 0:
+            return
+        with self._lock:
+            delta = np.zeros((len(rows), len(SUMMARY_METRICS)), dtype=np.float64)
+            old_status, old_load = self._status[rows], self._load[rows]
+            positions = np.arange(len(rows))
+            had = old_status >= 0
+            has = status_codes >= 0
+            delta[positions[had], SUMMARY_STATUS_OFFSET + old_status[had]] -= 1
+            delta[positions[has], SUMMARY_STATUS_OFFSET + status_codes[has]] += 1
+            delta[:, SUMMARY_LOAD] = np.where(has, loads, 0) - np.where(had, old_load, 0)
+            for codes, _, values in self._levels.values():
+                np.add.at(values, codes[rows], delta)
+            self._status[rows] = status_codes
+            self._load[rows] = np.where(has, loads, 0)
+            self.version += 1
+    
+    def update(self, status_df: pd.DataFrame) -> int:
+        """Diff a full status snapshot against the summary; returns how many generators changed."""
+        rows = self._serial_index.get_indexer(status_df['serial_number'])
+        known = rows >= 0
+        rows = rows[known]
+        status_codes = pd.Categorical(status_df['operational_status'], categories=STATUS_CODES).codes[known]
+        loads = status_df['load_percent'].to_numpy(dtype=np.float64)[known]
+        changed = (status_codes != self._status[rows]) | (loads != self._load[rows])
+        self.apply(rows[changed], status_codes[changed], loads[changed])
+        return int(changed.sum())
+    
+    def lookup(self, level: str, key=None) -> Dict[str, float]:
+        """Metrics for one key of a summary level (no key for 'fleet')."""
+        with self._lock:
+            _, index, values = self._levels[level]
+            position = index.get_indexer([key if key is not None else 'ALL'])[0]
+            row = values[position] if position >= 0 else np.zeros(len(SUMMARY_METRICS))
+            metrics = dict(zip(SUMMARY_METRICS, row.tolist()))
+        reporting = sum(metrics[status] for status in STATUS_CODES)
+        metrics['avg_load'] = metrics['load_sum'] / reporting if reporting else 0.0
+        return metrics
+    
+    def table(self, level: str = 'group') -> pd.DataFrame:
+        """A summary level as a DataFrame indexed by its keys."""
+        with self._lock:
+            _, index, values = self._levels[level]
+            table = pd.DataFrame(values.copy(), index=index, columns=SUMMARY_METRICS)
+        return with_average_load(table)
+    
+    def rollup(self, by: List[str]) -> pd.DataFrame:
+        """Roll the materialized rows up to any subset of SUMMARY_KEYS, e.g. a regional view."""
+        table = self.table('group')[SUMMARY_METRICS]
+        return with_average_load(table.groupby(level=by, observed=True).sum())
+
+def with_average_load(table: pd.DataFrame) -> pd.DataFrame:
+    """Add the average load column to summary rows."""
+    reporting = table[STATUS_CODES].sum(axis=1)
+    return table.assign(avg_load=(table['load_sum'] / reporting.where(reporting > 0)).fillna(0.0))
+
+@st.cache_resource
+def get_fleet_summary() -> FleetSummary:
+    """Process-wide fleet summary."""
+    return FleetSummary()
+
+# ========================================
+# TELEMETRY INGESTION
+# ========================================
+
+TELEMETRY_INBOX = DATA_DIR / "telemetry_inbox"
+TELEMETRY_MAGIC = b"PSTB"
+TELEMETRY_VERSION = 1
+
+# Wire format: one fixed-size header followed by `count` packed records, decoded in place
+TELEMETRY_HEADER = np.dtype([
+    ('magic', 'S4'), ('version', '<u2'), ('reserved', '<u2'), ('count', '<u4'), ('timestamp', '<i8')
+])
+TELEMETRY_RECORD = np.dtype(
+    [('serial', 'S16')] + [(sensor, '<f4') for sensor in SENSOR_RANGES] + [('demand', 'u1')]
+)
+
+def encode_telemetry_batch(serials, readings: np.ndarray, demand: np.ndarray, timestamp: int) -> bytes:
+    """Pack a batch of readings (one row per generator, SENSOR_RANGES order) into the wire format."""
+    records = np.empty(len(readings), dtype=TELEMETRY_RECORD)
+    records['serial'] = np.asarray(serials, dtype='S16')
+    for j, sensor in enumerate(SENSOR_RANGES):
+        records[sensor] = readings[:, j]
+    records['demand'] = demand
+    header = np.array([(TELEMETRY_MAGIC, TELEMETRY_VERSION, 0, len(records), timestamp)], dtype=TELEMETRY_HEADER)
+    return header.tobytes() + records.tobytes()
+
+def decode_telemetry_batch(buffer) -> Tuple[int, np.ndarray]:
+    """Decode a batch without copying: the records are a structured view over the buffer."""
+    header = np.frombuffer(buffer, dtype=TELEMETRY_HEADER, count=1)[0]
+    if header['magic'] != TELEMETRY_MAGIC or header['version'] != TELEMETRY_VERSION:
+        raise ValueError("Not a telemetry batch")
+    records = np.frombuffer(buffer, dtype=TELEMETRY_RECORD, count=int(header['count']),
+                            offset=TELEMETRY_HEADER.itemsize)
+    return int(header['timestamp']), records
+
+# Status columns that depend only on the generator record, not on its readings
+LIVE_STATIC_COLUMNS = [
+    'serial_number', 'customer_name', 'customer_contact', 'next_service_hours',
+    'service_type', 'runtime_hours', 'needs_proactive_contact'
+]
+
+class LiveStatusTable:
+    """In-memory columnar fleet status maintained incrementally from telemetry.
+
+    Columns are held as NumPy arrays (categoricals as their codes). Incoming readings are
+    matched to fleet rows with a sorted serial index, compared with the current readings,
+    and only generators whose readings or demand changed are re-classified and written
+    back. Readers get a DataFrame snapshot that is built at most once per version.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = {}
+        self._categories = {}
+        self._readings = None
+        self._demand = None
+        self._fleet = None
+        self._sorted_serials = None
+        self._sorted_rows = None
+        self._snapshot = None
+        self._snapshot_version = -1
+        self._thresholds_version = 0
+        self.version = 0
+        self.stats = {'batches': 0, 'readings': 0, 'changed': 0, 'unknown': 0, 'last_timestamp': 0}
+    
+    @property
+    def fleet_size(self) -> int:
+        return 0 if self._fleet is None else len(self._fleet)
+    
+    def attach_fleet(self, generators_df: pd.DataFrame, baseline: pd.DataFrame) -> None:
+        """Register the fleet and start from a baseline status frame until telemetry arrives."""
+        with self._lock:
+            self._fleet = generators_df.reset_index(drop=True)
+            self._columns, self._categories = {}, {}
+            for col in baseline.columns:
+                values = baseline[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    self._categories[col] = values.dtype
+                    self._columns[col] = values.cat.codes.to_numpy(copy=True)
+                else:
+                    self._columns[col] = values.to_numpy(copy=True)
+            self._readings = baseline[list(SENSOR_RANGES)].to_numpy(dtype=np.float32, copy=True)
+            self._demand = (baseline['operational_status'] != 'STANDBY').to_numpy(copy=True)
+            serials = self._fleet['serial_number'].to_numpy().astype('S16')
+            self._sorted_rows = np.argsort(serials, kind='stable')
+            self._sorted_serials = serials[self._sorted_rows]
+            self._snapshot_version = -1
+    
+    def _rows_for(self, serials: np.ndarray) -> np.ndarray:
+        if not len(self._sorted_serials):
+            return np.full(len(serials), -1, dtype=np.int64)
+        pos = np.searchsorted(self._sorted_serials, serials)
+        pos = np.minimum(pos, len(self._sorted_serials) - 1)
+        return np.where(self._sorted_serials[pos] == serials, self._sorted_rows[pos], -1)
+    
+    def ingest(self, timestamp: int, records: np.ndarray,
+               thresholds: Optional[ThresholdProfiles] = None) -> np.ndarray:
+        """Apply a decoded batch; returns the fleet rows that changed.
+
+        When the threshold profiles changed since the last batch, every row is
+        re-classified once so alert levels follow the new limits.
+        """
+        with self._lock:
+            if self._fleet is None:
+                return np.empty(0, dtype=np.int64)
+            rows = self._rows_for(records['serial'])
+            known = rows >= 0
+            self.stats['unknown'] += int((~known).sum())
+            rows, records = rows[known], records[known]
+            
+            # Later readings for the same generator win within a batch
+            _, last = np.unique(rows[::-1], return_index=True)
+            keep = len(rows) - 1 - last
+            rows, records = rows[keep], records[keep]
+            
+            readings = np.column_stack([records[sensor] for sensor in SENSOR_RANGES]).astype(np.float32)
+            demand = records['demand'].astype(bool)
+            changed = (readings != self._readings[rows]).any(axis=1) | (demand != self._demand[rows])
+            rows, readings, demand = rows[changed], readings[changed], demand[changed]
+            
+            self.stats['batches'] += 1
+            self.stats['readings'] += len(records)
+            self.stats['last_timestamp'] = max(self.stats['last_timestamp'], timestamp)
+            thresholds_version = thresholds.version if thresholds is not None else 0
+            reclassify_all = thresholds_version != self._thresholds_version
+            if len(rows) == 0 and not reclassify_all:
+                return rows
+            
+            self._readings[rows] = readings
+            self._demand[rows] = demand
+            if reclassify_all:
+                rows, readings, demand = np.arange(len(self._fleet)), self._readings, self._demand
+                self._thresholds_version = thresholds_version
+            updated = classify_fleet_status(
+                self._fleet.iloc[rows],
+                {sensor: readings[:, j].astype(float) for j, sensor in enumerate(SENSOR_RANGES)},
+                demand, thresholds
+            )
+            for col in updated.columns:
+                if col in LIVE_STATIC_COLUMNS:
+                    continue
+                if col in self._categories:
+                    self._columns[col][rows] = updated[col].cat.codes.to_numpy()
+                else:
+                    self._columns[col][rows] = updated[col].to_numpy()
+            
+            self.stats['changed'] += len(rows)
+            self.version += 1
+            return rows
+    
+    def row_status(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Status codes (index into STATUS_CODES) and load of the given fleet rows."""
+        with self._lock:
+            return self._columns['operational_status'][rows].copy(), self._columns['load_percent'][rows].copy()
+    
+    def snapshot(self) -> pd.DataFrame:
+        """Current fleet status; treat the returned frame as read-only."""
+        with self._lock:
+            if self._snapshot_version != self.version:
+                self._snapshot = pd.DataFrame({
+                    col: (pd.Categorical.from_codes(values, dtype=self._categories[col])
+                          if col in self._categories else values.copy())
+                    for col, values in self._columns.items()
+                })
+                self._snapshot_version = self.version
+            return self._snapshot
+
+class TelemetryIngestService:
+    """Background telemetry ingestion from a local TCP socket and a file-drop inbox.
+
+    Socket clients send length-prefixed batches (4-byte little-endian size, then the batch).
+    Producers using the inbox write `*.tmp` files and rename them to `*.bin` when complete.
+    """
+    
+    def __init__(self, table: LiveStatusTable, history: Optional[SensorHistoryStore] = None,
+                 summary: Optional[FleetSummary] = None, thresholds: Optional["ThresholdProfileStore"] = None,
+                 anomalies: Optional[AnomalyDetector] = None,
+                 host: str = CONFIG["telemetry"]["host"], port: int = CONFIG["telemetry"]["port"],
+                 inbox: Path = TELEMETRY_INBOX):
+        self.table = table
+        self.history = history
+        self.summary = summary
+        self.thresholds = thresholds
+        self.anomalies = anomalies
+        self._apply_lock = threading.Lock()
+        self.host = host
+        self.port = port
+        self.inbox = Path(inbox)
+        self._server = None
+        self._stop = threading.Event()
+        self._threads = []
+    
+    def ingest_bytes(self, buffer) -> int:
+        """Decode and apply one batch; returns the number of generators that changed."""
+        timestamp, records = decode_telemetry_batch(buffer)
+        with self._apply_lock:
+            profiles = self.thresholds.profiles() if self.thresholds is not None else None
+            changed = self.table.ingest(timestamp, records, profiles)
+            if self.summary is not None and self.summary.fleet_size == self.table.fleet_size:
+                self.summary.apply(changed, *self.table.row_status(changed))
+        if self.history is not None and len(records):
+            readings = np.column_stack([records[sensor] for sensor in SENSOR_RANGES])
+            self.history.append(records['serial'].astype(str), timestamp, readings)
+        if self.anomalies is not None and len(records):
+            readings = np.column_stack([records[sensor] for sensor in ANOMALY_SENSORS])
+            self.anomalies.update(records['serial'].astype(str), timestamp, readings)
+        return len(changed)
+    
+    def start(self) -> None:
+        self.inbox.mkdir(parents=True, exist_ok=True)
+        self._spawn(self._poll_inbox)
+        try:
+            self._server = socketserver.ThreadingTCPServer((self.host, self.port), self._make_handler())
+            self._server.daemon_threads = True
+            self._spawn(self._server.serve_forever)
+        except OSError:
+            # Another process already owns the port; this one still drains the inbox
+            self._server = None
+    
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+    
+    def _spawn(self, target) -> None:
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+    
+    def _make_handler(self):
+        service = self
+        
+        class BatchHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                buffer = bytearray(1 << 20)
+                while not service._stop.is_set():
+                    size_bytes = self._read_exact(4)
+                    if size_bytes is None:
+                        return
+                    size = int.from_bytes(size_bytes, 'little')
+                    if size > len(buffer):
+                        buffer = bytearray(size)
+                    view = memoryview(buffer)[:size]
+                    if not self._read_into(view):
+                        return
+                    try:
+                        service.ingest_bytes(view)
+                    except ValueError:
+                        return
+            
+            def _read_exact(self, size):
+                data = bytearray(size)
+                return bytes(data) if self._read_into(memoryview(data)) else None
+            
+            def _read_into(self, view):
+                while len(view):
+                    received = self.request.recv_into(view)
+                    if received == 0:
+                        return False
+                    view = view[received:]
+                return True
         
-        for col in contact_columns:
-            if col not in df.columns:
-                df[col] = df['customer_name'].apply(lambda x: contact_mapping.get(x, default_contact).get(col, default_contact[col]))
+        return BatchHandler
+    
+    def _poll_inbox(self) -> None:
+        while not self._stop.is_set():
+            for path in sorted(self.inbox.glob("*.bin")):
+                try:
+                    self.ingest_bytes(np.fromfile(path, dtype=np.uint8))
+                except ValueError:
+                    path.rename(path.with_suffix(".rejected"))
+                    continue
+                path.unlink(missing_ok=True)
+            self._stop.wait(CONFIG["telemetry"]["inbox_poll_seconds"])
+
+@st.cache_resource
+def get_telemetry_service() -> TelemetryIngestService:
+    """Process-wide telemetry service, started on first use."""
+    service = TelemetryIngestService(
+        LiveStatusTable(), history=get_sensor_history(), summary=get_fleet_summary(),
+        thresholds=get_threshold_store(), anomalies=get_anomaly_detector()
+    )
+    if CONFIG["telemetry"]["enabled"]:
+        service.start()
+    return service
+
+# ========================================
+# SHARED CACHE
+# ========================================
+
+class SharedFrameCache:
+    """Process-wide cache of read-only frames shared by every session.
+
+    Entries are keyed by (name, data version) instead of by hashing arguments, so a hit
+    is a dict lookup and every session receives the same object; treat returned frames
+    as read-only. Storing a new version of a name drops its older versions,
+    ``invalidate`` drops entries explicitly, and least-recently-used entries are evicted
+    once the byte budget is exceeded. Misses build under a lock per key, so sessions
+    only wait for a builder of the same (name, version).
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Key -> lock held while that key is being built
+        self._building = {}
+        self._entries = OrderedDict()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'bytes': 0}
+        # Hits and misses per entry name, e.g. {'fleet': [hits, misses]}
+        self.name_stats = {}
+    
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                self.name_stats.setdefault(key[0], [0, 0])[0] += 1
+            return entry
+    
+    def get(self, name: str, version, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """The frame for (name, version), building it once on a miss."""
+        key = (name, version)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[0]
         
-        df.to_csv(generators_file, index=False)
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            # Another session may have built it while this one waited
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[0]
+            try:
+                frame = build()
+            except BaseException:
+                with self._lock:
+                    self._building.pop(key, None)
+                raise
+            size = int(frame.memory_usage(index=True, deep=True).sum())
+            with self._lock:
+                self.stats['misses'] += 1
+                self.name_stats.setdefault(name, [0, 0])[1] += 1
+                for stale in [k for k in self._entries if k[0] == name]:
+                    self._drop(stale)
+                self._entries[key] = (frame, size)
+                self._building.pop(key, None)
+                self.stats['bytes'] += size
+                while self.stats['bytes'] > self.max_bytes and len(self._entries) > 1:
+                    self._drop(next(iter(self._entries)))
+                    self.stats['evictions'] += 1
+            return frame
+    
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop every version of one entry, or everything."""
+        with self._lock:
+            for key in [k for k in self._entries if name is None or k[0] == name]:
+                self._drop(key)
+    
+    def _drop(self, key) -> None:
+        _, size = self._entries.pop(key)
+        self.stats['bytes'] -= size
+
+@st.cache_resource
+def get_shared_cache() -> SharedFrameCache:
+    """Process-wide shared frame cache."""
+    return SharedFrameCache(CONFIG["shared_cache"]["max_mb"] << 20)
+
+# ========================================
+# INSTRUMENTATION
+# ========================================
+
+# Prometheus text-format metrics, one file per server process, for a local scraper to collect
+METRICS_DIR = DATA_DIR / "metrics"
+
+def estimate_bytes(value) -> int:
+    """Approximate memory held by one session-state value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(index=True, deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+def process_memory_bytes() -> int:
+    """Resident set size of this process, or 0 where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+def prometheus_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class PerformanceMetrics:
+    """Stage timings, counters and session memory for this server process.
+
+    Each rerun keeps a trace of the spans it entered, in start order and with their
+    nesting depth, on its own script thread; the admin panel draws the current rerun's
+    trace. Every span also adds to process-wide totals, which are written as a
+    Prometheus text file at most once per export interval.
+    """
+    
+    def __init__(self, export_file: Path):
+        self.export_file = export_file
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_export = 0.0
+        # Stage name -> [calls, total seconds, slowest seconds]
+        self.stages = {}
+        self.counters = {}
+        # Cache name -> that cache's own stats dict, read for its 'hits' and 'misses'
+        self.caches = {}
+        # Session id -> (session-state bytes, last seen)
+        self.sessions = {}
+    
+    @contextmanager
+    def span(self, name: str):
+        """Time a block as a named stage, nested under any span already open on this thread."""
+        trace = getattr(self._local, 'trace', None)
+        entry = None
+        if trace is not None:
+            entry = [self._local.depth, name, None]
+            trace.append(entry)
+            self._local.depth += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if entry is not None:
+                entry[2] = elapsed
+                self._local.depth -= 1
+            with self._lock:
+                stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+                stage[0] += 1
+                stage[1] += elapsed
+                stage[2] = max(stage[2], elapsed)
+    
+    @contextmanager
+    def rerun(self, name: str):
+        """Time a full script or fragment rerun, starting a fresh trace unless one is already open."""
+        if getattr(self._local, 'trace', None) is not None:
+            with self.span(name):
+                yield
+            return
+        self._local.trace, self._local.depth = [], 0
+        try:
+            with self.span(name):
+                yield
+        finally:
+            self._local.trace = None
+            self.count('reruns')
+            if time.time() - self._last_export >= CONFIG["instrumentation"]["export_seconds"]:
+                self.export()
+    
+    def trace(self) -> List[Tuple[int, str, Optional[float]]]:
+        """Spans entered so far by the rerun on this thread; open spans have no duration yet."""
+        return [tuple(entry) for entry in getattr(self._local, 'trace', None) or []]
+    
+    def track_cache(self, name: str, stats: Dict) -> None:
+        """Report a cache's hit and miss counts alongside the stage timings."""
+        self.caches[name] = stats
+    
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def record_session(self, session_id: str, state_bytes: int) -> None:
+        """Note a session's state size, forgetting sessions idle past the TTL."""
+        now = time.time()
+        with self._lock:
+            self.sessions[session_id] = (state_bytes, now)
+            ttl = CONFIG["instrumentation"]["session_ttl_seconds"]
+            for stale in [sid for sid, (_, seen) in self.sessions.items() if now - seen > ttl]:
+                del self.sessions[stale]
+    
+    def prometheus_text(self) -> str:
+        with self._lock:
+            stages = {name: list(stage) for name, stage in self.stages.items()}
+            counters = dict(self.counters)
+            sessions = dict(self.sessions)
+        
+        lines = []
+        def family(metric: str, kind: str, help_text: str, samples):
+            lines.extend([f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"])
+            lines.extend(f"{metric}{labels} {value}" for labels, value in samples)
+        
+        family("app_stage_calls_total", "counter", "Times each stage ran.",
+               [(f'{{stage="{prometheus_label(name)}"}}', stage[0]) for name, stage in stages.items()])
+        family("app_stage_seconds_total", "counter", "Wall time spent in each stage.",
+               [(f'{{stage="{prometheus_label(name)}"}}', stage[1]) for name, stage in stages.items()])
+        family("app_stage_seconds_max", "gauge", "Slowest single run of each stage.",
+               [(f'{{stage="{prometheus_label(name)}"}}', stage[2]) for name, stage in stages.items()])
+        family("app_events_total", "counter", "Process event counters.",
+               [(f'{{event="{prometheus_label(name)}"}}', value) for name, value in counters.items()])
+        caches = cache_counters()
+        family("app_cache_hits_total", "counter", "Cache lookups served from memory.",
+               [(f'{{cache="{prometheus_label(name)}"}}', hits) for name, (hits, _) in caches.items()])
+        family("app_cache_misses_total", "counter", "Cache lookups that had to build their value.",
+               [(f'{{cache="{prometheus_label(name)}"}}', misses) for name, (_, misses) in caches.items()])
+        family("app_sessions", "gauge", "Sessions seen within the session TTL.", [("", len(sessions))])
+        family("app_session_state_bytes", "gauge", "Approximate session-state size per session.",
+               [(f'{{session="{sid}"}}', size) for sid, (size, _) in sessions.items()])
+        family("app_process_resident_bytes", "gauge", "Resident memory of this server process.",
+               [("", process_memory_bytes())])
+        return "\n".join(lines) + "\n"
+    
+    def export(self) -> None:
+        """Write the metrics file atomically, so a scraper never reads half of it."""
+        self._last_export = time.time()
+        self.export_file.parent.mkdir(parents=True, exist_ok=True)
+        partial_file = self.export_file.with_suffix('.tmp')
+        partial_file.write_text(self.prometheus_text())
+        os.replace(partial_file, self.export_file)
+
+@st.cache_resource
+def get_performance_metrics() -> PerformanceMetrics:
+    """Process-wide performance metrics, exported to this process's own metrics file."""
+    return PerformanceMetrics(METRICS_DIR / f"app_{os.getpid()}.prom")
+
+def cache_counters() -> Dict[str, Tuple[int, int]]:
+    """(hits, misses) of every cache that serves the pages."""
+    metrics = get_performance_metrics()
+    counters = {f"shared:{name}": tuple(stats) for name, stats in get_shared_cache().name_stats.items()}
+    counters.update({name: (stats['hits'], stats['misses']) for name, stats in list(metrics.caches.items())})
+    events = metrics.counters
+    trend_builds = events.get('trend_figure_builds', 0)
+    counters['trend_figure'] = (events.get('trend_figure_requests', 0) - trend_builds, trend_builds)
+    return counters
+
+def record_session_memory() -> int:
+    """Estimate this session's state size and report it to the process metrics."""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex[:8]
+    state_bytes = sum(estimate_bytes(value) for value in st.session_state.to_dict().values())
+    get_performance_metrics().record_session(st.session_state.session_id, state_bytes)
+    return state_bytes
+
+def render_performance_panel(state_bytes: int):
+    """Sidebar panel with the current rerun's stage timings, cache hit rates and memory."""
+    metrics = get_performance_metrics()
+    with st.sidebar.expander("🩺 Performance", expanded=False):
+        spans = [(depth, name, seconds) for depth, name, seconds in metrics.trace() if seconds is not None]
+        if spans:
+            st.markdown("**This rerun**")
+            st.dataframe(pd.DataFrame({
+                'Stage': ["\u2003" * depth + name for depth, name, _ in spans],
+                'ms': [round(seconds * 1000, 1) for _, _, seconds in spans]
+            }), width="stretch", hide_index=True)
+        
+        caches = cache_counters()
+        lookups = {name: hits + misses for name, (hits, misses) in caches.items()}
+        st.markdown("**Caches**")
+        st.dataframe(pd.DataFrame({
+            'Cache': list(caches),
+            'Hits': [hits for hits, _ in caches.values()],
+            'Misses': [misses for _, misses in caches.values()],
+            'Hit rate (%)': [round(100 * hits / lookups[name], 1) if lookups[name] else None
+                             for name, (hits, _) in caches.items()]
+        }), width="stretch", hide_index=True)
+        
+        resident = process_memory_bytes()
+        st.markdown("**Memory**")
+        st.caption(f"Process {resident / 2**20:,.0f} MB" if resident else "Process memory unavailable")
+        st.caption(f"This session {state_bytes / 2**10:,.1f} KB • {len(metrics.sessions)} active sessions")
+        st.caption(f"Prometheus metrics: `{metrics.export_file}`")
+
+# ========================================
+# DATA MODELS AND GENERATION
+# ========================================
+
+# Columnar fleet store (Arrow IPC / Feather), memory-mapped on load
+FLEET_STORE_FILE = DATA_DIR / "generators.arrow"
+LEGACY_GENERATORS_CSV = DATA_DIR / "generators.csv"
+FLEET_CATEGORICAL_COLUMNS = ['customer_name', 'model_series', 'location_city', 'service_contract']
+
+CONTACT_COLUMNS = [
+    'primary_contact_name', 'primary_contact_phone', 'primary_contact_email',
+    'alt_contact_name', 'alt_contact_phone', 'alt_contact_email'
+]
+
+CUSTOMER_CONTACTS = {
+    'King Faisal Medical City': {
+        'primary_contact_name': 'Ahmed Al-Rashid', 'primary_contact_phone': '+966-11-464-7272', 
+        'primary_contact_email': 'ahmed.alrashid@kfmc.sa',
+        'alt_contact_name': 'Fahad Al-Mahmoud', 'alt_contact_phone': '+966-11-464-7273', 
+        'alt_contact_email': 'fahad.mahmoud@kfmc.sa'
+    },
+    'Riyadh Mall Complex': {
+        'primary_contact_name': 'Mohammed Al-Saud', 'primary_contact_phone': '+966-11-234-5678', 
+        'primary_contact_email': 'mohammed.saud@riyadhmall.com',
+        'alt_contact_name': 'Khalid Operations', 'alt_contact_phone': '+966-11-234-5679', 
+        'alt_contact_email': 'ops@riyadhmall.com'
+    }
+}
+
+DEFAULT_CONTACT = {
+    'primary_contact_name': 'Facility Manager', 'primary_contact_phone': '+966-11-000-0000', 
+    'primary_contact_email': 'contact@customer.sa',
+    'alt_contact_name': 'Operations Team', 'alt_contact_phone': '+966-11-000-0001', 
+    'alt_contact_email': 'ops@customer.sa'
+}
+
+def backfill_generator_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Fill in columns that older generator files predate, without touching the file."""
+    missing_contacts = [col for col in CONTACT_COLUMNS if col not in df.columns]
+    if missing_contacts:
+        customers = df['customer_name'].astype(str)
+        contacts = pd.DataFrame.from_dict(CUSTOMER_CONTACTS, orient='index')
+        for col in missing_contacts:
+            df[col] = customers.map(contacts[col]).fillna(DEFAULT_CONTACT[col])
+    
+    if 'customer_contact' not in df.columns:
+        df['customer_contact'] = df['primary_contact_email']
+    
+    if 'installation_date' not in df.columns:
+        # Stable per serial number, so a reload backfills the same dates
+        draws = stream_uniforms(stream_keys(df['serial_number']), STREAM_FLEET, 0, 1)
+        age_days = 365 + (draws[:, 0] * 1461).astype(int)
+        df['installation_date'] = pd.Timestamp(datetime.now()) - pd.to_timedelta(age_days, unit='D')
+    
+    return df
+
+def write_fleet_store(df: pd.DataFrame, store_file: Path = FLEET_STORE_FILE) -> None:
+    """Write the fleet with typed and categorical columns, replacing the store atomically."""
+    df = df.copy()
+    for col in FLEET_CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if 'installation_date' in df.columns:
+        df['installation_date'] = pd.to_datetime(df['installation_date'], format='mixed')
+    
+    tmp_file = store_file.with_suffix(store_file.suffix + ".tmp")
+    feather.write_feather(df.reset_index(drop=True), tmp_file, compression='uncompressed')
+    os.replace(tmp_file, store_file)
+    get_shared_cache().invalidate()
+
+def fleet_store_version(store_file: Path = FLEET_STORE_FILE) -> Tuple[int, int]:
+    """Data version of the fleet store: its modification time and size."""
+    stat = store_file.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+def read_fleet_store(store_file: Path = FLEET_STORE_FILE) -> pd.DataFrame:
+    """Memory-map the fleet store into a DataFrame."""
+    return feather.read_table(store_file, memory_map=True).to_pandas()
+
+def migrate_generators_csv(csv_file: Path = LEGACY_GENERATORS_CSV,
+                           store_file: Path = FLEET_STORE_FILE) -> pd.DataFrame:
+    """One-time migration of the legacy CSV into the fleet store. The CSV is left in place."""
+    df = backfill_generator_columns(pd.read_csv(csv_file))
+    write_fleet_store(df, store_file)
+    return read_fleet_store(store_file)
+
+def load_base_generator_data() -> pd.DataFrame:
+    """Load base generator data with enhanced status tracking.
+
+    One copy per fleet store version is shared by all sessions; the frame carries that
+    version in ``attrs['data_version']``.
+    """
+    if not FLEET_STORE_FILE.exists():
+        if LEGACY_GENERATORS_CSV.exists():
+            migrate_generators_csv()
+        else:
+            write_fleet_store(pd.DataFrame(generate_enhanced_generator_data()))
+    
+    version = fleet_store_version()
+    
+    def build() -> pd.DataFrame:
+        fleet = backfill_generator_columns(read_fleet_store())
+        fleet.attrs['data_version'] = version
+        return fleet
+    
+    return get_shared_cache().get('fleet', version, build)
+
+def index_generators(generators_df: pd.DataFrame) -> pd.DataFrame:
+    """Index generator data by serial number for O(1) lookups and joins.
+
+    Frames that are already indexed are returned unchanged; duplicate serial numbers
+    keep their first row, matching the previous first-match lookups.
+    """
+    if generators_df.index.name == 'serial_number':
+        return generators_df
+    registry = generators_df.set_index('serial_number')
+    return registry[~registry.index.duplicated(keep='first')]
+
+def load_generator_registry() -> pd.DataFrame:
+    """Generator registry keyed by serial number, shared alongside the base data."""
+    fleet = load_base_generator_data()
+    return get_shared_cache().get('registry', fleet.attrs['data_version'], lambda: index_generators(fleet))
+
+def join_generator_info(status_df: pd.DataFrame, generators: pd.DataFrame,
+                        columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Bulk-join generator attributes onto status rows by serial number."""
+    registry = index_generators(generators)
+    columns = [col for col in (columns or registry.columns) if col not in status_df.columns]
+    return status_df.join(registry[columns], on='serial_number')
+
+def generate_enhanced_generator_data() -> Dict:
+    """Generate enhanced generator data with comprehensive contact information."""
+    
+    customer_names = [
+        'King Faisal Medical City', 'Riyadh Mall Complex', 'SABIC Industrial', 'ARAMCO Office Tower',
+        'Al Rajhi Banking HQ', 'STC Data Center', 'NEOM Construction', 'Red Sea Project',
+        'Saudi Airlines Hub', 'KAUST Research', 'PIF Headquarters', 'Vision 2030 Center',
+        'Ministry Complex', 'Royal Hospital', 'Diplomatic Quarter', 'Financial District',
+        'Entertainment City', 'Sports Boulevard', 'Green Riyadh', 'ROSHN Development',
+        'ENOWA Energy Hub', 'THE LINE Project', 'Oxagon Port', 'Trojena Resort',
+        'Al-Ula Heritage', 'Qiddiya Venue', 'SPARK Sports', 'Mukaab Tower',
+        'Diriyah Gate', 'King Salman Park'
+    ]
+    
+    # Generate contact data - ensure exactly 30 entries
+    contact_data = []
+    for i in range(30):
+        contact_data.append({
+            'primary_contact_name': f'Contact-{i+1}', 
+            'primary_contact_phone': f'+966-11-{1000+i:04d}',
+            'primary_contact_email': f'contact{i+1}@customer.sa',
+            'alt_contact_name': f'Alt-Contact-{i+1}', 
+            'alt_contact_phone': f'+966-11-{2000+i:04d}',
+            'alt_contact_email': f'alt{i+1}@customer.sa'
+        })
+    
+    # Per-generator stream draws: installation age, hours to next service, runtime hours
+    serial_numbers = [f'PS-{2020 + i//4}-{(i+1):04d}' for i in range(30)]
+    draws = stream_uniforms(stream_keys(serial_numbers), STREAM_FLEET, 0, 3)
+    age_days = 365 + (draws[:, 0] * 1461).astype(int)
+    
+    return {
+        'serial_number': serial_numbers,
+        'model_series': (['PS-2000 Series', 'PS-1500 Series', 'PS-1000 Series', 'PS-800 Series'] * 8)[:30],
+        'customer_name': customer_names,
+        'primary_contact_name': [contact['primary_contact_name'] for contact in contact_data],
+        'primary_contact_phone': [contact['primary_contact_phone'] for contact in contact_data],
+        'primary_contact_email': [contact['primary_contact_email'] for contact in contact_data],
+        'alt_contact_name': [contact['alt_contact_name'] for contact in contact_data],
+        'alt_contact_phone': [contact['alt_contact_phone'] for contact in contact_data],
+        'alt_contact_email': [contact['alt_contact_email'] for contact in contact_data],
+        'customer_contact': [contact['primary_contact_email'] for contact in contact_data],
+        'rated_kw': [
+            2000, 1500, 1000, 800, 2500, 2000, 1800, 1200,
+            1000, 750, 600, 400, 2200, 1800, 1400, 900,
+            650, 500, 350, 300, 2800, 2200, 1600, 1100,
+            850, 700, 450, 380, 320, 280
+        ],
+        'service_contract': ([
+            'Premium Care', 'Basic Maintenance', 'Preventive Plus', 'No Contract'
+        ] * 8)[:30],
+        'next_service_hours': (-200 + draws[:, 1] * 1001).astype(int).tolist(),
+        'total_runtime_hours': (2000 + draws[:, 2] * 10001).astype(int).tolist(),
+        'location_city': ([
+            'Riyadh', 'Riyadh', 'Dammam', 'Riyadh', 'Riyadh', 'Jeddah', 'NEOM', 'Al-Ula',
+            'Riyadh', 'Thuwal', 'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh',
+            'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh', 'NEOM', 'NEOM', 'NEOM', 'Qiddiya',
+            'Al-Ula', 'Qiddiya', 'Riyadh', 'Riyadh', 'Diriyah', 'Riyadh'
+        ] * 2)[:30],
+        'installation_date': [datetime.now() - timedelta(days=int(days)) for days in age_days]
+    }
+
+# Synthetic fleets: model mix with its rated power range (kW), contract mix and customer home-city mix
+SYNTHETIC_MODELS = {
+    'PS-2000 Series': (0.20, 1800, 2800),
+    'PS-1500 Series': (0.30, 1200, 1800),
+    'PS-1000 Series': (0.30, 700, 1200),
+    'PS-800 Series': (0.20, 280, 700)
+}
+SYNTHETIC_CONTRACTS = {'Premium Care': 0.25, 'Basic Maintenance': 0.35, 'Preventive Plus': 0.25, 'No Contract': 0.15}
+SYNTHETIC_CITIES = {
+    'Riyadh': 0.40, 'Jeddah': 0.15, 'Dammam': 0.10, 'Al Khobar': 0.05, 'Makkah': 0.06, 'Madinah': 0.05,
+    'NEOM': 0.05, 'Tabuk': 0.03, 'Abha': 0.03, 'Diriyah': 0.03, 'Qiddiya': 0.02, 'Al-Ula': 0.02, 'Thuwal': 0.01
+}
+SYNTHETIC_SECTORS = ['Medical Center', 'Mall', 'Industrial', 'Office Tower', 'Data Center', 'Hotel',
+                     'University', 'Utility Plant', 'Port', 'Airport', 'Residential', 'Government']
+
+def synthesize_fleet(customers: int, generators_per_customer: int, seed: int = 0) -> pd.DataFrame:
+    """A reproducible synthetic fleet of about ``customers x generators_per_customer`` generators.
+
+    Customer sizes are lognormal, so a few large accounts own many sites, and every
+    customer has at least one generator. Each customer gets a home city and most of its
+    generators sit there; models, rated power, contracts, ages and runtimes follow the
+    SYNTHETIC_* mixes. Everything is drawn in whole-array operations from one seeded
+    generator, so the same arguments produce the same fleet; only installation dates
+    (and the year in each serial number) count back from today.
+    """
+    rng = np.random.default_rng(seed)
+    total = customers * generators_per_customer
+    weights = rng.lognormal(0.0, 1.0, customers)
+    sizes = 1 + rng.multinomial(total - customers, weights / weights.sum())
+    owner = np.repeat(np.arange(customers), sizes)
+    
+    ids = np.arange(customers)
+    sectors = np.array(SYNTHETIC_SECTORS, dtype=object)[ids % len(SYNTHETIC_SECTORS)]
+    cities = np.array(list(SYNTHETIC_CITIES), dtype=object)
+    home = rng.choice(len(cities), customers, p=list(SYNTHETIC_CITIES.values()))
+    names = cities[home] + " " + sectors + " " + np.char.zfill(ids.astype(str), 5).astype(object)
+    slugs = np.char.zfill(ids.astype(str), 5).astype(object)
+    
+    # Most generators sit in the customer's home city; the rest are spread over the city mix
+    away = rng.random(total) < 0.2
+    city = np.where(away, rng.choice(len(cities), total, p=list(SYNTHETIC_CITIES.values())), home[owner])
+    model = rng.choice(len(SYNTHETIC_MODELS), total, p=[spec[0] for spec in SYNTHETIC_MODELS.values()])
+    kw_low = np.array([spec[1] for spec in SYNTHETIC_MODELS.values()])[model]
+    kw_high = np.array([spec[2] for spec in SYNTHETIC_MODELS.values()])[model]
+    rated_kw = (np.round(rng.uniform(kw_low, kw_high) / 50) * 50).astype(np.int64)
+    contract = rng.choice(len(SYNTHETIC_CONTRACTS), total, p=list(SYNTHETIC_CONTRACTS.values()))
+    age_days = rng.integers(365, 3651, total)
+    utilisation = rng.beta(2, 5, total)
+    now = pd.Timestamp(datetime.now().replace(microsecond=0))
+    installed = now - pd.to_timedelta(age_days, unit='D')
+    
+    primary_email = ("ops" + slugs + "@customer.sa")[owner]
+    return pd.DataFrame({
+        'serial_number': "PS-" + installed.year.astype(str).to_numpy(dtype=object) + "-"
+                         + np.char.zfill(np.arange(1, total + 1).astype(str), 7).astype(object),
+        'model_series': pd.Categorical.from_codes(model, list(SYNTHETIC_MODELS)),
+        'customer_name': pd.Categorical.from_codes(owner, names),
+        'primary_contact_name': ("Facility Manager " + slugs)[owner],
+        'primary_contact_phone': ("+966-11-5" + slugs)[owner],
+        'primary_contact_email': primary_email,
+        'alt_contact_name': ("Operations Desk " + slugs)[owner],
+        'alt_contact_phone': ("+966-11-6" + slugs)[owner],
+        'alt_contact_email': ("alt" + slugs + "@customer.sa")[owner],
+        'customer_contact': primary_email,
+        'rated_kw': rated_kw,
+        'service_contract': pd.Categorical.from_codes(contract, list(SYNTHETIC_CONTRACTS)),
+        'next_service_hours': rng.integers(-200, 801, total),
+        'total_runtime_hours': (age_days * 24 * utilisation).astype(np.int64),
+        'location_city': pd.Categorical.from_codes(city, cities),
+        'installation_date': installed
+    })
+
+def simulate_real_time_status(generators_df: pd.DataFrame) -> pd.DataFrame:
+    """Simulated operational status and sensor data, refreshed once a minute.
+
+    Fleets loaded from the store share one snapshot per (fleet version, minute) across
+    sessions; other frames are simulated directly.
+    """
+    seed = int(time.time() // 60)
+    thresholds = get_threshold_store().profiles()
+    version = generators_df.attrs.get('data_version')
+    if version is None:
+        return build_simulated_status(generators_df, seed, thresholds)
+    return get_shared_cache().get(
+        'status', (version, len(generators_df), seed, thresholds.version),
+        lambda: build_simulated_status(generators_df, seed, thresholds)
+    )
+
+def build_simulated_status(generators_df: pd.DataFrame, seed: int,
+                           thresholds: Optional[ThresholdProfiles] = None) -> pd.DataFrame:
+    """Simulate one status snapshot and feed it to the history store and fleet summary."""
+    status_df = compute_fleet_status(generators_df, seed, thresholds)
+    record_status_snapshot(status_df)
+    update_fleet_summary(generators_df, status_df)
+    return status_df
+
+def update_fleet_summary(generators_df: pd.DataFrame, status_df: pd.DataFrame) -> None:
+    """Apply a full status snapshot to the fleet summary, attaching the fleet first if needed."""
+    summary = get_fleet_summary()
+    if summary.fleet_size != len(generators_df):
+        summary.attach_fleet(generators_df, status_df)
+    else:
+        summary.update(status_df)
+
+def generate_real_time_status(generators_df: pd.DataFrame) -> pd.DataFrame:
+    """Generate real-time operational status and sensor data.
+
+    A fresh snapshot from the status publisher takes precedence, so every server
+    process maps the same version. Otherwise this process reads its live telemetry
+    table once any batch has arrived, and simulates the status until then; either way
+    the rule status is then scored by the predictive model and the anomaly detector.
+    """
+    published = published_status_version()
+    if published is not None:
+        def build() -> pd.DataFrame:
+            status_df = read_published_status()
+            update_fleet_summary(generators_df, status_df)
+            return status_df
+        return get_shared_cache().get('status', ('published', published), build)
+    
+    table = get_telemetry_service().table
+    if table.fleet_size != len(generators_df):
+        table.attach_fleet(generators_df, simulate_real_time_status(generators_df))
+    status_df = simulate_real_time_status(generators_df) if table.stats['batches'] == 0 else table.snapshot()
+    return get_anomaly_detector().apply(get_predictive_scorer().apply(status_df))
+
+# ========================================
+# PUBLISHED STATUS SNAPSHOT
+# ========================================
+
+# Written by publish_status.py; server processes memory-map it instead of computing their own status
+STATUS_SNAPSHOT_FILE = DATA_DIR / "status_snapshot.arrow"
+# Touched on every publish and keepalive; its age, not the snapshot's, says whether the publisher is alive
+STATUS_HEARTBEAT_FILE = DATA_DIR / "status_snapshot.heartbeat"
+
+def touch_status_heartbeat(heartbeat_file: Path = STATUS_HEARTBEAT_FILE) -> None:
+    """Mark the published snapshot as current without changing its version."""
+    heartbeat_file.touch()
+
+def publish_status_snapshot(status_df: pd.DataFrame, version: int,
+                            snapshot_file: Path = STATUS_SNAPSHOT_FILE,
+                            heartbeat_file: Path = STATUS_HEARTBEAT_FILE) -> None:
+    """Write a status snapshot as an uncompressed Arrow file, replacing the previous one atomically.
+
+    Readers that still have the old file mapped keep a consistent view of it.
+    """
+    table = pa.Table.from_pandas(status_df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'snapshot_version'] = str(version).encode()
+    metadata[b'published_at'] = str(int(time.time())).encode()
+    tmp_file = snapshot_file.with_suffix(snapshot_file.suffix + ".tmp")
+    feather.write_feather(table.replace_schema_metadata(metadata), tmp_file, compression='uncompressed')
+    os.replace(tmp_file, snapshot_file)
+    touch_status_heartbeat(heartbeat_file)
+
+def published_status_version(snapshot_file: Path = STATUS_SNAPSHOT_FILE,
+                             heartbeat_file: Path = STATUS_HEARTBEAT_FILE) -> Optional[Tuple[int, int]]:
+    """Identity of the current published snapshot, or None when there is no fresh one.
+
+    The identity only changes when a new snapshot replaces the file; keepalives touch
+    the heartbeat file instead, so an unchanged snapshot keeps its cache entries.
+    """
+    try:
+        heartbeat = heartbeat_file.stat()
+        stat = snapshot_file.stat()
+    except FileNotFoundError:
+        return None
+    if time.time() - heartbeat.st_mtime > CONFIG["status_snapshot"]["max_age_seconds"]:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+def read_published_status(snapshot_file: Path = STATUS_SNAPSHOT_FILE) -> pd.DataFrame:
+    """Memory-map the published snapshot; its version counter lands in ``attrs['snapshot_version']``."""
+    table = feather.read_table(snapshot_file, memory_map=True)
+    status_df = table.to_pandas(split_blocks=True)
+    status_df.attrs['snapshot_version'] = int(table.schema.metadata.get(b'snapshot_version', b'0'))
+    return status_df
+
+def published_snapshot_counter(snapshot_file: Path = STATUS_SNAPSHOT_FILE) -> int:
+    """Version counter of the last published snapshot, 0 when none exists."""
+    if not snapshot_file.exists():
+        return 0
+    metadata = feather.read_table(snapshot_file, memory_map=True).schema.metadata or {}
+    return int(metadata.get(b'snapshot_version', b'0'))
+
+# Ticket categories indexed by ticket kind: 0 = fault, 1 = sensor warning, 2 = service due, 3 = sensor drift
+TICKET_TYPES = ["🚨 FAULT RESPONSE", "⚠️ PREVENTIVE MAINTENANCE", "📅 SCHEDULED MAINTENANCE", "📉 ANOMALY"]
+TICKET_ACTIONS = [
+    "Contact immediately - Emergency service",
+    "Schedule maintenance within 48 hours",
+    "Schedule maintenance within 1 week",
+    "Schedule routine maintenance",
+    "Inspect sensor drift before limits are reached"
+]
+# ID prefix per priority: Critical Fault, High Warning, Preventive Maintenance
+TICKET_PREFIXES = {"CRITICAL": "CF", "HIGH": "HW", "MEDIUM": "PM"}
+# Lifecycle: tickets open as PENDING, move to ESCALATED when their priority rises and CLOSED when cleared
+TICKET_STATUSES = ["PENDING", "ESCALATED", "CLOSED"]
+OPEN_TICKET_STATUSES = ["PENDING", "ESCALATED"]
+
+def format_sar(amount_sar: float) -> str:
+    """Format an amount that is already in SAR."""
+    return CONFIG["currency"]["format"].format(amount_sar)
+
+def format_column(values: pd.Series, formatter) -> np.ndarray:
+    """Format a column for display, calling the formatter once per distinct value."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    labels = np.array([formatter(value) for value in uniques], dtype=object)
+    return labels[codes]
+
+def ticket_kinds(status_df: pd.DataFrame) -> np.ndarray:
+    """Ticket kind per status row: 0 = fault, 1 = sensor warning, 2 = service due, 3 = anomaly, -1 = no ticket.
+
+    Anomalies only count while no hard limit has reached WARNING.
+    """
+    is_fault = (status_df['operational_status'] == 'FAULT').to_numpy()
+    is_warning = (status_df['alert_level'] >= WARNING).to_numpy()
+    is_anomaly = (
+        (status_df['anomaly_code'] > 0).to_numpy()
+        if 'anomaly_code' in status_df.columns else np.zeros(len(status_df), dtype=bool)
+    )
+    kind = np.select([is_fault, is_warning, is_anomaly], [0, 1, 3], default=2)
+    return np.where(status_df['priority'].isna().to_numpy(), -1, kind)
+
+def ticket_revenue_sar(priority: pd.Categorical) -> np.ndarray:
+    """Estimated service revenue per ticket in SAR; critical faults carry a 1.5x premium."""
+    service_revenue_usd = CONFIG['revenue_targets']['service_revenue_per_ticket'] / 3.75
+    is_critical = np.asarray(priority == "CRITICAL")
+    return np.where(is_critical, service_revenue_usd * 1.5, service_revenue_usd) * CONFIG["currency"]["rate"]
+
+def generate_customer_tickets(customer_status: pd.DataFrame, customer_generators: pd.DataFrame) -> pd.DataFrame:
+    """Generate customer-facing tickets similar to work management system.
+
+    Builds the whole ticket table in one vectorized pass over the status rows that have
+    a priority assigned by the threshold rules. Revenue stays numeric (SAR) and is only
+    formatted for display. The rows carry no ticket ID: IDs are issued by the ticket
+    ledger from its primary key when a ticket is opened.
+    """
+    ticket_rows = customer_status[customer_status['priority'].notna()]
+    ticket_rows = join_generator_info(
+        ticket_rows, customer_generators, CONTACT_COLUMNS + ['model_series', 'location_city']
+    ).reset_index(drop=True)
+    for col in CONTACT_COLUMNS:
+        if col not in ticket_rows.columns:
+            ticket_rows[col] = 'N/A'
+    
+    ticket_kind = ticket_kinds(ticket_rows)
+    is_fault = ticket_kind == 0
+    is_warning = ticket_kind == 1
+    is_anomaly = ticket_kind == 3
+    priority = pd.Categorical(ticket_rows['priority'], categories=PRIORITY_LEVELS, ordered=True)
+    
+    action_code = np.select(
+        [is_fault, priority == "HIGH", is_warning, is_anomaly],
+        [0, 1, 2, 4],
+        default=3
+    )
+    service_detail = np.select(
+        [is_fault, is_warning, is_anomaly],
+        [ticket_rows['fault_description'].astype(object), ticket_rows['warning_text'].astype(object),
+         ticket_rows.get('anomaly_text', ticket_rows['service_type']).astype(object)],
+        default=ticket_rows['service_type'].astype(object)
+    )
+    
+    return pd.DataFrame({
+        'type': pd.Categorical.from_codes(ticket_kind, TICKET_TYPES),
+        'generator': ticket_rows['serial_number'],
+        'customer': ticket_rows['customer_name'],
+        **{col: ticket_rows[col] for col in CONTACT_COLUMNS},
+        'service_detail': service_detail,
+        'runtime_hours': ticket_rows['runtime_hours'],
+        'priority': priority,
+        'revenue_sar': ticket_revenue_sar(priority),
+        'action_required': pd.Categorical.from_codes(action_code, TICKET_ACTIONS),
+        'status': pd.Categorical.from_codes(np.zeros(len(ticket_rows), dtype=np.int8), TICKET_STATUSES),
+        'created_time': pd.Timestamp(datetime.now().replace(microsecond=0)),
+        'model_series': ticket_rows['model_series'],
+        'location': ticket_rows['location_city']
+    })
+
+def summarize_tickets(tickets: pd.DataFrame) -> pd.DataFrame:
+    """Ticket counts and revenue per priority."""
+    return tickets.groupby('priority', observed=False).agg(
+        count=('generator', 'size'),
+        revenue_sar=('revenue_sar', 'sum')
+    )
+
+def format_ticket_table(tickets: pd.DataFrame) -> pd.DataFrame:
+    """Shape a ticket frame for the work management table, formatting values for display only."""
+    tickets = tickets.sort_values('priority', kind='stable')
+    return pd.DataFrame({
+        'Ticket ID': tickets['ticket_id'],
+        'Type': tickets['type'],
+        'Generator': tickets['generator'],
+        'Customer': tickets['customer'].str[:25] + "...",
+        'Primary Contact': tickets['primary_contact_name'] + " - " + tickets['primary_contact_phone'],
+        'Contact Email': tickets['primary_contact_email'],
+        'Service Detail': tickets['service_detail'],
+        'Runtime Hours': format_column(tickets['runtime_hours'], "{:,} hrs".format),
+        'Parts Needed': 'TBD',
+        'Priority': tickets['priority'],
+        'Est. Revenue': format_column(tickets['revenue_sar'], format_sar),
+        'Action Required': tickets['action_required']
+    })
+
+# ========================================
+# TICKET LIFECYCLE
+# ========================================
+
+DATABASE_FILE = DATA_DIR / "work_management.db"
+
+TICKET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY,
+    ticket_id TEXT NOT NULL UNIQUE,
+    generator TEXT NOT NULL,
+    customer TEXT NOT NULL,
+    type TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    outcome INTEGER NOT NULL,
+    service_detail TEXT,
+    runtime_hours INTEGER,
+    revenue_sar REAL NOT NULL,
+    action_required TEXT,
+    status TEXT NOT NULL,
+    created_time TEXT NOT NULL,
+    updated_time TEXT NOT NULL,
+    closed_time TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_tickets_status_priority_customer ON tickets (status, priority, customer);
+CREATE INDEX IF NOT EXISTS ix_tickets_customer_status ON tickets (customer, status);
+CREATE INDEX IF NOT EXISTS ix_tickets_open_generator ON tickets (generator) WHERE status != 'CLOSED';
+CREATE INDEX IF NOT EXISTS ix_tickets_updated_time ON tickets (updated_time);
+CREATE INDEX IF NOT EXISTS ix_tickets_created_time ON tickets (created_time);
+CREATE TABLE IF NOT EXISTS ticket_revision (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    revision INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO ticket_revision (id, revision) VALUES (1, 0);
+"""
+
+TICKET_EVENTS = ["OPENED", "ESCALATED", "UPDATED", "CLOSED"]
+TICKET_EVENT_COLUMNS = [
+    'event', 'ticket_id', 'generator', 'customer', 'priority', 'type', 'service_detail',
+    'primary_contact_email', 'primary_contact_phone', 'location'
+]
+
+TICKET_LEDGER_COLUMNS = [
+    'ticket_id', 'type', 'generator', 'customer', 'service_detail', 'runtime_hours', 'priority',
+    'revenue_sar', 'action_required', 'status', 'created_time', 'updated_time', 'closed_time'
+]
+
+def ticket_outcomes(status_df: pd.DataFrame) -> np.ndarray:
+    """Rule outcome per generator as one integer (kind and priority), -1 when no ticket is due."""
+    kind = ticket_kinds(status_df)
+    priority = status_df['priority'].cat.codes.to_numpy()
+    return np.where(kind < 0, -1, kind * len(PRIORITY_LEVELS) + priority)
+
+class TicketLedger:
+    """Persistent ticket store updated by diffing status snapshots.
+
+    The rule outcome of every generator with an open ticket is kept in memory. Each sync
+    compares the new snapshot's outcomes against it in one vectorized pass and only
+    touches the database for generators whose outcome changed: new outcomes open
+    tickets, higher priorities escalate them, and cleared outcomes close them. Ticket IDs
+    come from the table's primary key, so they stay stable across reruns and restarts.
+
+    Status frames are shared across sessions and replaced when the status changes, so a
+    frame that was already applied is skipped until another process writes the ledger.
+    Every sync that writes tickets bumps the ticket_revision row. That row, not the
+    file's data_version, tells when to reload, so commits from the other stores that
+    share the file leave the open tickets and their decoded frames alone.
+    """
+    
+    def __init__(self, db_file: Path = DATABASE_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript(TICKET_SCHEMA)
+        self.version = 0
+        self._cache = {}
+        self.stats = {'hits': 0, 'misses': 0}
+        self._revision = None
+        self._listeners = []
+        self._events = []
+        # Status frame of the last sync and the ticket revision after it
+        self._synced = (None, None)
+        self._refresh()
+    
+    def _read_revision(self) -> int:
+        return self._conn.execute("SELECT revision FROM ticket_revision").fetchone()[0]
+    
+    def _refresh(self) -> None:
+        """Reload open tickets when another process has written tickets since the last look."""
+        revision = self._read_revision()
+        if revision == self._revision:
+            return
+        open_rows = pd.read_sql_query(
+            "SELECT id, ticket_id, generator, customer, outcome FROM tickets WHERE status != 'CLOSED'", self._conn
+        )
+        # An empty result comes back untyped; keep ids and outcomes integral for later concats
+        self._open = open_rows.astype({'id': np.int64, 'outcome': np.int64}).set_index('generator')[
+            ['id', 'ticket_id', 'customer', 'outcome']
+        ]
+        self._revision = revision
+        self.version += 1
+        self._cache.clear()
+    
+    def sync(self, status_df: pd.DataFrame, generators: pd.DataFrame) -> Dict[str, int]:
+        """Apply a status snapshot; returns how many tickets were opened, escalated, updated and closed.
+
+        The diff runs inside an immediate transaction, so server processes sharing the
+        ledger apply each change once. Passing the frame of the last sync again returns
+        zero counts without a transaction while no other process has written since.
+        """
+        with self._lock:
+            if status_df is self._synced[0] and self._read_revision() == self._synced[1]:
+                return dict.fromkeys(['opened', 'escalated', 'updated', 'closed'], 0)
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._events = []
+            try:
+                self._refresh()
+                counts = self._apply(status_df, generators)
+            except BaseException:
+                self._conn.rollback()
+                # In-memory state may be ahead of the rolled-back rows
+                self._revision = None
+                raise
+            self._conn.commit()
+            self._synced = (status_df, self._revision)
+            events, self._events = self._events, []
+        
+        if events:
+            events = join_generator_info(
+                pd.concat(events, ignore_index=True).rename(columns={'generator': 'serial_number'}),
+                generators, ['primary_contact_email', 'primary_contact_phone', 'location_city']
+            ).rename(columns={'serial_number': 'generator', 'location_city': 'location'})
+            for listener in self._listeners:
+                listener(events)
+        return counts
+    
+    def subscribe(self, listener: Callable[[pd.DataFrame], None]) -> None:
+        """Call ``listener`` with a frame of TICKET_EVENT_COLUMNS after each sync that changed tickets."""
+        self._listeners.append(listener)
+    
+    def _record_events(self, event: str, ticket_ids, generators, customers, outcomes, details) -> None:
+        outcomes = np.asarray(outcomes)
+        self._events.append(pd.DataFrame({
+            'event': event,
+            'ticket_id': np.asarray(ticket_ids, dtype=object),
+            'generator': np.asarray(generators, dtype=object),
+            'customer': np.asarray(customers, dtype=object),
+            'priority': pd.Categorical.from_codes(outcomes % len(PRIORITY_LEVELS), PRIORITY_LEVELS, ordered=True),
+            'type': pd.Categorical.from_codes(outcomes // len(PRIORITY_LEVELS), TICKET_TYPES),
+            'service_detail': np.asarray(details, dtype=object)
+        }))
+    
+    def _apply(self, status_df: pd.DataFrame, generators: pd.DataFrame) -> Dict[str, int]:
+        outcome = ticket_outcomes(status_df)
+        current = self._open['outcome'].reindex(status_df['serial_number'], fill_value=-1).to_numpy()
+        changed = outcome != current
+        counts = {'opened': 0, 'escalated': 0, 'updated': 0, 'closed': 0}
+        if not changed.any():
+            return counts
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        serials = status_df['serial_number'].to_numpy()
+        close = changed & (outcome < 0)
+        reopen = changed & (outcome >= 0)
+        
+        if close.any():
+            closed = self._open.reindex(serials[close])
+            self._conn.executemany(
+                "UPDATE tickets SET status = 'CLOSED', closed_time = ?, updated_time = ? WHERE id = ?",
+                [(now, now, int(ticket_pk)) for ticket_pk in closed['id']]
+            )
+            self._record_events('CLOSED', closed['ticket_id'], closed.index, closed['customer'],
+                                closed['outcome'].to_numpy(), ['Resolved'] * len(closed))
+            self._open = self._open.drop(index=serials[close])
+            counts['closed'] = int(close.sum())
+        
+        if reopen.any():
+            tickets = generate_customer_tickets(status_df[reopen], generators)
+            new_outcome = outcome[reopen]
+            old_outcome = current[reopen]
+            is_new = old_outcome < 0
+            # Lower priority codes are more severe
+            escalated = ~is_new & (new_outcome % len(PRIORITY_LEVELS) < old_outcome % len(PRIORITY_LEVELS))
+            
+            if is_new.any():
+                opened = tickets[is_new]
+                start = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tickets").fetchone()[0]
+                pks = np.arange(start, start + len(opened))
+                prefixes = opened['priority'].map(TICKET_PREFIXES).astype(str)
+                ticket_ids = prefixes + "-" + pd.Series(pks, index=opened.index).map("{:05d}".format)
+                self._conn.executemany(
+                    "INSERT INTO tickets (id, ticket_id, generator, customer, type, priority, outcome, "
+                    "service_detail, runtime_hours, revenue_sar, action_required, status, created_time, "
+                    "updated_time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'PENDING', ?, ?)",
+                    zip(pks.tolist(), ticket_ids, opened['generator'], opened['customer'].astype(str),
+                        opened['type'].astype(str), opened['priority'].astype(str), new_outcome[is_new].tolist(),
+                        opened['service_detail'], opened['runtime_hours'].astype(int).tolist(),
+                        opened['revenue_sar'].tolist(), opened['action_required'].astype(str),
+                        [now] * len(opened), [now] * len(opened))
+                )
+                self._open = pd.concat([self._open, pd.DataFrame(
+                    {'id': pks, 'ticket_id': ticket_ids.to_numpy(), 'customer': opened['customer'].astype(str).to_numpy(),
+                     'outcome': new_outcome[is_new]},
+                    index=pd.Index(opened['generator'], name='generator')
+                )])
+                self._record_events('OPENED', ticket_ids, opened['generator'], opened['customer'].astype(str),
+                                    new_outcome[is_new], opened['service_detail'])
+                counts['opened'] = int(is_new.sum())
+            
+            if (~is_new).any():
+                revised = tickets[~is_new]
+                ids = self._open['id'].reindex(revised['generator']).to_numpy()
+                self._conn.executemany(
+                    "UPDATE tickets SET type = ?, priority = ?, outcome = ?, service_detail = ?, "
+                    "revenue_sar = ?, action_required = ?, updated_time = ?, "
+                    "status = CASE WHEN ? THEN 'ESCALATED' ELSE status END WHERE id = ?",
+                    zip(revised['type'].astype(str), revised['priority'].astype(str),
+                        new_outcome[~is_new].tolist(), revised['service_detail'],
+                        revised['revenue_sar'].tolist(), revised['action_required'].astype(str),
+                        [now] * len(revised), escalated[~is_new].tolist(), ids.tolist())
+                )
+                self._open.loc[revised['generator'], 'outcome'] = new_outcome[~is_new]
+                revised_open = self._open.loc[revised['generator']]
+                self._record_events(
+                    np.where(escalated[~is_new], 'ESCALATED', 'UPDATED'), revised_open['ticket_id'],
+                    revised['generator'], revised_open['customer'], new_outcome[~is_new], revised['service_detail']
+                )
+                counts['escalated'] = int(escalated.sum())
+                counts['updated'] = int((~is_new).sum()) - counts['escalated']
+    
+        self._conn.execute("UPDATE ticket_revision SET revision = revision + 1")
+        self._revision += 1
+        self.version += 1
+        self._cache.clear()
+        return counts
+
+    def open_tickets(self, generators: pd.DataFrame, customer: Optional[str] = None,
+                     priority: Optional[str] = None) -> pd.DataFrame:
+        """Open tickets, optionally for one customer or priority, served through the ledger indexes.
+
+        Results are kept per ledger version and generator frame, so the page, its fragments
+        and other sessions share one decoded frame; treat it as read-only.
+        """
+        key = (customer, priority)
+        with self._lock:
+            self._refresh()
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] is generators:
+                self.stats['hits'] += 1
+                return cached[1]
+            self.stats['misses'] += 1
+            clauses = ["status IN ('PENDING', 'ESCALATED')"]
+            params = []
+            if customer is not None:
+                clauses.append("customer = ?")
+                params.append(str(customer))
+            if priority is not None:
+                clauses.append("priority = ?")
+                params.append(priority)
+            tickets = pd.read_sql_query(
+                f"SELECT {', '.join(TICKET_LEDGER_COLUMNS)} FROM tickets WHERE {' AND '.join(clauses)} ORDER BY id",
+                self._conn, params=params
+            )
+            
+            tickets = tickets.assign(
+                type=pd.Categorical(tickets['type'], categories=TICKET_TYPES),
+                priority=pd.Categorical(tickets['priority'], categories=PRIORITY_LEVELS, ordered=True),
+                action_required=pd.Categorical(tickets['action_required'], categories=TICKET_ACTIONS),
+                status=pd.Categorical(tickets['status'], categories=TICKET_STATUSES),
+                created_time=pd.to_datetime(tickets['created_time']),
+                updated_time=pd.to_datetime(tickets['updated_time'])
+            )
+            info = join_generator_info(
+                tickets.rename(columns={'generator': 'serial_number'}), generators,
+                CONTACT_COLUMNS + ['model_series', 'location_city']
+            ).rename(columns={'serial_number': 'generator', 'location_city': 'location'})
+            self._cache[key] = (generators, info)
+            return info
+
+@st.cache_resource
+def get_ticket_ledger() -> TicketLedger:
+    """Process-wide ticket ledger; its events feed the notification dispatcher and the dispatch planner."""
+    ledger = TicketLedger()
+    get_performance_metrics().track_cache('ticket_ledger', ledger.stats)
+    ledger.subscribe(get_notification_dispatcher().submit)
+    ledger.subscribe(get_dispatch_planner().on_ticket_events)
+    return ledger
+
+def sync_ticket_ledger(status_df: pd.DataFrame, generators: pd.DataFrame) -> TicketLedger:
+    """Bring the ticket ledger up to date with a status snapshot."""
+    ledger = get_ticket_ledger()
+    ledger.sync(status_df, generators)
+    return ledger
+
+# ========================================
+# REVENUE ANALYTICS
+# ========================================
+
+# Breakdown dimensions offered to the sales view, mapped to columns of the revenue fact table
+REVENUE_DIMENSIONS = {
+    "Customer": "customer",
+    "Contract Type": "service_contract",
+    "Region": "location",
+    "Priority": "priority",
+    "Ticket Type": "type"
+}
+# Ticket statuses counted by each scope: open tickets are pipeline, closed tickets delivered service
+REVENUE_SCOPES = {
+    "pipeline": OPEN_TICKET_STATUSES,
+    "delivered": ["CLOSED"],
+    "all": TICKET_STATUSES
+}
+
+def with_currency(frame: pd.DataFrame) -> pd.DataFrame:
+    """Tag a frame of numeric amounts with the currency they are expressed in."""
+    frame.attrs['currency'] = CONFIG["currency"]["symbol"]
+    frame.attrs['usd_rate'] = CONFIG["currency"]["rate"]
+    return frame
+
+class RevenueAnalytics:
+    """Numeric revenue facts for every ticket in the ledger, open and closed.
+
+    Facts are loaded once and then refreshed incrementally: after the ledger's ticket
+    revision moves, only tickets whose updated_time is at or past the last
+    watermark are read back, joined to their generator's contract type and region, and
+    replace their earlier rows. Breakdowns and pivots are grouped from the fact table
+    and cached until the facts or the fleet data change.
+    """
+    
+    def __init__(self, db_file: Path = DATABASE_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript(TICKET_SCHEMA)
+        self._revision = None
+        self._watermark = ""
+        self._fleet_key = None
+        self._facts = None
+        self._cache = {}
+        self.version = 0
+        self.stats = {'loads': 0, 'rows_read': 0, 'hits': 0, 'misses': 0}
+    
+    def _refresh(self, generators: pd.DataFrame) -> None:
+        fleet_key = (generators.attrs.get('data_version'), len(generators))
+        if fleet_key != self._fleet_key and self._facts is not None:
+            # New fleet data: contract types and regions may have moved, so re-join every fact
+            self._facts = self._join(self._facts, generators)
+            self._fleet_key = fleet_key
+            self.version += 1
+            self._cache.clear()
+        
+        revision = self._conn.execute("SELECT revision FROM ticket_revision").fetchone()[0]
+        if revision == self._revision:
+            return
+        fresh = pd.read_sql_query(
+            "SELECT id, generator, customer, type, priority, status, revenue_sar, created_time, updated_time "
+            "FROM tickets WHERE updated_time >= ? ORDER BY id",
+            self._conn, params=[self._watermark], index_col='id'
+        )
+        self._revision = revision
+        self.stats['loads'] += 1
+        self.stats['rows_read'] += len(fresh)
+        if fresh.empty and self._facts is not None:
+            return
+        
+        self._watermark = fresh['updated_time'].max() if not fresh.empty else ""
+        fresh = self._join(fresh.assign(
+            type=pd.Categorical(fresh['type'], categories=TICKET_TYPES),
+            priority=pd.Categorical(fresh['priority'], categories=PRIORITY_LEVELS, ordered=True),
+            status=pd.Categorical(fresh['status'], categories=TICKET_STATUSES),
+            created_time=pd.to_datetime(fresh['created_time'])
+        ).drop(columns='updated_time'), generators)
+        if self._facts is not None and not self._facts.empty:
+            fresh = pd.concat([self._facts[~self._facts.index.isin(fresh.index)], fresh])
+        self._facts = with_currency(fresh)
+        self._fleet_key = fleet_key
+        self.version += 1
+        self._cache.clear()
+    
+    @staticmethod
+    def _join(facts: pd.DataFrame, generators: pd.DataFrame) -> pd.DataFrame:
+        info = index_generators(generators)[['service_contract', 'location_city']].reindex(facts['generator'])
+        return facts.assign(
+            service_contract=info['service_contract'].astype(object).to_numpy(),
+            location=info['location_city'].astype(object).to_numpy()
+        )
+    
+    def _cached(self, key: tuple, generators: pd.DataFrame, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        with self._lock:
+            self._refresh(generators)
+            if key in self._cache:
+                self.stats['hits'] += 1
+            else:
+                self.stats['misses'] += 1
+                self._cache[key] = build()
+            return self._cache[key]
+    
+    def _scoped(self, scope: str) -> pd.DataFrame:
+        return self._facts[self._facts['status'].isin(REVENUE_SCOPES[scope]).to_numpy()]
+    
+    def facts(self, generators: pd.DataFrame) -> pd.DataFrame:
+        """Ticket revenue facts joined to their generator's contract type and region."""
+        return self._cached(('facts',), generators, lambda: self._facts)
+    
+    def breakdown(self, generators: pd.DataFrame, by: List[str], scope: str = "pipeline") -> pd.DataFrame:
+        """Ticket count, total and average value per group of the given fact columns, largest first."""
+        def build():
+            grouped = self._scoped(scope).groupby(by, observed=True, dropna=False)['revenue_sar']
+            table = grouped.agg(tickets='size', value='sum', average='mean').sort_values('value', ascending=False)
+            total = table['value'].sum()
+            return with_currency(table.assign(share=table['value'] / total if total else 0.0))
+        
+        return self._cached(('breakdown', tuple(by), scope), generators, build)
+    
+    def pivot(self, generators: pd.DataFrame, index: str, columns: str, scope: str = "pipeline") -> pd.DataFrame:
+        """Total value with one fact column down the rows and another across, zero where no tickets fall."""
+        def build():
+            return with_currency(self._scoped(scope).pivot_table(
+                index=index, columns=columns, values='revenue_sar', aggfunc='sum', fill_value=0.0, observed=True
+            ))
+        
+        return self._cached(('pivot', index, columns, scope), generators, build)
+    
+    def totals(self, generators: pd.DataFrame) -> Dict[str, float]:
+        """Ticket count and value per scope."""
+        by_status = self.breakdown(generators, ['status'], scope="all")
+        totals = {}
+        for scope, statuses in REVENUE_SCOPES.items():
+            rows = by_status.reindex(statuses, fill_value=0)
+            totals[f'{scope}_value'] = float(rows['value'].sum())
+            totals[f'{scope}_tickets'] = int(rows['tickets'].sum())
+        return totals
+
+@st.cache_resource
+def get_revenue_analytics() -> RevenueAnalytics:
+    """Process-wide revenue analytics over the ticket ledger."""
+    analytics = RevenueAnalytics()
+    get_performance_metrics().track_cache('revenue', analytics.stats)
+    return analytics
+
+# ========================================
+# BULK EXPORT
+# ========================================
+
+# File extension and MIME type per export format
+EXPORT_FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "csv": (".csv", "text/csv"),
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+}
+# Excel caps a sheet at 1,048,576 rows; longer exports continue on a new sheet
+XLSX_SHEET_ROWS = 1_048_575
+
+TICKET_EXPORT_SCHEMA = pa.schema([
+    ('ticket_id', pa.string()),
+    ('type', pa.string()),
+    ('generator', pa.string()),
+    ('customer', pa.string()),
+    ('service_detail', pa.string()),
+    ('runtime_hours', pa.int64()),
+    ('priority', pa.string()),
+    ('revenue_sar', pa.float64()),
+    ('action_required', pa.string()),
+    ('status', pa.string()),
+    ('created_time', pa.timestamp('s')),
+    ('updated_time', pa.timestamp('s')),
+    ('closed_time', pa.timestamp('s'))
+])
+
+STATUS_EXPORT_COLUMNS = [
+    'serial_number', 'customer_name', 'operational_status', 'fault_description', 'warning_text',
+    'priority', 'alert_level', 'oil_pressure', 'coolant_temp', 'vibration', 'fuel_level', 'load_percent',
+    'next_service_hours', 'service_type', 'runtime_hours', 'failure_risk', 'hours_to_fault', 'anomaly_text'
+]
+
+def ticket_export_batches(db_file: Path = DATABASE_FILE, start=None, end=None, customer: Optional[str] = None,
+                          priorities: Optional[List[str]] = None, statuses: Optional[List[str]] = None,
+                          chunk_rows: Optional[int] = None) -> Iterator[pa.RecordBatch]:
+    """Ledger tickets as Arrow record batches of at most ``chunk_rows`` rows.
+
+    Every filter is pushed into the SQL query (created date range, inclusive of
+    ``end``; customer; priorities; statuses), and rows are fetched one chunk at a
+    time, so memory stays bounded by the chunk size rather than the extract.
+    """
+    chunk_rows = chunk_rows or CONFIG["export"]["chunk_rows"]
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("created_time >= ?")
+        params.append(pd.Timestamp(start).strftime("%Y-%m-%d %H:%M:%S"))
+    if end is not None:
+        clauses.append("created_time < ?")
+        params.append((pd.Timestamp(end) + pd.Timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S"))
+    if customer is not None:
+        clauses.append("customer = ?")
+        params.append(str(customer))
+    for column, values in (('priority', priorities), ('status', statuses)):
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    
+    conn = sqlite3.connect(db_file)
+    try:
+        cursor = conn.execute(f"SELECT {', '.join(TICKET_EXPORT_SCHEMA.names)} FROM tickets{where} ORDER BY id", params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            yield pa.record_batch([
+                pa.array(values, pa.string()).cast(field.type) if pa.types.is_timestamp(field.type)
+                else pa.array(values, field.type)
+                for field, values in zip(TICKET_EXPORT_SCHEMA, columns)
+            ], schema=TICKET_EXPORT_SCHEMA)
+    finally:
+        conn.close()
+
+def status_export_schema(status_df: pd.DataFrame) -> pa.Schema:
+    """Arrow schema of a status export, with categories written as plain strings."""
+    columns = [col for col in STATUS_EXPORT_COLUMNS if col in status_df.columns]
+    sample = pa.Schema.from_pandas(status_df[columns].iloc[:0], preserve_index=False)
+    return pa.schema([
+        pa.field(field.name, pa.string()) if pa.types.is_dictionary(field.type) or field.type == pa.large_string()
+        else field
+        for field in sample
+    ])
+
+def status_export_batches(status_df: pd.DataFrame, customer: Optional[str] = None,
+                          priorities: Optional[List[str]] = None,
+                          chunk_rows: Optional[int] = None) -> Iterator[pa.RecordBatch]:
+    """Status rows matching the customer and priority filters, converted one chunk at a time."""
+    chunk_rows = chunk_rows or CONFIG["export"]["chunk_rows"]
+    schema = status_export_schema(status_df)
+    keep = np.ones(len(status_df), dtype=bool)
+    if customer is not None:
+        keep &= (status_df['customer_name'] == customer).to_numpy()
+    if priorities:
+        keep &= status_df['priority'].isin(priorities).to_numpy()
+    rows = np.flatnonzero(keep)
+    for offset in range(0, len(rows), chunk_rows):
+        chunk = status_df.iloc[rows[offset:offset + chunk_rows]][schema.names]
+        categorical = chunk.select_dtypes('category').columns
+        chunk = chunk.astype({col: object for col in categorical})
+        yield pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+
+def available_export_formats() -> List[str]:
+    """Export formats whose writer is installed; Excel needs the optional openpyxl package."""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "xlsx" or importlib.util.find_spec("openpyxl") is not None]
+
+def write_export(schema: pa.Schema, batches: Iterator[pa.RecordBatch], destination: Union[Path, BinaryIO],
+                 fmt: str) -> int:
+    """Stream record batches into a Parquet, CSV or Excel file; returns the number of rows written."""
+    rows = 0
+    if fmt == "parquet":
+        with pq.ParquetWriter(destination, schema, compression='zstd') as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == "csv":
+        with pa_csv.CSVWriter(destination, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    elif fmt == "xlsx":
+        # Optional dependency: write-only workbooks flush each row instead of building a sheet in memory
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("Excel export needs openpyxl: pip install openpyxl") from None
+        workbook = Workbook(write_only=True)
+        sheet = None
+        for batch in batches:
+            for row in zip(*(column.to_pylist() for column in batch.columns)):
+                if rows % XLSX_SHEET_ROWS == 0:
+                    sheet = workbook.create_sheet(f"Export {rows // XLSX_SHEET_ROWS + 1}")
+                    sheet.append(schema.names)
+                sheet.append(row)
+                rows += 1
+        if sheet is None:
+            workbook.create_sheet("Export 1").append(schema.names)
+        workbook.save(destination)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return rows
+
+def export_bytes(schema: pa.Schema, batches: Iterator[pa.RecordBatch], fmt: str) -> bytes:
+    """Write an export through an anonymous temporary file and return its contents.
+
+    Streamlit holds a download's whole payload in memory, so only the writing is done
+    in chunks; export_data.py streams extracts to disk without that copy.
+    """
+    with tempfile.TemporaryFile() as handle:
+        write_export(schema, batches, handle, fmt)
+        handle.seek(0)
+        return handle.read()
+
+# ========================================
+# NOTIFICATIONS
+# ========================================
+
+# Local sinks append everything they receive here, one JSON line per message
+NOTIFICATION_OUTBOX = DATA_DIR / "outbox"
+NOTIFICATION_CHANNELS = ["email", "sms", "phone"]
+ALERT_PREFERENCE_FIELDS = NOTIFICATION_CHANNELS + ["immediate_critical", "hourly_warnings", "daily_reports"]
+DEFAULT_ALERT_PREFERENCES = dict.fromkeys(ALERT_PREFERENCE_FIELDS, True)
+URGENT_TICKET_EVENTS = ["OPENED", "ESCALATED"]
+
+PREFERENCE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_preferences (
+    customer TEXT PRIMARY KEY,
+    email INTEGER NOT NULL,
+    sms INTEGER NOT NULL,
+    phone INTEGER NOT NULL,
+    immediate_critical INTEGER NOT NULL,
+    hourly_warnings INTEGER NOT NULL,
+    daily_reports INTEGER NOT NULL,
+    updated_time TEXT NOT NULL
+);
+"""
+
+class AlertPreferenceStore:
+    """Per-customer notification preferences, saved alongside the ticket ledger."""
+    
+    def __init__(self, db_file: Path = DATABASE_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript(PREFERENCE_SCHEMA)
+    
+    def get(self, customer: str) -> Dict[str, bool]:
+        """Saved preferences for a customer, or the defaults when none were saved."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(ALERT_PREFERENCE_FIELDS)} FROM alert_preferences WHERE customer = ?",
+                (str(customer),)
+            ).fetchone()
+        return dict(zip(ALERT_PREFERENCE_FIELDS, map(bool, row))) if row else dict(DEFAULT_ALERT_PREFERENCES)
+    
+    def save(self, customer: str, preferences: Dict[str, bool]) -> None:
+        values = [int(bool(preferences.get(field, DEFAULT_ALERT_PREFERENCES[field]))) for field in ALERT_PREFERENCE_FIELDS]
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO alert_preferences (customer, {', '.join(ALERT_PREFERENCE_FIELDS)}, updated_time) "
+                f"VALUES (?, {', '.join('?' * len(ALERT_PREFERENCE_FIELDS))}, ?)",
+                [str(customer), *values, datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
+            )
+
+THRESHOLD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_thresholds (
+    customer TEXT PRIMARY KEY,
+    oil_pressure REAL NOT NULL,
+    coolant_temp REAL NOT NULL,
+    vibration REAL NOT NULL,
+    fuel_level REAL NOT NULL,
+    updated_time TEXT NOT NULL
+);
+"""
+
+class ThresholdProfileStore:
+    """Per-customer warning thresholds, saved alongside the ticket ledger.
+
+    ``profiles`` compiles every saved profile into one ThresholdProfiles table and only
+    recompiles when the saved rows change. The ticket ledger commits to the same file,
+    so a commit alone only triggers a re-read; the compiled version, which keys the
+    shared status snapshot, stays put unless a threshold actually changed.
+    """
+    
+    def __init__(self, db_file: Path = DATABASE_FILE):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript(THRESHOLD_SCHEMA)
+        self._profiles = None
+        self._saved = None
+        self._data_version = None
+        self._compiled = 0
+    
+    def get(self, customer: str) -> Dict[str, float]:
+        """Saved thresholds for a customer, or the global warning limits."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(THRESHOLD_SENSORS)} FROM alert_thresholds WHERE customer = ?", (str(customer),)
+            ).fetchone()
+        return dict(zip(THRESHOLD_SENSORS, row)) if row else dict(DEFAULT_THRESHOLDS)
+    
+    def save(self, customer: str, thresholds: Dict[str, float]) -> None:
+        values = [float(thresholds.get(sensor, DEFAULT_THRESHOLDS[sensor])) for sensor in THRESHOLD_SENSORS]
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO alert_thresholds (customer, {', '.join(THRESHOLD_SENSORS)}, updated_time) "
+                f"VALUES (?, {', '.join('?' * len(THRESHOLD_SENSORS))}, ?)",
+                [str(customer), *values, datetime.now().strftime("%Y-%m-%d %H:%M:%S")]
+            )
+            self._profiles = None
+    
+    def profiles(self) -> ThresholdProfiles:
+        """All saved profiles compiled for per-row broadcasting."""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._profiles is None or data_version != self._data_version:
+                saved = pd.read_sql_query(
+                    f"SELECT customer, {', '.join(THRESHOLD_SENSORS)} FROM alert_thresholds ORDER BY customer", self._conn
+                )
+                if self._profiles is None or not saved.equals(self._saved):
+                    self._compiled += 1
+                    self._profiles = ThresholdProfiles(
+                        saved['customer'], saved[THRESHOLD_SENSORS].to_numpy(dtype=float), version=self._compiled
+                    )
+                    self._saved = saved
+                self._data_version = data_version
+            return self._profiles
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` sends per second with bursts up to one second's worth."""
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class NotificationChannel(ABC):
+    """A delivery channel with a connection pool, a send rate limit and retries with backoff.
+
+    Subclasses implement ``_connect``, ``_send_with`` and ``_close`` for one connection.
+    A send holds one of ``pool_size`` slots from connecting until its connection is back
+    in the idle pool or closed, so failed connects and sends free their slot for waiters.
+    """
+    
+    retryable = (OSError, EOFError)
+    
+    def __init__(self, name: str, rate: float, pool_size: int, max_retries: int):
+        self.name = name
+        self.limiter = RateLimiter(rate)
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle = []
+        self.stats = {'sent': 0, 'failed': 0, 'retries': 0}
+    
+    async def _discard(self, conn) -> None:
+        try:
+            await self._close(conn)
+        except self.retryable:
+            pass
+    
+    async def _attempt(self, message: Dict[str, str]) -> None:
+        """One send over an idle or new connection; the slot is released however it ends."""
+        async with self._slots:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            try:
+                await self._send_with(conn, message)
+            except BaseException:
+                await self._discard(conn)
+                raise
+            self._idle.append(conn)
+    
+    async def deliver(self, message: Dict[str, str]) -> bool:
+        """Send one message; returns False once the retries are exhausted."""
+        await self.limiter.acquire()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._attempt(message)
+            except self.retryable:
+                if attempt == self.max_retries:
+                    self.stats['failed'] += 1
+                    return False
+                self.stats['retries'] += 1
+                await asyncio.sleep(0.5 * 2 ** attempt)
+            else:
+                self.stats['sent'] += 1
+                return True
+    
+    @abstractmethod
+    async def _connect(self):
+        """Open one connection."""
+    
+    @abstractmethod
+    async def _send_with(self, conn, message: Dict[str, str]) -> None:
+        """Send one message over an open connection."""
+    
+    @abstractmethod
+    async def _close(self, conn) -> None:
+        """Close one connection."""
+
+class EmailChannel(NotificationChannel):
+    """Email over pooled SMTP connections; blocking smtplib calls run in worker threads."""
+    
+    retryable = (OSError, EOFError, smtplib.SMTPException)
+    
+    def __init__(self, host: str, port: int, sender: str, **kwargs):
+        super().__init__('email', **kwargs)
+        self.host = host
+        self.port = port
+        self.sender = sender
+    
+    async def _connect(self):
+        return await asyncio.to_thread(smtplib.SMTP, self.host, self.port, timeout=10)
+    
+    async def _send_with(self, conn, message: Dict[str, str]) -> None:
+        email = EmailMessage()
+        email['From'] = self.sender
+        email['To'] = message['to']
+        email['Subject'] = message['subject']
+        email.set_content(message['body'])
+        await asyncio.to_thread(conn.send_message, email)
+    
+    async def _close(self, conn) -> None:
+        await asyncio.to_thread(conn.quit)
+
+class GatewayChannel(NotificationChannel):
+    """SMS or voice-call requests sent as JSON lines to a gateway over pooled connections."""
+    
+    def __init__(self, name: str, host: str, port: int, **kwargs):
+        super().__init__(name, **kwargs)
+        self.host = host
+        self.port = port
+    
+    async def _connect(self):
+        return await asyncio.open_connection(self.host, self.port)
+    
+    async def _send_with(self, conn, message: Dict[str, str]) -> None:
+        reader, writer = conn
+        writer.write((json.dumps({'channel': self.name, **message}) + "\n").encode())
+        await writer.drain()
+        if await reader.readline() != b"OK\n":
+            raise EOFError("gateway did not acknowledge the message")
+    
+    async def _close(self, conn) -> None:
+        writer = conn[1]
+        writer.close()
+        await writer.wait_closed()
+
+def append_outbox(name: str, record: Dict) -> None:
+    """Append one received message to the local outbox."""
+    with open(NOTIFICATION_OUTBOX / f"{name}.jsonl", "a", encoding="utf-8") as outbox:
+        outbox.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+async def serve_local_smtp(host: str, port: int):
+    """Minimal SMTP server standing in for the mail relay during testing."""
+    
+    async def handle(reader, writer):
+        envelope = {'from': None, 'to': []}
+        writer.write(b"220 localhost stand-in SMTP\r\n")
+        while line := await reader.readline():
+            command = line.decode(errors='replace').strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO", "NOOP"):
+                reply = b"250 localhost\r\n"
+            elif verb == "MAIL":
+                envelope = {'from': command[10:].strip(), 'to': []}
+                reply = b"250 OK\r\n"
+            elif verb == "RCPT":
+                envelope['to'].append(command[8:].strip())
+                reply = b"250 OK\r\n"
+            elif verb == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                body = []
+                while (data := await reader.readline()) not in (b".\r\n", b".\n", b""):
+                    body.append(data[1:] if data.startswith(b"..") else data)
+                append_outbox('email', {**envelope, 'received': int(time.time()),
+                                        'data': b"".join(body).decode(errors='replace')})
+                reply = b"250 Queued\r\n"
+            elif verb == "RSET":
+                envelope = {'from': None, 'to': []}
+                reply = b"250 OK\r\n"
+            elif verb == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                break
+            else:
+                reply = b"502 Command not implemented\r\n"
+            writer.write(reply)
+            await writer.drain()
+        writer.close()
+    
+    return await asyncio.start_server(handle, host, port)
+
+async def serve_local_gateway(host: str, port: int):
+    """JSON-lines SMS/voice gateway standing in for the telecom provider during testing."""
+    
+    async def handle(reader, writer):
+        while line := await reader.readline():
+            record = json.loads(line)
+            append_outbox(record.get('channel', 'sms'), {**record, 'received': int(time.time())})
+            writer.write(b"OK\n")
+            await writer.drain()
+        writer.close()
+    
+    return await asyncio.start_server(handle, host, port)
+
+class NotificationDispatcher:
+    """Asynchronous alert delivery driven by ticket ledger events.
+
+    Runs its own asyncio loop on a background thread; ``submit`` only hands events over,
+    so the UI thread never waits on a send. Events are deduplicated per generator and
+    batched per customer for a short window, then routed by the customer's saved
+    preferences: critical openings and escalations go out at once on every enabled
+    channel, and all events are gathered into hourly and daily email digests.
+    """
+    
+    def __init__(self, preferences: AlertPreferenceStore, channels: Dict[str, NotificationChannel],
+                 batch_window: float, digest_seconds: Dict[str, float], local_sinks: Optional[Dict] = None):
+        self.preferences = preferences
+        self.channels = channels
+        self.batch_window = batch_window
+        self.digest_seconds = digest_seconds
+        self.local_sinks = local_sinks or {}
+        self._loop = None
+        self._thread = None
+        self._pending = {}
+        self._digests = {period: {} for period in digest_seconds}
+        self._servers = []
+        self.stats = {'events': 0, 'deduplicated': 0, 'batches': 0, 'messages': 0, 'failed': 0}
+    
+    def start(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._startup(), self._loop).result(timeout=10)
+    
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+    
+    def submit(self, events: pd.DataFrame) -> None:
+        """Queue ticket events for delivery; returns immediately."""
+        if self._loop is not None and not events.empty:
+            self._loop.call_soon_threadsafe(self._enqueue, events)
+    
+    async def _startup(self) -> None:
+        if self.local_sinks:
+            NOTIFICATION_OUTBOX.mkdir(parents=True, exist_ok=True)
+        for serve, (host, port) in self.local_sinks.items():
+            try:
+                self._servers.append(await serve(host, port))
+            except OSError:
+                # Another server process already runs this sink
+                pass
+        for period, seconds in self.digest_seconds.items():
+            self._loop.create_task(self._digest_loop(period, seconds))
+    
+    def _enqueue(self, events: pd.DataFrame) -> None:
+        self.stats['events'] += len(events)
+        for record in events.astype({'priority': str, 'type': str}).to_dict('records'):
+            customer = record['customer']
+            if customer not in self._pending:
+                self._pending[customer] = {}
+                self._loop.call_later(self.batch_window, lambda c=customer: self._loop.create_task(self._flush(c)))
+            batch = self._pending[customer]
+            if record['generator'] in batch:
+                self.stats['deduplicated'] += 1
+            # The latest event per generator wins within a batch
+            batch[record['generator']] = record
+    
+    async def _flush(self, customer: str) -> None:
+        events = list(self._pending.pop(customer, {}).values())
+        if not events:
+            return
+        self.stats['batches'] += 1
+        preferences = await asyncio.to_thread(self.preferences.get, customer)
+        
+        is_urgent = [e['priority'] == "CRITICAL" and e['event'] in URGENT_TICKET_EVENTS for e in events]
+        urgent = [e for e, flag in zip(events, is_urgent) if flag]
+        if urgent and preferences['immediate_critical']:
+            await self._send_all([
+                compose_alert(channel, customer, urgent)
+                for channel in NOTIFICATION_CHANNELS if preferences[channel] and channel in self.channels
+            ])
+        
+        if preferences['hourly_warnings'] and 'hourly' in self._digests:
+            self._digests['hourly'].setdefault(customer, []).extend(e for e, flag in zip(events, is_urgent) if not flag)
+        if preferences['daily_reports'] and 'daily' in self._digests:
+            self._digests['daily'].setdefault(customer, []).extend(events)
+    
+    async def _digest_loop(self, period: str, seconds: float) -> None:
+        while True:
+            await asyncio.sleep(seconds)
+            digests, self._digests[period] = self._digests[period], {}
+            await self._send_all([
+                compose_digest(period, customer, events)
+                for customer, events in digests.items() if events and 'email' in self.channels
+            ])
+    
+    async def _send_all(self, messages: List[Dict[str, str]]) -> None:
+        results = await asyncio.gather(*(self.channels[m['channel']].deliver(m) for m in messages))
+        self.stats['messages'] += sum(results)
+        self.stats['failed'] += len(results) - sum(results)
+
+def event_line(event: Dict) -> str:
+    return f"{event['ticket_id']} {event['generator']} [{event['priority']}] {event['event']}: {event['service_detail']}"
+
+def compose_alert(channel: str, customer: str, events: List[Dict]) -> Dict[str, str]:
+    """One immediate message for a customer's batch of critical events on a channel."""
+    contact = events[0]
+    generators = ", ".join(e['generator'] for e in events[:5]) + ("…" if len(events) > 5 else "")
+    if channel == "email":
+        return {
+            'channel': channel, 'customer': customer, 'to': contact['primary_contact_email'],
+            'subject': f"🚨 {len(events)} critical generator alert(s) - {customer}",
+            'body': "\n".join(event_line(e) for e in events) + "\n\nEmergency service has been notified."
+        }
+    text = f"{CONFIG['company_name']}: {len(events)} critical alert(s) at {customer} ({generators}). Emergency service notified."
+    return {'channel': channel, 'customer': customer, 'to': contact['primary_contact_phone'], 'text': text}
+
+def compose_digest(period: str, customer: str, events: List[Dict]) -> Dict[str, str]:
+    """An hourly or daily email summarizing a customer's ticket events."""
+    return {
+        'channel': 'email', 'customer': customer, 'to': events[-1]['primary_contact_email'],
+        'subject': f"{period.title()} generator report - {customer} ({len(events)} update(s))",
+        'body': "\n".join(event_line(e) for e in events)
+    }
+
+@st.cache_resource
+def get_alert_preferences() -> AlertPreferenceStore:
+    """Process-wide alert preference store."""
+    return AlertPreferenceStore()
+
+@st.cache_resource
+def get_threshold_store() -> ThresholdProfileStore:
+    """Process-wide customer threshold store."""
+    return ThresholdProfileStore()
+
+@st.cache_resource
+def get_notification_dispatcher() -> NotificationDispatcher:
+    """Process-wide notification dispatcher, started on first use."""
+    config = CONFIG["notifications"]
+    limits = config["rate_limits"]
+    pool = dict(pool_size=config["pool_size"], max_retries=config["max_retries"])
+    smtp = (config["smtp"]["host"], config["smtp"]["port"])
+    gateway = (config["gateway"]["host"], config["gateway"]["port"])
+    channels = {
+        'email': EmailChannel(*smtp, sender=config["smtp"]["sender"], rate=limits['email'], **pool),
+        'sms': GatewayChannel('sms', *gateway, rate=limits['sms'], **pool),
+        'phone': GatewayChannel('phone', *gateway, rate=limits['phone'], **pool)
+    }
+    dispatcher = NotificationDispatcher(
+        get_alert_preferences(), channels, config["batch_window_seconds"], config["digest_seconds"],
+        local_sinks={serve_local_smtp: smtp, serve_local_gateway: gateway} if config["local_sinks"] else None
+    )
+    if config["enabled"]:
+        dispatcher.start()
+    return dispatcher
+
+# ========================================
+# DISPATCH PLANNING
+# ========================================
+
+# Service city centres (latitude, longitude); sites in unknown cities are planned from Riyadh
+CITY_COORDINATES = {
+    'Riyadh': (24.7136, 46.6753),
+    'Diriyah': (24.7341, 46.5751),
+    'Qiddiya': (24.5806, 46.3350),
+    'Jeddah': (21.4858, 39.1925),
+    'Thuwal': (22.2967, 39.1032),
+    'Makkah': (21.3891, 39.8579),
+    'Madinah': (24.5247, 39.5692),
+    'Dammam': (26.4207, 50.0888),
+    'Al Khobar': (26.2172, 50.1971),
+    'NEOM': (27.9500, 35.3000),
+    'Tabuk': (28.3838, 36.5550),
+    'Al-Ula': (26.6084, 37.9232),
+    'Abha': (18.2164, 42.5053)
+}
+DEFAULT_CITY = 'Riyadh'
+
+TECHNICIAN_SCHEMA = """
+CREATE TABLE IF NOT EXISTS technicians (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    base_city TEXT NOT NULL,
+    shift_minutes INTEGER NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+"""
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km, broadcasting over the inputs."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def travel_minutes(lat1, lon1, lat2, lon2, config: Dict = CONFIG["dispatch"]) -> np.ndarray:
+    """Driving time estimate from straight-line distance."""
+    return haversine_km(lat1, lon1, lat2, lon2) * config["road_factor"] / config["speed_kmh"] * 60
+
+def city_coordinates(cities) -> Tuple[np.ndarray, np.ndarray]:
+    """City centre per entry; unknown cities fall back to DEFAULT_CITY."""
+    cities = pd.Series(np.asarray(cities, dtype=object))
+    cities = cities.where(cities.isin(list(CITY_COORDINATES)), DEFAULT_CITY)
+    centres = pd.DataFrame.from_dict(CITY_COORDINATES, orient='index', columns=['lat', 'lon'])
+    return centres['lat'].reindex(cities).to_numpy(), centres['lon'].reindex(cities).to_numpy()
+
+def site_coordinates(serials, cities, radius_km: float = CONFIG["dispatch"]["site_radius_km"]) -> Tuple[np.ndarray, np.ndarray]:
+    """Approximate site per generator: its city centre plus a stable offset derived from the serial.
+
+    The fleet only records a city per site, so each generator is placed at a fixed point
+    within radius_km of it; routes within a city then have real distances to optimize.
+    """
+    lat, lon = city_coordinates(cities)
+    hashes = pd.util.hash_array(np.asarray(serials, dtype=object))
+    angle = (hashes & 0xFFFF) / 65536 * 2 * np.pi
+    radius = np.sqrt(((hashes >> 16) & 0xFFFF) / 65536) * radius_km
+    lat = lat + radius * np.cos(angle) / 111.0
+    lon = lon + radius * np.sin(angle) / (111.0 * np.cos(np.radians(lat)))
+    return lat, lon
+
+def two_opt(lat: np.ndarray, lon: np.ndarray, max_rounds: int = 100) -> np.ndarray:
+    """Visit order for a path whose first and last points are fixed, improved by 2-opt moves.
+
+    Each round scores every segment reversal at once from the path's travel-time matrix
+    and applies the best improving one.
+    """
+    order = np.arange(len(lat))
+    if len(lat) < 4:
+        return order
+    travel = travel_minutes(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    i, j = np.triu_indices(len(lat) - 1, k=1)
+    i, j = i[i >= 1], j[i >= 1]
+    for _ in range(max_rounds):
+        a, b, c, d = order[i - 1], order[i], order[j], order[j + 1]
+        gain = travel[a, b] + travel[c, d] - travel[a, c] - travel[b, d]
+        best = int(gain.argmax())
+        if gain[best] <= 1e-9:
+            break
+        order[i[best]:j[best] + 1] = order[i[best]:j[best] + 1][::-1]
+    return order
+
+class DispatchPlanner:
+    """Day plan assigning open tickets to field technicians.
+
+    Jobs are placed in priority order at their cheapest feasible position among the
+    nearest technicians, where cost is the added route time plus a priority-weighted
+    arrival time. Routes keep CRITICAL stops ahead of HIGH and MEDIUM ones, and each
+    priority segment is then tightened with 2-opt. A route (base, stops and back, plus
+    service time) must fit the technician's shift; jobs that fit nowhere are deferred.
+
+    Once the day plan exists, ticket changes are applied incrementally. A new CRITICAL
+    job may bump lower-priority stops that have not started yet, which are then placed
+    elsewhere if possible.
+
+    After ``start``, planning runs on a background thread: ``sync``, ``replan`` and
+    ticket events only queue work, and ``frames`` returns the last finished plan.
+    Without it, queued work runs in the caller's thread.
+    """
+    
+    def __init__(self, db_file: Path = DATABASE_FILE, config: Dict = CONFIG["dispatch"]):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.executescript(TECHNICIAN_SCHEMA)
+        self.config = config
+        self._minutes_per_km = config["road_factor"] / config["speed_kmh"] * 60
+        self._eta_weight = np.array([config["eta_weights"][level] for level in PRIORITY_LEVELS])
+        self.plan_date = None
+        self._ledger_version = None
+        self.technicians = pd.DataFrame(columns=['id', 'name', 'base_city', 'shift_minutes'])
+        self._city_lat, self._city_lon = np.zeros(0), np.zeros(0)
+        self._jobs = pd.DataFrame(columns=['ticket_id', 'customer', 'location'])
+        self._routes = []
+        self._used = np.zeros(0)
+        self._offset = 0.0
+        self._set_jobs(self._job_frame(pd.DataFrame(columns=['generator', 'ticket_id', 'customer', 'location', 'priority'])))
+        self.version = 0
+        self.stats = {'full_plans': 0, 'incremental': 0, 'bumped': 0, 'plan_seconds': 0.0, 'failed': 0}
+        self.last_error = None
+        # Queued (kind, payload) work for the planning thread, and whether a batch is being applied
+        self._wakeup = threading.Condition()
+        self._queue = []
+        self._busy = False
+        self._thread = None
+        # Last finished plan as (plan date, itinerary, summary, deferred), with the version it was built from
+        self._view = (None, None, None, 0)
+        self._view_key = None
+    
+    # ---- roster ----
+    
+    def ensure_roster(self, generators: pd.DataFrame) -> None:
+        """Seed technicians for fleet cities without any, one per generators_per_technician sites."""
+        sites = generators['location_city'].astype(str).value_counts()
+        staffed = {row[0] for row in self._conn.execute("SELECT DISTINCT base_city FROM technicians")}
+        rows = [
+            (f"{city[:3].upper()}-T{i + 1:02d}", city, self.config["shift_hours"] * 60)
+            for city, count in sites.items() if city not in staffed
+            for i in range(max(2, -(-count // self.config["generators_per_technician"])))
+        ]
+        if rows:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO technicians (name, base_city, shift_minutes) VALUES (?, ?, ?)", rows
+                )
+    
+    def _load_roster(self) -> None:
+        self.technicians = pd.read_sql_query(
+            "SELECT id, name, base_city, shift_minutes FROM technicians WHERE active = 1 ORDER BY id", self._conn
+        )
+        # Technicians start from their base city's centre, so distances to bases are distances to cities
+        cities, self._tech_city = np.unique(self.technicians['base_city'].to_numpy(dtype=object), return_inverse=True)
+        self._city_lat, self._city_lon = city_coordinates(cities)
+        self._base_lat, self._base_lon = self._city_lat[self._tech_city], self._city_lon[self._tech_city]
+        self._capacity = self.technicians['shift_minutes'].to_numpy(dtype=float)
+        self._anchor_lat, self._anchor_lon = self._base_lat.copy(), self._base_lon.copy()
+        self._routes = [[] for _ in range(len(self.technicians))]
+        # Per route: points (base, stops, base), leg lengths in km, and the minutes each stop starts and ends,
+        # with leaving base as the end of stop 0
+        self._route_lat = [np.array([lat, lat]) for lat in self._base_lat]
+        self._route_lon = [np.array([lon, lon]) for lon in self._base_lon]
+        self._route_km = [np.zeros(1) for _ in range(len(self.technicians))]
+        self._route_starts = [np.zeros(0) for _ in range(len(self.technicians))]
+        self._route_ends = [np.zeros(1) for _ in range(len(self.technicians))]
+        self._used = np.zeros(len(self.technicians))
+        self._tier_minutes = np.zeros((len(self.technicians), len(PRIORITY_LEVELS)))
+        self._tier_stops = np.zeros((len(self.technicians), len(PRIORITY_LEVELS)), dtype=np.int64)
+        # Per route and priority: where the route's last stop at least as urgent is, and when it ends
+        self._tier_end_lat = np.repeat(self._base_lat[:, None], len(PRIORITY_LEVELS), axis=1)
+        self._tier_end_lon = np.repeat(self._base_lon[:, None], len(PRIORITY_LEVELS), axis=1)
+        self._tier_end_minutes = np.zeros((len(self.technicians), len(PRIORITY_LEVELS)))
+    
+    # ---- jobs ----
+    
+    def _job_frame(self, tickets: pd.DataFrame) -> pd.DataFrame:
+        tickets = tickets[tickets['priority'].notna()].drop_duplicates('generator', keep='last')
+        lat, lon = site_coordinates(tickets['generator'], tickets['location'])
+        priority = pd.Categorical(tickets['priority'], categories=PRIORITY_LEVELS, ordered=True).codes
+        return pd.DataFrame({
+            'ticket_id': tickets['ticket_id'].astype(object).to_numpy(),
+            'customer': tickets['customer'].astype(object).to_numpy(),
+            'location': tickets['location'].astype(object).to_numpy(),
+            'priority': priority.astype(np.int8),
+            'lat': lat,
+            'lon': lon,
+            'service': np.array([self.config["service_minutes"][p] for p in PRIORITY_LEVELS], dtype=float)[priority]
+        }, index=pd.Index(tickets['generator'].astype(object).to_numpy(), name='generator'))
+    
+    def _city_km_for(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Distance from each job to each staffed city, as a (jobs, cities) matrix."""
+        return haversine_km(lat[:, None], lon[:, None], self._city_lat[None, :], self._city_lon[None, :])
+    
+    def _set_jobs(self, jobs: pd.DataFrame) -> None:
+        self._jobs = jobs[['ticket_id', 'customer', 'location']].copy()
+        self._lat = jobs['lat'].to_numpy(copy=True)
+        self._lon = jobs['lon'].to_numpy(copy=True)
+        self._city_km = self._city_km_for(self._lat, self._lon)
+        self._service = jobs['service'].to_numpy(copy=True)
+        self._priority = jobs['priority'].to_numpy(copy=True)
+        self._tech = np.full(len(jobs), -1)
+        self._active = np.ones(len(jobs), dtype=bool)
+        self._manual = np.zeros(len(jobs), dtype=bool)
+    
+    def _candidate_pairs(self, jobs: np.ndarray, exclude: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+        """Technicians to try for each job as (index into jobs, technician) pairs, nearest route first.
+
+        Only technicians with room for the job's service time, based in the nearest city
+        that has one (or within reach_km of it), qualify. Among them, the routes whose stops
+        centre closest to the job are tried. Idle technicians sit at their base, so same-base
+        colleagues share jobs instead of one route filling up first. Distances for all jobs
+        come from one pass.
+        """
+        slack = self._capacity - self._offset - self._used
+        service = self._service[jobs]
+        city_slack = np.full(len(self._city_lat), -np.inf)
+        np.maximum.at(city_slack, self._tech_city, slack)
+        city_km = self._city_km[jobs]
+        nearest = np.where(city_slack[None, :] >= service[:, None], city_km, np.inf).min(axis=1)
+        in_reach = city_km <= nearest[:, None] + self.config["reach_km"]
+        rows, techs = np.nonzero(in_reach[:, self._tech_city] & (slack[None, :] >= service[:, None]))
+        if not len(rows):
+            return rows, techs
+        
+        route_km = haversine_km(self._lat[jobs][rows], self._lon[jobs][rows],
+                                self._anchor_lat[techs], self._anchor_lon[techs])
+        order = np.lexsort((techs, route_km, rows))
+        rows, techs = rows[order], techs[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        keep = (rank < self.config["candidate_technicians"]) & (techs != exclude)
+        return rows[keep], techs[keep]
+    
+    def _may_bump(self, jobs: np.ndarray) -> np.ndarray:
+        """(jobs, technicians) mask of routes that can take each job by deferring lower-priority stops.
+
+        A route keeps everything up to its last stop at least as urgent as the job, then
+        serves the job and drives back to base; the drive back is known per city, so only
+        routes that fit without the drive to the job are measured.
+        """
+        priority = self._priority[jobs]
+        room = (self._capacity - self._offset - self._tier_end_minutes[:, priority].T
+                - self._service[jobs][:, None] - self._city_km[jobs][:, self._tech_city] * self._minutes_per_km)
+        rows, techs = np.nonzero(room >= 0)
+        drive = travel_minutes(self._lat[jobs][rows], self._lon[jobs][rows],
+                               self._tier_end_lat[techs, priority[rows]], self._tier_end_lon[techs, priority[rows]])
+        fits = np.zeros(room.shape, dtype=bool)
+        fits[rows, techs] = drive <= room[rows, techs]
+        return fits
+    
+    def _bump_candidates(self, j: int) -> np.ndarray:
+        """Technicians whose route can make room for job j by deferring lower-priority stops, nearest first."""
+        eligible = self._may_bump(np.array([j]))[0]
+        if not eligible.any():
+            return np.empty(0, dtype=np.int64)
+        base_km = self._city_km[j][self._tech_city]
+        eligible &= base_km <= base_km[eligible].min() + self.config["reach_km"]
+        route_km = np.where(eligible, haversine_km(self._lat[j], self._lon[j], self._anchor_lat, self._anchor_lon), np.inf)
+        k = min(self.config["candidate_technicians"], int(eligible.sum()))
+        nearest = np.argpartition(route_km, k - 1)[:k]
+        return nearest[np.argsort(route_km[nearest])]
+    
+    # ---- routes ----
+    
+    def _route_points(self, t: int) -> Tuple[np.ndarray, np.ndarray]:
+        route = self._routes[t]
+        lat = np.concatenate([[self._base_lat[t]], self._lat[route], [self._base_lat[t]]])
+        lon = np.concatenate([[self._base_lon[t]], self._lon[route], [self._base_lon[t]]])
+        return lat, lon
+    
+    def _refresh_route(self, t: int) -> None:
+        """Recompute route t's legs, stop start times, total minutes and anchor after it changed."""
+        route = self._routes[t]
+        lat, lon = self._route_points(t)
+        self._route_lat[t], self._route_lon[t] = lat, lon
+        self._route_km[t] = haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        legs = self._route_km[t] * self._minutes_per_km
+        service = self._service[route]
+        self._route_starts[t] = np.cumsum(legs[:-1]) + np.concatenate([[0.0], np.cumsum(service)[:-1]])
+        self._route_ends[t] = np.concatenate([[0.0], self._route_starts[t] + service])
+        last = np.zeros(len(PRIORITY_LEVELS), dtype=np.int64)
+        np.maximum.at(last, self._priority[route], np.arange(1, len(route) + 1))
+        last = np.maximum.accumulate(last)
+        self._tier_end_lat[t], self._tier_end_lon[t] = lat[last], lon[last]
+        self._tier_end_minutes[t] = self._route_ends[t][last]
+        self._used[t] = float(legs.sum() + service.sum())
+        self._anchor_lat[t] = self._lat[route].mean() if route else self._base_lat[t]
+        self._anchor_lon[t] = self._lon[route].mean() if route else self._base_lon[t]
+    
+    def _stop_starts(self, t: int) -> Tuple[np.ndarray, float]:
+        """Minutes from plan start until each stop on route t begins, and the route's total minutes."""
+        return self._route_starts[t], float(self._used[t])
+    
+    def _locked(self, t: int, starts: np.ndarray) -> int:
+        """Stops on route t that have already started and must stay in place."""
+        if self.plan_date != datetime.now().date():
+            return 0
+        return int((self._offset + starts <= self._shift_minutes_now()).sum())
+    
+    def _shift_minutes_now(self) -> float:
+        now = datetime.now()
+        return now.hour * 60 + now.minute - self.config["shift_start_hour"] * 60
+    
+    def _plan_day(self) -> Tuple[object, float]:
+        """Shift being planned and minutes of it already gone: today's, or tomorrow's once today's has ended."""
+        elapsed = self._shift_minutes_now()
+        if elapsed >= self.config["shift_hours"] * 60:
+            return datetime.now().date() + timedelta(days=1), 0.0
+        return datetime.now().date(), float(max(elapsed, 0))
+    
+    def _best_insertions(self, jobs: np.ndarray, rows: np.ndarray, techs: np.ndarray,
+                         check_capacity: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """Cheapest position for each job over its candidate routes, as (technician, position) arrays.
+
+        Every allowed position on every candidate route is scored in one distance pass:
+        positions keep the route's priority tiers in order and never precede started stops.
+        Cost is the added route time plus the priority-weighted arrival at the job; ties go
+        to the nearer route, then the earlier position. Technician is -1 where nothing fits.
+        """
+        best_tech = np.full(len(jobs), -1)
+        best_position = np.zeros(len(jobs), dtype=np.int64)
+        if not len(rows):
+            return best_tech, best_position
+        
+        routes, route_of = np.unique(techs, return_inverse=True)
+        today = self.plan_date == datetime.now().date()
+        started = self._shift_minutes_now() - self._offset
+        locked = np.array([
+            np.searchsorted(self._route_starts[t], started, side='right') if today else 0 for t in routes
+        ], dtype=np.int64)
+        # Points, legs and stop end times of the candidate routes, end to end
+        lengths = self._tier_stops[routes].sum(axis=1)
+        first_point = np.cumsum(lengths + 2) - (lengths + 2)
+        first_leg = np.cumsum(lengths + 1) - (lengths + 1)
+        point_lat = np.concatenate([self._route_lat[t] for t in routes])
+        point_lon = np.concatenate([self._route_lon[t] for t in routes])
+        leg_km = np.concatenate([self._route_km[t] for t in routes])
+        stop_ends = np.concatenate([self._route_ends[t] for t in routes])
+        
+        job = jobs[rows]
+        priority = self._priority[job]
+        before = np.cumsum(self._tier_stops[routes], axis=1)[route_of]
+        lo = np.maximum(np.where(priority > 0, before[np.arange(len(rows)), priority - 1], 0), locked[route_of])
+        hi = np.maximum(before[np.arange(len(rows)), priority], lo)
+        counts = hi - lo + 1
+        pair = np.repeat(np.arange(len(rows)), counts)
+        prev = lo[pair] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        point = first_point[route_of[pair]] + prev
+        leg = first_leg[route_of[pair]] + prev
+        
+        job_lat, job_lon = self._lat[job[pair]], self._lon[job[pair]]
+        km = haversine_km(np.tile(job_lat, 2), np.tile(job_lon, 2),
+                          point_lat[np.concatenate([point, point + 1])], point_lon[np.concatenate([point, point + 1])])
+        to_job, from_job = np.split(km * self._minutes_per_km, 2)
+        added = to_job + from_job - leg_km[leg] * self._minutes_per_km + self._service[job[pair]]
+        # Arrival at the job: end of the previous stop (or leaving base) plus the drive
+        cost = added + self._eta_weight[priority[pair]] * (stop_ends[leg] + to_job)
+        if check_capacity:
+            tech = techs[pair]
+            cost = np.where(self._used[tech] + added + self._offset <= self._capacity[tech], cost, np.inf)
+        
+        # Candidate pairs are ordered nearest first, so the first minimum per job wins ties
+        order = np.lexsort((np.arange(len(cost)), cost, rows[pair]))
+        first = order[np.r_[True, rows[pair][order][1:] != rows[pair][order][:-1]]]
+        found = np.isfinite(cost[first])
+        best_tech[rows[pair][first][found]] = techs[pair][first][found]
+        best_position[rows[pair][first][found]] = prev[first][found]
+        return best_tech, best_position
+    
+    def _assign(self, j: int, t: int, position: int) -> None:
+        self._routes[t].insert(position, j)
+        self._tier_minutes[t, self._priority[j]] += self._service[j]
+        self._tier_stops[t, self._priority[j]] += 1
+        self._tech[j] = t
+        self._refresh_route(t)
+    
+    def _insert(self, j: int, bump: bool = False, exclude: int = -1) -> bool:
+        """Place job j on the cheapest candidate route; with bump, capacity is made by deferring lower-priority stops."""
+        jobs = np.array([j])
+        if bump:
+            techs = self._bump_candidates(j)
+            rows = np.zeros(len(techs), dtype=np.int64)
+        else:
+            rows, techs = self._candidate_pairs(jobs, exclude)
+        tech, position = self._best_insertions(jobs, rows, techs, check_capacity=not bump)
+        if tech[0] < 0:
+            self._tech[j] = -1
+            return False
+        
+        self._assign(j, tech[0], position[0])
+        if bump:
+            self._bump(tech[0], keep=j)
+        return self._tech[j] >= 0
+    
+    def _place(self, order: np.ndarray, bump: bool = False) -> set:
+        """Insert jobs in the given order; returns the technicians whose routes took a job.
+
+        Blocks of jobs are scored against the current plan in one pass. Jobs before the
+        first one that changes the plan are deferred on that score; the changing job is
+        applied and the rest of the block is scored again. Blocks grow while jobs keep
+        failing, so a full plan costs one pass per block rather than per job. With bump,
+        a CRITICAL job that fits nowhere makes room by deferring lower-priority stops.
+        """
+        touched = set()
+        start, block = 0, 1
+        while start < len(order):
+            jobs = order[start:start + block]
+            tech, position = self._best_insertions(jobs, *self._candidate_pairs(jobs))
+            changes = tech >= 0
+            if bump:
+                critical = np.flatnonzero((tech < 0) & (self._priority[jobs] == 0))
+                changes[critical] = self._may_bump(jobs[critical]).any(axis=1)
+            first = int(changes.argmax()) if changes.any() else len(jobs)
+            self._tech[jobs[:first]] = -1
+            if first < len(jobs):
+                j = jobs[first]
+                if tech[first] >= 0:
+                    self._assign(j, tech[first], position[first])
+                else:
+                    self._insert(j, bump=True)
+                touched.add(self._tech[j])
+            start += first + 1
+            block = min(self.config["score_block_jobs"], max(1, 2 * first))
+        return touched - {-1}
+    
+    def _bump(self, t: int, keep: int) -> None:
+        """Defer the least urgent unstarted stops on route t until it fits the shift, then re-place them."""
+        bumped = []
+        starts, _ = self._stop_starts(t)
+        locked = self._locked(t, starts)
+        while self._used[t] + self._offset > self._capacity[t]:
+            route = self._routes[t]
+            movable = [k for k in range(locked, len(route)) if self._priority[route[k]] > self._priority[keep]]
+            if not movable:
+                break
+            # Lowest priority first, latest in the route among equals
+            victim = max(movable, key=lambda k: (self._priority[route[k]], k))
+            bumped.append(route[victim])
+            self._remove(route[victim])
+        if self._used[t] + self._offset > self._capacity[t]:
+            self._remove(keep)
+        self.stats['bumped'] += len(bumped)
+        for j in bumped:
+            self._insert(j, exclude=t)
+    
+    def _remove(self, j: int) -> None:
+        t = self._tech[j]
+        if t >= 0:
+            self._routes[t].remove(j)
+            self._tier_minutes[t, self._priority[j]] -= self._service[j]
+            self._tier_stops[t, self._priority[j]] -= 1
+            self._tech[j] = -1
+            self._refresh_route(t)
+    
+    def _tighten(self, t: int) -> None:
+        """2-opt each priority segment of route t after its started stops."""
+        route = self._routes[t]
+        if len(route) < 2:
+            return
+        starts, _ = self._stop_starts(t)
+        locked = self._locked(t, starts)
+        lat, lon = self._route_points(t)
+        tiers = self._priority[route]
+        for tier in np.unique(tiers):
+            segment = np.flatnonzero(tiers == tier)
+            first, last = max(int(segment[0]), locked), int(segment[-1])
+            if last - first < 1:
+                continue
+            # Path through the segment with its neighbours (or the base) as fixed ends
+            points = np.arange(first, last + 3)
+            order = two_opt(lat[points], lon[points])
+            route[first:last + 1] = [route[k] for k in (points[order[1:-1]] - 1)]
+            lat, lon = self._route_points(t)
+        self._refresh_route(t)
+    
+    # ---- planning ----
+    
+    def _plan(self, tickets: pd.DataFrame, generators: pd.DataFrame) -> None:
+        started = time.perf_counter()
+        self.ensure_roster(generators)
+        self._load_roster()
+        self._set_jobs(self._job_frame(tickets))
+        self.plan_date, self._offset = self._plan_day()
+        
+        if len(self.technicians) and len(self._jobs):
+            self._place(np.argsort(self._priority, kind='stable'))
+            for t in range(len(self.technicians)):
+                self._tighten(t)
+        
+        self.stats['full_plans'] += 1
+        self.stats['plan_seconds'] = time.perf_counter() - started
+        self.version += 1
+    
+    def _upsert(self, tickets: pd.DataFrame, manual: bool = False) -> None:
+        """Add new jobs and re-place jobs whose priority changed."""
+        jobs = self._job_frame(tickets)
+        if jobs.empty:
+            return
+        pos = self._jobs.index.get_indexer(jobs.index)
+        known = pos >= 0
+        changed = np.zeros(len(jobs), dtype=bool)
+        changed[known] = (self._priority[pos[known]] != jobs['priority'].to_numpy()[known]) | ~self._active[pos[known]]
+        for j in pos[changed]:
+            self._remove(j)
+        
+        if known.any():
+            self._jobs.loc[jobs.index[known], ['ticket_id', 'customer', 'location']] = \
+                jobs.loc[known, ['ticket_id', 'customer', 'location']].to_numpy()
+            self._priority[pos[known]] = jobs['priority'].to_numpy()[known]
+            self._service[pos[known]] = jobs['service'].to_numpy()[known]
+            self._active[pos[known]] = True
+            self._manual[pos[known]] = manual
+        if (~known).any():
+            added = jobs[~known]
+            start = len(self._jobs)
+            self._jobs = pd.concat([self._jobs, added[['ticket_id', 'customer', 'location']]])
+            self._lat = np.append(self._lat, added['lat'].to_numpy())
+            self._lon = np.append(self._lon, added['lon'].to_numpy())
+            self._city_km = np.vstack([self._city_km, self._city_km_for(self._lat[start:], self._lon[start:])])
+            self._service = np.append(self._service, added['service'].to_numpy())
+            self._priority = np.append(self._priority, added['priority'].to_numpy())
+            self._tech = np.append(self._tech, np.full(len(added), -1))
+            self._active = np.append(self._active, np.ones(len(added), dtype=bool))
+            self._manual = np.append(self._manual, np.full(len(added), manual))
+            pos[~known] = np.arange(start, start + len(added))
+        
+        todo = pos[~known | changed]
+        if not len(todo) or not len(self.technicians):
+            return
+        todo = todo[np.argsort(self._priority[todo], kind='stable')]
+        for t in self._place(todo, bump=True):
+            self._tighten(t)
+        self.stats['incremental'] += 1
+        self.version += 1
+    
+    def _drop(self, generators) -> None:
+        pos = self._jobs.index.get_indexer(pd.Index(generators, dtype=object))
+        pos = pos[pos >= 0]
+        for j in pos[self._active[pos]]:
+            self._remove(j)
+        if len(pos):
+            self._active[pos] = False
+            self.version += 1
+    
+    def _sync(self, tickets: pd.DataFrame, generators: pd.DataFrame, ledger_version: Optional[int]) -> None:
+        if self.plan_date != self._plan_day()[0]:
+            self._plan(tickets, generators)
+            self._ledger_version = ledger_version
+            return
+        if ledger_version is not None and ledger_version == self._ledger_version:
+            return
+        self._ledger_version = ledger_version
+        open_generators = pd.Index(tickets['generator'].astype(object))
+        gone = self._active & ~self._manual & ~self._jobs.index.isin(open_generators)
+        if gone.any():
+            self._drop(self._jobs.index[gone])
+        self._upsert(tickets)
+    
+    def _apply_events(self, events: pd.DataFrame) -> None:
+        if self.plan_date != self._plan_day()[0]:
+            return
+        closed = events['event'] == 'CLOSED'
+        if closed.any():
+            self._drop(events.loc[closed, 'generator'])
+        if (~closed).any():
+            self._upsert(events[~closed])
+    
+    def sync(self, tickets: pd.DataFrame, generators: pd.DataFrame, ledger_version: Optional[int] = None) -> None:
+        """Bring the plan in line with the open tickets: a full plan once per shift, otherwise incremental.
+
+        Passing the ledger version skips the reconcile when the tickets have not changed
+        since the last sync.
+        """
+        self._submit('sync', (tickets, generators, ledger_version))
+    
+    def replan(self) -> None:
+        """Discard the day plan so the next sync solves it from scratch."""
+        self._submit('replan')
+    
+    def on_ticket_events(self, events: pd.DataFrame) -> None:
+        """Ticket ledger listener: closed tickets leave the plan and new or escalated ones join it."""
+        self._submit('events', events)
+    
+    def request_service(self, serial: str, city: str, customer: str, priority: str,
+                        generators: pd.DataFrame) -> Optional[Dict]:
+        """Add a visit requested from the portal; returns the technician and arrival, or None when deferred.
+
+        The visit is placed at once, after any planning step that is already running.
+        """
+        with self._lock:
+            if self.plan_date != self._plan_day()[0]:
+                self._plan(pd.DataFrame(columns=['generator', 'ticket_id', 'customer', 'location', 'priority']), generators)
+            pos = self._jobs.index.get_indexer([serial])[0]
+            requested = PRIORITY_LEVELS.index(priority)
+            if pos < 0 or not self._active[pos] or requested < self._priority[pos]:
+                ticket_id = self._jobs['ticket_id'].iat[pos] if pos >= 0 else f"REQ-{serial}"
+                self._upsert(pd.DataFrame({
+                    'generator': [serial], 'ticket_id': [ticket_id], 'customer': [customer],
+                    'location': [city], 'priority': [priority]
+                }), manual=True)
+                pos = self._jobs.index.get_indexer([serial])[0]
+            self._publish()
+            t = self._tech[pos]
+            if t < 0:
+                return None
+            starts, _ = self._stop_starts(t)
+            start = starts[self._routes[t].index(pos)]
+            return {'technician': self.technicians['name'].iat[t], 'eta': self._clock(start)}
+    
+    def _clock(self, minutes) -> pd.Timestamp:
+        shift_start = pd.Timestamp(self.plan_date) + pd.Timedelta(hours=self.config["shift_start_hour"])
+        return shift_start + pd.to_timedelta(self._offset + np.asarray(minutes), unit='min')
     
-    if 'customer_contact' not in df.columns:
-        df['customer_contact'] = df['primary_contact_email']
-        df.to_csv(generators_file, index=False)
+    # ---- background planning ----
     
-    if 'installation_date' not in df.columns:
-        df['installation_date'] = [
-            datetime.now() - timedelta(days=random.randint(365, 1825)) for _ in range(len(df))
-        ]
-        df.to_csv(generators_file, index=False)
+    def start(self) -> None:
+        """Apply queued planning work on a background thread from now on."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
     
-    return df
-
-def generate_enhanced_generator_data() -> Dict:
-    """Generate enhanced generator data with comprehensive contact information."""
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until all queued work is applied; False when the timeout passed first."""
+        with self._wakeup:
+            return self._wakeup.wait_for(lambda: not self._queue and not self._busy, timeout)
     
-    customer_names = [
-        'King Faisal Medical City', 'Riyadh Mall Complex', 'SABIC Industrial', 'ARAMCO Office Tower',
-        'Al Rajhi Banking HQ', 'STC Data Center', 'NEOM Construction', 'Red Sea Project',
-        'Saudi Airlines Hub', 'KAUST Research', 'PIF Headquarters', 'Vision 2030 Center',
-        'Ministry Complex', 'Royal Hospital', 'Diplomatic Quarter', 'Financial District',
-        'Entertainment City', 'Sports Boulevard', 'Green Riyadh', 'ROSHN Development',
-        'ENOWA Energy Hub', 'THE LINE Project', 'Oxagon Port', 'Trojena Resort',
-        'Al-Ula Heritage', 'Qiddiya Venue', 'SPARK Sports', 'Mukaab Tower',
-        'Diriyah Gate', 'King Salman Park'
-    ]
+    def _submit(self, kind: str, payload=None) -> None:
+        with self._wakeup:
+            self._queue.append((kind, payload))
+            self._wakeup.notify_all()
+        if self._thread is None:
+            self._drain()
     
-    # Generate contact data - ensure exactly 30 entries
-    contact_data = []
-    for i in range(30):
-        contact_data.append({
-            'primary_contact_name': f'Contact-{i+1}', 
-            'primary_contact_phone': f'+966-11-{1000+i:04d}',
-            'primary_contact_email': f'contact{i+1}@customer.sa',
-            'alt_contact_name': f'Alt-Contact-{i+1}', 
-            'alt_contact_phone': f'+966-11-{2000+i:04d}',
-            'alt_contact_email': f'alt{i+1}@customer.sa'
+    def _run(self) -> None:
+        while True:
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._queue)
+            try:
+                self._drain()
+            except Exception as error:
+                # A failed step may leave routes half-updated, so the next sync solves the day afresh
+                with self._lock:
+                    self.plan_date = None
+                self.stats['failed'] += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+    
+    def _drain(self) -> None:
+        """Apply everything queued so far, then publish the plan for readers."""
+        with self._wakeup:
+            queue, self._queue = self._queue, []
+            self._busy = True
+        try:
+            # A sync reconciles against the full ticket set, so only the latest one is applied
+            # and ticket events queued before it are already part of it
+            last_sync = max((i for i, (kind, _) in enumerate(queue) if kind == 'sync'), default=-1)
+            with self._lock:
+                for i, (kind, payload) in enumerate(queue):
+                    if kind == 'replan':
+                        self.plan_date = None
+                    elif kind == 'sync' and i == last_sync:
+                        self._sync(*payload)
+                    elif kind == 'events' and i > last_sync:
+                        self._apply_events(payload)
+                self._publish()
+        finally:
+            with self._wakeup:
+                self._busy = False
+                self._wakeup.notify_all()
+    
+    # ---- views ----
+    
+    def _publish(self) -> None:
+        """Build the itinerary and route summary of the current plan for ``frames`` to hand out."""
+        if self._view_key == (self.version, self.plan_date):
+            return
+        self._view_key = (self.version, self.plan_date)
+        if self.plan_date is None:
+            self._view = (None, None, None, 0)
+            return
+        routes = [np.asarray(route, dtype=np.int64) for route in self._routes]
+        lengths = np.array([len(route) for route in routes], dtype=np.int64)
+        order = np.concatenate(routes) if routes else np.zeros(0, dtype=np.int64)
+        starts = np.concatenate(self._route_starts) if routes else np.zeros(0)
+        names = self.technicians['name'].to_numpy()
+        itinerary = pd.DataFrame({
+            'technician': np.repeat(names, lengths),
+            'stop': np.arange(len(order)) - np.repeat(np.cumsum(lengths) - lengths, lengths) + 1,
+            'generator': self._jobs.index[order],
+            'ticket_id': self._jobs['ticket_id'].to_numpy()[order],
+            'customer': self._jobs['customer'].to_numpy()[order],
+            'location': self._jobs['location'].to_numpy()[order],
+            'priority': pd.Categorical.from_codes(self._priority[order], PRIORITY_LEVELS, ordered=True),
+            'eta': self._clock(starts),
+            'service_minutes': self._service[order]
+        })
+        summary = pd.DataFrame({
+            'technician': names,
+            'base': self.technicians['base_city'].to_numpy(),
+            'stops': lengths,
+            'critical': np.bincount(np.repeat(np.arange(len(routes)), lengths),
+                                    weights=self._priority[order] == 0, minlength=len(routes)).astype(int),
+            'travel_km': np.array([legs.sum() for legs in self._route_km]),
+            'shift_used': (self._used + self._offset) / self._capacity
         })
+        self._view = (self.plan_date, itinerary, summary, int((self._active & (self._tech < 0)).sum()))
     
-    return {
-        'serial_number': [f'PS-{2020 + i//4}-{(i+1):04d}' for i in range(30)],
-        'model_series': (['PS-2000 Series', 'PS-1500 Series', 'PS-1000 Series', 'PS-800 Series'] * 8)[:30],
-        'customer_name': customer_names,
-        'primary_contact_name': [contact['primary_contact_name'] for contact in contact_data],
-        'primary_contact_phone': [contact['primary_contact_phone'] for contact in contact_data],
-        'primary_contact_email': [contact['primary_contact_email'] for contact in contact_data],
-        'alt_contact_name': [contact['alt_contact_name'] for contact in contact_data],
-        'alt_contact_phone': [contact['alt_contact_phone'] for contact in contact_data],
-        'alt_contact_email': [contact['alt_contact_email'] for contact in contact_data],
-        'customer_contact': [contact['primary_contact_email'] for contact in contact_data],
-        'rated_kw': [
-            2000, 1500, 1000, 800, 2500, 2000, 1800, 1200,
-            1000, 750, 600, 400, 2200, 1800, 1400, 900,
-            650, 500, 350, 300, 2800, 2200, 1600, 1100,
-            850, 700, 450, 380, 320, 280
-        ],
-        'service_contract': ([
-            'Premium Care', 'Basic Maintenance', 'Preventive Plus', 'No Contract'
-        ] * 8)[:30],
-        'next_service_hours': [random.randint(-200, 800) for _ in range(30)],
-        'total_runtime_hours': [random.randint(2000, 12000) for _ in range(30)],
-        'location_city': ([
-            'Riyadh', 'Riyadh', 'Dammam', 'Riyadh', 'Riyadh', 'Jeddah', 'NEOM', 'Al-Ula',
-            'Riyadh', 'Thuwal', 'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh',
-            'Riyadh', 'Riyadh', 'Riyadh', 'Riyadh', 'NEOM', 'NEOM', 'NEOM', 'Qiddiya',
-            'Al-Ula', 'Qiddiya', 'Riyadh', 'Riyadh', 'Diriyah', 'Riyadh'
-        ] * 2)[:30],
-        'installation_date': [
-            datetime.now() - timedelta(days=random.randint(365, 1825)) for _ in range(30)
-        ]
-    }
-
-@st.cache_data(ttl=60)
-def generate_real_time_status(generators_df: pd.DataFrame) -> pd.DataFrame:
-    """Generate real-time operational status and sensor data."""
-    seed = int(time.time() // 60)
-    np.random.seed(seed)
+    def frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Per-stop itinerary and per-technician route summary of the last finished plan."""
+        return self._view[1], self._view[2]
     
-    status_data = []
-    for _, gen in generators_df.iterrows():
-        try:
-            oil_pressure = np.random.uniform(20, 35)
-            coolant_temp = np.random.uniform(75, 110)
-            vibration = np.random.uniform(1.0, 6.0)
-            fuel_level = np.random.uniform(10, 95)
-            load_percent = np.random.uniform(0, 100)
-            
-            has_fault = (oil_pressure < 25 or coolant_temp > 105 or vibration > 5.0 or fuel_level < 15)
-            is_needed = np.random.choice([True, False], p=[0.7, 0.3])
-            
-            if has_fault:
-                operational_status = "FAULT"
-                status_color = "fault"
-                fault_description = []
-                if oil_pressure < 25: 
-                    fault_description.append("Low oil pressure")
-                if coolant_temp > 105: 
-                    fault_description.append("High coolant temperature")
-                if vibration > 5.0: 
-                    fault_description.append("High vibration")
-                if fuel_level < 15: 
-                    fault_description.append("Low fuel")
-                fault_desc = ", ".join(fault_description)
-            elif is_needed and fuel_level > 20:
-                operational_status = "RUNNING"
-                status_color = "running"
-                fault_desc = ""
-            elif not is_needed:
-                operational_status = "STANDBY"
-                status_color = "standby"
-                fault_desc = "Not required - standby mode"
-            else:
-                operational_status = "MAINTENANCE"
-                status_color = "maintenance"
-                fault_desc = "Scheduled maintenance"
-            
-            service_hours = gen.get('next_service_hours', 500)
-            runtime_hours = gen.get('total_runtime_hours', 5000)
-            
-            needs_proactive_contact = False
-            service_type = "Regular Maintenance"
-            
-            if service_hours < 0:
-                needs_proactive_contact = True
-                service_type = "Overdue Maintenance"
-            elif service_hours < 48:
-                needs_proactive_contact = True
-                service_type = "Urgent Service Due"
-            elif service_hours < CONFIG["proactive_notification_hours"]:
-                needs_proactive_contact = True
-                service_type = "Scheduled Service Due"
-            
-            customer_contact = gen.get('customer_contact', 'contact@customer.sa')
-            
-            status_data.append({
-                'serial_number': gen['serial_number'],
-                'customer_name': gen['customer_name'],
-                'customer_contact': customer_contact,
-                'operational_status': operational_status,
-                'status_color': status_color,
-                'fault_description': fault_desc,
-                'oil_pressure': round(oil_pressure, 1),
-                'coolant_temp': round(coolant_temp, 1),
-                'vibration': round(vibration, 2),
-                'fuel_level': round(fuel_level, 1),
-                'load_percent': round(load_percent, 1),
-                'next_service_hours': service_hours,
-                'service_type': service_type,
-                'runtime_hours': runtime_hours,
-                'needs_proactive_contact': needs_proactive_contact,
-                'revenue_opportunity': has_fault or needs_proactive_contact
-            })
-        except Exception:
-            continue
+    def deferred(self) -> int:
+        """Open jobs with no technician in the last finished plan."""
+        return self._view[3]
     
-    return pd.DataFrame(status_data)
+    def planned_for(self):
+        """Date of the shift the last finished plan covers, or None while there is none."""
+        return self._view[0]
 
-def generate_customer_tickets(customer_status, customer_generators):
-    """Generate customer-facing tickets similar to work management system."""
-    tickets = []
-    
-    for _, gen_status in customer_status.iterrows():
-        try:
-            # Get generator info
-            gen_info = customer_generators[customer_generators['serial_number'] == gen_status['serial_number']].iloc[0]
-            
-            # Check if ticket should be generated
-            should_generate_ticket = False
-            ticket_type = ""
-            priority = ""
-            service_detail = ""
-            action_required = ""
+@st.cache_resource
+def get_dispatch_planner() -> DispatchPlanner:
+    """Process-wide technician dispatch planner, solving on its own thread."""
+    planner = DispatchPlanner()
+    planner.start()
+    return planner
+
+# ========================================
+# FLEET VIEW
+# ========================================
+
+STATUS_BADGES = {
+    "RUNNING": "🟢 RUNNING",
+    "FAULT": "🔴 FAULT",
+    "STANDBY": "⚪ STANDBY",
+    "MAINTENANCE": "🟡 MAINTENANCE"
+}
+
+SEVERITY_FILTERS = {
+    "All": 0,
+    "Advisory and above": ADVISORY,
+    "Warning and above": WARNING,
+    "Critical and above": CRITICAL
+}
+
+def filter_fleet_status(status_df: pd.DataFrame, statuses: List[str], min_level: int) -> pd.DataFrame:
+    """Status rows matching the filters, faults first and then by descending alert level."""
+    mask = status_df['operational_status'].isin(statuses) & (status_df['alert_level'] >= min_level)
+    view = status_df[mask.to_numpy()]
+    is_fault = (view['operational_status'] == 'FAULT').to_numpy()
+    order = np.lexsort((-view['alert_level'].to_numpy(), ~is_fault))
+    return view.iloc[order]
+
+def build_fleet_summary_grid(page_status: pd.DataFrame, generators: pd.DataFrame) -> pd.DataFrame:
+    """One-row-per-generator summary of a page of status rows for the fleet grid."""
+    rows = join_generator_info(page_status, generators, ['model_series', 'location_city'])
+    is_fault = (rows['operational_status'] == 'FAULT').to_numpy()
+    issues = np.where(is_fault, rows['fault_description'].astype(object), rows['warning_text'].astype(object))
+    return pd.DataFrame({
+        'Generator': rows['serial_number'],
+        'Model': rows['model_series'],
+        'Location': rows['location_city'],
+        'Status': rows['operational_status'].map(STATUS_BADGES),
+        'Severity': pd.Categorical.from_codes(rows['alert_level'].to_numpy(), ALERT_LEVELS),
+        'Load (%)': rows['load_percent'],
+        **{
+            f"{SENSOR_RULES[sensor]['label']} ({SENSOR_RULES[sensor]['unit'].strip()})": rows[sensor]
+            for sensor in RULE_SENSORS
+        },
+        'Failure Risk (%)': (rows['failure_risk'] * 100).round(1) if 'failure_risk' in rows.columns else np.nan,
+        'Issues': issues
+    })
+
+FLEET_CHART_BUCKET_SECONDS = 300
+FLEET_CHART_HOURS = 24
+FLEET_CHART_COLORS = px.colors.qualitative.Plotly
+
+# Shaded band per sensor and alert level, drawn once per subplot and shared by every trace
+THRESHOLD_BAND_COLORS = {WARNING: "orange", CRITICAL: "red"}
+
+def threshold_bands(sensor: str) -> List[Tuple[float, float, str]]:
+    """(y0, y1, color) bands covering the warning and critical regions of a sensor."""
+    rule = SENSOR_RULES[sensor]
+    low, high = SENSOR_RANGES[sensor]
+    bands = []
+    for level, color in THRESHOLD_BAND_COLORS.items():
+        limit = rule['limits'][level - ADVISORY]
+        bands.append((low, limit, color) if rule['direction'] == 'below' else (limit, high, color))
+    return bands
+
+def build_sensor_trend_figure(serials: List[str], times: np.ndarray, values: np.ndarray) -> go.Figure:
+    """One WebGL figure with a subplot per rule sensor and a trace per generator.
+
+    ``values`` is the (n_serials, n_buckets, n_sensors) matrix from the history store.
+    Traces of the same generator share a legend group, so one legend click toggles it
+    in every subplot.
+    """
+    fig = make_subplots(
+        rows=2, cols=2, shared_xaxes=True, vertical_spacing=0.12,
+        subplot_titles=[f"{SENSOR_RULES[sensor]['label']} ({SENSOR_RULES[sensor]['unit'].strip()})" for sensor in RULE_SENSORS]
+    )
+    x = times.astype('datetime64[s]')
+    traces, rows, cols = [], [], []
+    for j, sensor in enumerate(RULE_SENSORS):
+        row, col = j // 2 + 1, j % 2 + 1
+        column = HISTORY_SENSORS.index(sensor)
+        for i, serial in enumerate(serials):
+            traces.append(go.Scattergl(
+                x=x, y=values[i, :, column], mode='lines+markers', name=serial,
+                legendgroup=serial, showlegend=j == 0,
+                line_color=FLEET_CHART_COLORS[i % len(FLEET_CHART_COLORS)]
+            ))
+            rows.append(row)
+            cols.append(col)
+    fig.add_traces(traces, rows=rows, cols=cols)
+    for j, sensor in enumerate(RULE_SENSORS):
+        for y0, y1, color in threshold_bands(sensor):
+            fig.add_hrect(y0=y0, y1=y1, fillcolor=color, opacity=0.1, line_width=0, row=j // 2 + 1, col=j % 2 + 1)
+    fig.update_layout(
+        height=450, showlegend=len(serials) > 1, margin=dict(l=0, r=0, t=30, b=0),
+        legend=dict(orientation="h", yanchor="top", y=-0.08)
+    )
+    return fig
+
+@st.cache_data(ttl=FLEET_CHART_BUCKET_SECONDS, max_entries=256, show_spinner=False)
+def sensor_trend_figure_json(customer: str, serials: Tuple[str, ...], bucket: int) -> str:
+    """Serialized trend figure for a set of a customer's generators, cached per time bucket."""
+    get_performance_metrics().count('trend_figure_builds')
+    end = (bucket + 1) * FLEET_CHART_BUCKET_SECONDS
+    times, values = get_sensor_history().query_matrix(
+        list(serials), end - FLEET_CHART_HOURS * 3600, end, resolution='1h'
+    )
+    return build_sensor_trend_figure(list(serials), times, values).to_json()
+
+def render_sensor_trends(customer: str, serials: List[str]):
+    """Draw the batched trend chart for the given generators."""
+    metrics = get_performance_metrics()
+    metrics.count('trend_figure_requests')
+    bucket = int(time.time()) // FLEET_CHART_BUCKET_SECONDS
+    with metrics.span('trends.figure'):
+        fig_json = sensor_trend_figure_json(customer, tuple(serials), bucket)
+    with metrics.span('trends.draw'):
+        st.plotly_chart(json.loads(fig_json), width="stretch")
+
+def request_technician_visit(gen_status: pd.Series, gen_info: pd.Series, priority: str) -> Optional[Dict]:
+    """Add a visit for one generator to the dispatch plan."""
+    return get_dispatch_planner().request_service(
+        gen_status['serial_number'], gen_info['location_city'], gen_status['customer_name'], priority,
+        load_generator_registry()
+    )
+
+def render_generator_detail(gen_status: pd.Series, gen_info: pd.Series):
+    """Full sensor view for one generator: status card, live readings, 24-hour trends and actions."""
+    with st.expander(f"🔍 {gen_status['serial_number']} - {gen_info['model_series']} - Detailed Sensor View", expanded=True):
+        
+        col1, col2 = st.columns([1, 2])
+        
+        with col1:
+            if gen_status['operational_status'] == 'RUNNING':
+                status_icon = "🟢 RUNNING"
+                status_detail = f"Load: {gen_status['load_percent']}% | All systems normal"
+            elif gen_status['operational_status'] == 'FAULT':
+                status_icon = "🔴 FAULT"
+                status_detail = f"⚠️ {gen_status['fault_description']}"
+            elif gen_status['operational_status'] == 'STANDBY':
+                status_icon = "⚪ STANDBY"
+                status_detail = "Generator ready - Not currently needed"
+            else:
+                status_icon = "🟡 MAINTENANCE"
+                status_detail = "Scheduled maintenance in progress"
             
-            # Critical fault tickets
-            if gen_status['operational_status'] == 'FAULT':
-                should_generate_ticket = True
-                ticket_type = "🚨 FAULT RESPONSE"
-                priority = "CRITICAL"
-                service_detail = gen_status['fault_description']
-                action_required = "Contact immediately - Emergency service"
+            hours_to_fault = gen_status.get('hours_to_fault', np.nan)
+            predicted_fault = "No fault trend" if pd.isna(hours_to_fault) else f"~{hours_to_fault:,.0f} hours"
             
-            # Warning tickets for sensors approaching thresholds
-            elif (gen_status['oil_pressure'] < 28 or 
-                  gen_status['coolant_temp'] > 95 or 
-                  gen_status['vibration'] > 4.0 or 
-                  gen_status['fuel_level'] < 30):
-                
-                should_generate_ticket = True
-                ticket_type = "⚠️ PREVENTIVE MAINTENANCE"
-                
-                warning_details = []
-                if gen_status['oil_pressure'] < 28:
-                    warning_details.append(f"Oil Pressure: {gen_status['oil_pressure']} PSI (Below normal)")
-                if gen_status['coolant_temp'] > 95:
-                    warning_details.append(f"Coolant Temp: {gen_status['coolant_temp']}°C (Above normal)")
-                if gen_status['vibration'] > 4.0:
-                    warning_details.append(f"Vibration: {gen_status['vibration']} mm/s (Above normal)")
-                if gen_status['fuel_level'] < 30:
-                    warning_details.append(f"Fuel Level: {gen_status['fuel_level']}% (Low)")
-                
-                service_detail = "; ".join(warning_details)
-                
-                # Determine priority based on severity
-                critical_count = sum([
-                    gen_status['oil_pressure'] < 25,
-                    gen_status['coolant_temp'] > 105,
-                    gen_status['vibration'] > 5.0,
-                    gen_status['fuel_level'] < 20
-                ])
-                
-                if critical_count > 0:
-                    priority = "HIGH"
-                    action_required = "Schedule maintenance within 48 hours"
-                else:
-                    priority = "MEDIUM"
-                    action_required = "Schedule maintenance within 1 week"
+            st.markdown(f"""
+            **Generator Status:** {status_icon}  
+            **Model:** {gen_info['model_series']}  
+            **Capacity:** {gen_info['rated_kw']} kW  
+            **Location:** {gen_info['location_city']}  
+            **Runtime:** {gen_status.get('runtime_hours', 5000):,} hours  
+            **Status Detail:** {status_detail}  
+            **Failure Risk:** {gen_status.get('failure_risk', 0.0):.0%} | **Predicted Fault:** {predicted_fault}
+            """)
+        
+        with col2:
+            st.markdown("**🔍 Live Sensor Readings:**")
             
-            # Service due tickets
-            elif gen_status.get('needs_proactive_contact', False):
-                should_generate_ticket = True
-                ticket_type = "📅 SCHEDULED MAINTENANCE"
-                priority = "MEDIUM"
-                service_detail = gen_status.get('service_type', 'Regular maintenance due')
-                action_required = "Schedule routine maintenance"
+            sensor_cols = st.columns(len(RULE_SENSORS))
             
-            if should_generate_ticket:
-                # Generate ticket ID based on type and generator
-                if priority == "CRITICAL":
-                    ticket_prefix = "CF"  # Critical Fault
-                elif priority == "HIGH":
-                    ticket_prefix = "HW"  # High Warning
-                else:
-                    ticket_prefix = "PM"  # Preventive Maintenance
-                
-                ticket_id = f"{ticket_prefix}-{random.randint(10000, 99999)}"
-                
-                # Calculate estimated revenue
-                if priority == "CRITICAL":
-                    estimated_revenue_usd = CONFIG['revenue_targets']['service_revenue_per_ticket'] / 3.75 * 1.5
+            for sensor_col, sensor in zip(sensor_cols, RULE_SENSORS):
+                with sensor_col:
+                    rule = SENSOR_RULES[sensor]
+                    level = gen_status[f"{sensor}_level"]
+                    if level >= CRITICAL:
+                        badge = "🔴 Critical"
+                    elif level >= ADVISORY:
+                        badge = f"🟡 {rule['caution_label']}"
+                    else:
+                        badge = "🟢 Normal"
+                    st.metric(f"{rule['icon']} {rule['label']}", f"{gen_status[sensor]}{rule['unit']}", delta=badge)
+                    st.caption(rule['normal_range'])
+                    if level >= ADVISORY:
+                        st.caption(rule['advisory_caption'])
+        
+        # Sensor trend visualization
+        st.markdown("**📈 24-Hour Sensor Trends:**")
+        
+        render_sensor_trends(gen_status['customer_name'], [gen_status['serial_number']])
+        
+        st.markdown("**⚡ Quick Actions:**")
+        action_col1, action_col2, action_col3 = st.columns(3)
+        
+        with action_col1:
+            if st.button(f"📅 Schedule Service", key=f"schedule_{gen_status['serial_number']}", width="stretch"):
+                priority = gen_status['priority'] if pd.notna(gen_status.get('priority')) else "MEDIUM"
+                visit = request_technician_visit(gen_status, gen_info, priority)
+                if visit is not None:
+                    st.success(f"✅ Service scheduled for {gen_status['serial_number']}: "
+                               f"{visit['technician']} arriving {visit['eta']:%a %H:%M}")
                 else:
-                    estimated_revenue_usd = CONFIG['revenue_targets']['service_revenue_per_ticket'] / 3.75
-                
-                tickets.append({
-                    'ticket_id': ticket_id,
-                    'type': ticket_type,
-                    'generator': gen_status['serial_number'],
-                    'customer': gen_info['customer_name'],
-                    'primary_contact_name': gen_info.get('primary_contact_name', 'N/A'),
-                    'primary_contact_phone': gen_info.get('primary_contact_phone', 'N/A'),
-                    'primary_contact_email': gen_info.get('primary_contact_email', 'N/A'),
-                    'alt_contact_name': gen_info.get('alt_contact_name', 'N/A'),
-                    'alt_contact_phone': gen_info.get('alt_contact_phone', 'N/A'),
-                    'alt_contact_email': gen_info.get('alt_contact_email', 'N/A'),
-                    'service_detail': service_detail,
-                    'runtime_hours': gen_status.get('runtime_hours', 5000),
-                    'priority': priority,
-                    'revenue_sar': format_currency(estimated_revenue_usd),
-                    'action_required': action_required,
-                    'status': 'PENDING',
-                    'created_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'model_series': gen_info['model_series'],
-                    'location': gen_info['location_city']
-                })
-                
-        except Exception:
-            continue
-    
-    return tickets
+                    st.warning(f"📅 No technician has capacity in the current shift - "
+                               f"{gen_status['serial_number']} is queued for the next plan")
+        
+        with action_col2:
+            if gen_status['operational_status'] == 'FAULT':
+                if st.button(f"🚨 Emergency Service", key=f"emergency_{gen_status['serial_number']}", width="stretch", type="primary"):
+                    visit = request_technician_visit(gen_status, gen_info, "CRITICAL")
+                    if visit is not None:
+                        st.success(f"🚨 Emergency service dispatched for {gen_status['serial_number']}: "
+                                   f"{visit['technician']} arriving {visit['eta']:%a %H:%M}")
+                    else:
+                        st.warning(f"🚨 Emergency request logged for {gen_status['serial_number']} - "
+                                   f"all nearby technicians are committed to critical faults")
+            else:
+                if st.button(f"📞 Contact Support", key=f"support_{gen_status['serial_number']}", width="stretch"):
+                    st.success(f"📞 Support contacted for {gen_status['serial_number']}")
+        
+        with action_col3:
+            if st.button(f"📊 Full Report", key=f"report_{gen_status['serial_number']}", width="stretch"):
+                st.info(f"📊 Generating detailed report for {gen_status['serial_number']}")
 
 # ========================================
 # AUTHENTICATION
@@ -476,24 +4300,124 @@ def authenticate_system():
             format_func=lambda x: user_roles[x]
         )
         
-        if st.button("🚀 Access Work Management System", type="primary", use_container_width=True):
+        if st.button("🚀 Access Work Management System", type="primary", width="stretch"):
             st.session_state.authenticated = True
             st.session_state.user_role = selected_role
             st.session_state.role_name = user_roles[selected_role]
             st.rerun()
 
+# ========================================
+# LIVE UPDATES
+# ========================================
+
+def live_fragment(render: Callable) -> Callable:
+    """Wrap a page section as a fragment that re-runs on its own every refresh interval.
+
+    Only the fragment's elements are rebuilt on those runs; the rest of the page, including
+    the CSS, sidebar, expanders and charts, stays as it was. With live updates turned off the
+    section still reruns on its own widgets but waits for a full rerun for new data.
+    """
+    interval = CONFIG["refresh_interval"] if st.session_state.get('live_updates', True) else None
+    metrics = get_performance_metrics()
+    
+    # The wrapper keeps the section's name, which also keeps the fragment's identity per section
+    @wraps(render)
+    def timed_render(*args, **kwargs):
+        with metrics.rerun(render.__name__):
+            return render(*args, **kwargs)
+    return st.fragment(timed_render, run_every=interval)
+
+def live_update_caption():
+    """Timestamp showing when a live section last redrew."""
+    if st.session_state.get('live_updates', True):
+        st.caption(f"🔄 Live • updated {datetime.now():%H:%M:%S} • every {CONFIG['refresh_interval']}s")
+
 # ========================================
 # ENHANCED CUSTOMER PORTAL
 # ========================================
 
+def render_customer_live_status(selected_customer: str):
+    """Alert banners and fleet metrics for one customer, drawn from the latest status snapshot."""
+    status_df = generate_real_time_status(load_base_generator_data())
+    customer_status = status_df[status_df['customer_name'] == selected_customer]
+    
+    # PROACTIVE ALERTS SECTION
+    st.subheader("🚨 Proactive Fault Alert System")
+    
+    fault_alerts = customer_status[customer_status['operational_status'] == 'FAULT']
+    warning_alerts = customer_status[customer_status['alert_level'] >= WARNING]
+    
+    alert_preferences = get_alert_preferences().get(selected_customer)
+    auto_response = ("Emergency service has been notified" if alert_preferences['immediate_critical']
+                     else "Immediate notifications are turned off in your alert preferences")
+    
+    callout_limit = CONFIG["portal"]["alert_callouts"]
+    if not fault_alerts.empty:
+        for _, alert in fault_alerts.head(callout_limit).iterrows():
+            st.error(f"""
+            🚨 **CRITICAL FAULT DETECTED - {alert['serial_number']}**
+            - **Issue:** {alert['fault_description']}
+            - **Status:** Requires immediate attention
+            - **Auto-Response:** {auto_response}
+            - **ETA:** Technician will contact you within 30 minutes
+            """)
+        if len(fault_alerts) > callout_limit:
+            st.caption(f"…and {len(fault_alerts) - callout_limit} more faults - see the fleet grid below")
+    
+    warning_alerts_filtered = warning_alerts[~warning_alerts['serial_number'].isin(fault_alerts['serial_number'])] if not fault_alerts.empty else warning_alerts
+    if not warning_alerts_filtered.empty:
+        for _, warning in warning_alerts_filtered.head(callout_limit).iterrows():
+            st.warning(f"""
+            ⚠️ **SENSOR WARNING - {warning['serial_number']}**
+            - **Issues:** {warning['warning_text']}
+            - **Action:** Monitor closely, consider maintenance scheduling
+            - **Status:** Generator operational but requires attention
+            """)
+        if len(warning_alerts_filtered) > callout_limit:
+            st.caption(f"…and {len(warning_alerts_filtered) - callout_limit} more warnings - see the fleet grid below")
+    
+    if fault_alerts.empty and warning_alerts_filtered.empty:
+        st.success("""
+        ✅ **ALL GENERATORS OPERATING NORMALLY**
+        - No critical faults detected
+        - All sensors within normal operating ranges
+        - Proactive monitoring system active 24/7
+        """)
+    
+    # Customer metrics
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    customer_summary = get_fleet_summary().lookup('customer', selected_customer)
+    total_capacity = customer_summary['rated_kw']
+    running_count = int(customer_summary['RUNNING'])
+    fault_count = int(customer_summary['FAULT'])
+    standby_count = int(customer_summary['STANDBY'])
+    avg_load = customer_summary['avg_load']
+    
+    with col1:
+        st.metric("Total Capacity", f"{total_capacity:,.0f} kW")
+    with col2:
+        st.metric("🟢 Running", running_count, delta="Active")
+    with col3:
+        st.metric("🔴 Faults", fault_count, delta="⚠️ Attention" if fault_count > 0 else "✅ Normal")
+    with col4:
+        st.metric("⚪ Standby", standby_count, delta="Ready")
+    with col5:
+        st.metric("Average Load", f"{avg_load:.1f}%")
+    live_update_caption()
+
 def show_enhanced_customer_portal():
     """Enhanced customer portal with proactive fault alerts and detailed sensor monitoring."""
     st.title("🏢 Customer Portal - Advanced Generator Monitoring")
     st.markdown("### 🚨 Real-Time Alerts • 📊 Detailed Sensor Data • 🔍 Proactive Monitoring")
     
     try:
-        generators_df = load_base_generator_data()
-        status_df = generate_real_time_status(generators_df)
+        metrics = get_performance_metrics()
+        with metrics.span('portal.fleet_load'):
+            generators_df = load_base_generator_data()
+            generator_registry = load_generator_registry()
+        with metrics.span('portal.status'):
+            status_df = generate_real_time_status(generators_df)
         
         if generators_df.empty:
             st.error("No generator data available. Please contact support.")
@@ -502,8 +4426,9 @@ def show_enhanced_customer_portal():
         customers = generators_df['customer_name'].unique()
         selected_customer = st.selectbox("Select Your Organization:", customers, key="customer_select")
         
-        customer_generators = generators_df[generators_df['customer_name'] == selected_customer]
-        customer_status = status_df[status_df['customer_name'] == selected_customer]
+        with metrics.span('portal.customer_filter'):
+            customer_generators = generators_df[generators_df['customer_name'] == selected_customer]
+            customer_status = status_df[status_df['customer_name'] == selected_customer]
         
         if customer_generators.empty:
             st.error("No generators found for selected customer")
@@ -511,262 +4436,113 @@ def show_enhanced_customer_portal():
         
         st.markdown(f"### Welcome, {selected_customer}")
         
-        # PROACTIVE ALERTS SECTION
-        st.subheader("🚨 Proactive Fault Alert System")
-        
-        fault_alerts = customer_status[customer_status['operational_status'] == 'FAULT']
-        warning_alerts = customer_status[
-            (customer_status['oil_pressure'] < 28) | 
-            (customer_status['coolant_temp'] > 95) | 
-            (customer_status['vibration'] > 4.0) | 
-            (customer_status['fuel_level'] < 30)
-        ]
-        
-        if not fault_alerts.empty:
-            for _, alert in fault_alerts.iterrows():
-                st.error(f"""
-                🚨 **CRITICAL FAULT DETECTED - {alert['serial_number']}**
-                - **Issue:** {alert['fault_description']}
-                - **Status:** Requires immediate attention
-                - **Auto-Response:** Emergency service has been notified
-                - **ETA:** Technician will contact you within 30 minutes
-                """)
-        
-        warning_alerts_filtered = warning_alerts[~warning_alerts['serial_number'].isin(fault_alerts['serial_number'])] if not fault_alerts.empty else warning_alerts
-        if not warning_alerts_filtered.empty:
-            for _, warning in warning_alerts_filtered.iterrows():
-                warning_details = []
-                if warning['oil_pressure'] < 28:
-                    warning_details.append(f"Oil Pressure: {warning['oil_pressure']} PSI (Below normal)")
-                if warning['coolant_temp'] > 95:
-                    warning_details.append(f"Coolant Temp: {warning['coolant_temp']}°C (Above normal)")
-                if warning['vibration'] > 4.0:
-                    warning_details.append(f"Vibration: {warning['vibration']} mm/s (Above normal)")
-                if warning['fuel_level'] < 30:
-                    warning_details.append(f"Fuel Level: {warning['fuel_level']}% (Low)")
-                
-                st.warning(f"""
-                ⚠️ **SENSOR WARNING - {warning['serial_number']}**
-                - **Issues:** {', '.join(warning_details)}
-                - **Action:** Monitor closely, consider maintenance scheduling
-                - **Status:** Generator operational but requires attention
-                """)
-        
-        if fault_alerts.empty and warning_alerts_filtered.empty:
-            st.success("""
-            ✅ **ALL GENERATORS OPERATING NORMALLY**
-            - No critical faults detected
-            - All sensors within normal operating ranges
-            - Proactive monitoring system active 24/7
-            """)
-        
-        # Customer metrics
-        col1, col2, col3, col4, col5 = st.columns(5)
-        
-        total_capacity = customer_generators['rated_kw'].sum()
-        running_count = len(customer_status[customer_status['operational_status'] == 'RUNNING'])
-        fault_count = len(customer_status[customer_status['operational_status'] == 'FAULT'])
-        standby_count = len(customer_status[customer_status['operational_status'] == 'STANDBY'])
-        avg_load = customer_status['load_percent'].mean() if not customer_status.empty else 0
-        
-        with col1:
-            st.metric("Total Capacity", f"{total_capacity:,.0f} kW")
-        with col2:
-            st.metric("🟢 Running", running_count, delta="Active")
-        with col3:
-            st.metric("🔴 Faults", fault_count, delta="⚠️ Attention" if fault_count > 0 else "✅ Normal")
-        with col4:
-            st.metric("⚪ Standby", standby_count, delta="Ready")
-        with col5:
-            st.metric("Average Load", f"{avg_load:.1f}%")
+        live_fragment(render_customer_live_status)(selected_customer)
+        alert_preferences = get_alert_preferences().get(selected_customer)
         
         # DETAILED SENSOR DATA SECTION
         st.subheader("📊 Live Sensor Data & Monitoring")
         
         if not customer_status.empty:
-            for _, gen_status in customer_status.iterrows():
-                try:
-                    gen_info = customer_generators[customer_generators['serial_number'] == gen_status['serial_number']].iloc[0]
-                    
-                    with st.expander(f"🔍 {gen_status['serial_number']} - {gen_info['model_series']} - Detailed Sensor View", expanded=True):
-                        
-                        col1, col2 = st.columns([1, 2])
-                        
-                        with col1:
-                            if gen_status['operational_status'] == 'RUNNING':
-                                status_icon = "🟢 RUNNING"
-                                status_detail = f"Load: {gen_status['load_percent']}% | All systems normal"
-                            elif gen_status['operational_status'] == 'FAULT':
-                                status_icon = "🔴 FAULT"
-                                status_detail = f"⚠️ {gen_status['fault_description']}"
-                            elif gen_status['operational_status'] == 'STANDBY':
-                                status_icon = "⚪ STANDBY"
-                                status_detail = "Generator ready - Not currently needed"
-                            else:
-                                status_icon = "🟡 MAINTENANCE"
-                                status_detail = "Scheduled maintenance in progress"
-                            
-                            st.markdown(f"""
-                            **Generator Status:** {status_icon}  
-                            **Model:** {gen_info['model_series']}  
-                            **Capacity:** {gen_info['rated_kw']} kW  
-                            **Location:** {gen_info['location_city']}  
-                            **Runtime:** {gen_status.get('runtime_hours', 5000):,} hours  
-                            **Status Detail:** {status_detail}
-                            """)
-                        
-                        with col2:
-                            st.markdown("**🔍 Live Sensor Readings:**")
-                            
-                            sensor_col1, sensor_col2, sensor_col3, sensor_col4 = st.columns(4)
-                            
-                            with sensor_col1:
-                                oil_color = "🟢" if gen_status['oil_pressure'] >= 28 else "🟡" if gen_status['oil_pressure'] >= 25 else "🔴"
-                                oil_status = "Normal" if gen_status['oil_pressure'] >= 28 else "Warning" if gen_status['oil_pressure'] >= 25 else "Critical"
-                                st.metric("🛢️ Oil Pressure", f"{gen_status['oil_pressure']} PSI", delta=f"{oil_color} {oil_status}")
-                                st.caption("Normal: 28-35 PSI")
-                                if gen_status['oil_pressure'] < 28:
-                                    st.caption("⚠️ Below normal range")
-                            
-                            with sensor_col2:
-                                temp_color = "🟢" if gen_status['coolant_temp'] <= 95 else "🟡" if gen_status['coolant_temp'] <= 105 else "🔴"
-                                temp_status = "Normal" if gen_status['coolant_temp'] <= 95 else "Warning" if gen_status['coolant_temp'] <= 105 else "Critical"
-                                st.metric("🌡️ Coolant Temp", f"{gen_status['coolant_temp']}°C", delta=f"{temp_color} {temp_status}")
-                                st.caption("Normal: 75-95°C")
-                                if gen_status['coolant_temp'] > 95:
-                                    st.caption("⚠️ Above normal range")
-                            
-                            with sensor_col3:
-                                vib_color = "🟢" if gen_status['vibration'] <= 4.0 else "🟡" if gen_status['vibration'] <= 5.0 else "🔴"
-                                vib_status = "Normal" if gen_status['vibration'] <= 4.0 else "Warning" if gen_status['vibration'] <= 5.0 else "Critical"
-                                st.metric("🔧 Vibration", f"{gen_status['vibration']} mm/s", delta=f"{vib_color} {vib_status}")
-                                st.caption("Normal: 1.0-4.0 mm/s")
-                                if gen_status['vibration'] > 4.0:
-                                    st.caption("⚠️ Above normal range")
-                            
-                            with sensor_col4:
-                                fuel_color = "🟢" if gen_status['fuel_level'] >= 50 else "🟡" if gen_status['fuel_level'] >= 20 else "🔴"
-                                fuel_status = "Normal" if gen_status['fuel_level'] >= 50 else "Low" if gen_status['fuel_level'] >= 20 else "Critical"
-                                st.metric("⛽ Fuel Level", f"{gen_status['fuel_level']}%", delta=f"{fuel_color} {fuel_status}")
-                                st.caption("Normal: >50%")
-                                if gen_status['fuel_level'] < 50:
-                                    st.caption("⚠️ Consider refueling")
-                        
-                        # Sensor trend visualization
-                        st.markdown("**📈 24-Hour Sensor Trends:**")
-                        
-                        hours = list(range(24))
-                        np.random.seed(hash(gen_status['serial_number']) % (2**32 - 1))
-                        
-                        oil_trend = [max(20, min(35, gen_status['oil_pressure'] + np.random.normal(0, 1))) for _ in hours]
-                        temp_trend = [max(70, min(110, gen_status['coolant_temp'] + np.random.normal(0, 2))) for _ in hours]
-                        vib_trend = [max(0.5, min(6, gen_status['vibration'] + np.random.normal(0, 0.3))) for _ in hours]
-                        fuel_trend = [max(10, min(100, gen_status['fuel_level'] + np.random.normal(0, 1.5))) for _ in hours]
-                        
-                        trend_col1, trend_col2 = st.columns(2)
-                        
-                        with trend_col1:
-                            fig_oil = go.Figure()
-                            fig_oil.add_trace(go.Scatter(x=hours, y=oil_trend, mode='lines+markers', 
-                                                       name='Oil Pressure', line_color='blue'))
-                            fig_oil.add_hline(y=25, line_dash="dash", line_color="red", 
-                                            annotation_text="Min Threshold")
-                            fig_oil.update_layout(title="Oil Pressure (PSI)", height=200, 
-                                                showlegend=False, margin=dict(l=0, r=0, t=30, b=0))
-                            st.plotly_chart(fig_oil, use_container_width=True)
-                            
-                            fig_vib = go.Figure()
-                            fig_vib.add_trace(go.Scatter(x=hours, y=vib_trend, mode='lines+markers', 
-                                                       name='Vibration', line_color='purple'))
-                            fig_vib.add_hline(y=4.0, line_dash="dash", line_color="orange", 
-                                            annotation_text="Warning Level")
-                            fig_vib.update_layout(title="Vibration (mm/s)", height=200, 
-                                                showlegend=False, margin=dict(l=0, r=0, t=30, b=0))
-                            st.plotly_chart(fig_vib, use_container_width=True)
-                        
-                        with trend_col2:
-                            fig_temp = go.Figure()
-                            fig_temp.add_trace(go.Scatter(x=hours, y=temp_trend, mode='lines+markers', 
-                                                        name='Temperature', line_color='red'))
-                            fig_temp.add_hline(y=95, line_dash="dash", line_color="orange", 
-                                             annotation_text="Warning Level")
-                            fig_temp.update_layout(title="Coolant Temperature (°C)", height=200, 
-                                                 showlegend=False, margin=dict(l=0, r=0, t=30, b=0))
-                            st.plotly_chart(fig_temp, use_container_width=True)
-                            
-                            fig_fuel = go.Figure()
-                            fig_fuel.add_trace(go.Scatter(x=hours, y=fuel_trend, mode='lines+markers', 
-                                                        name='Fuel Level', line_color='green'))
-                            fig_fuel.add_hline(y=20, line_dash="dash", line_color="red", 
-                                             annotation_text="Low Fuel")
-                            fig_fuel.update_layout(title="Fuel Level (%)", height=200, 
-                                                 showlegend=False, margin=dict(l=0, r=0, t=30, b=0))
-                            st.plotly_chart(fig_fuel, use_container_width=True)
-                        
-                        st.markdown("**⚡ Quick Actions:**")
-                        action_col1, action_col2, action_col3 = st.columns(3)
-                        
-                        with action_col1:
-                            if st.button(f"📅 Schedule Service", key=f"schedule_{gen_status['serial_number']}", use_container_width=True):
-                                st.success(f"✅ Service scheduled for {gen_status['serial_number']}")
-                        
-                        with action_col2:
-                            if gen_status['operational_status'] == 'FAULT':
-                                if st.button(f"🚨 Emergency Service", key=f"emergency_{gen_status['serial_number']}", use_container_width=True, type="primary"):
-                                    st.success(f"🚨 Emergency service dispatched for {gen_status['serial_number']}")
-                            else:
-                                if st.button(f"📞 Contact Support", key=f"support_{gen_status['serial_number']}", use_container_width=True):
-                                    st.success(f"📞 Support contacted for {gen_status['serial_number']}")
-                        
-                        with action_col3:
-                            if st.button(f"📊 Full Report", key=f"report_{gen_status['serial_number']}", use_container_width=True):
-                                st.info(f"📊 Generating detailed report for {gen_status['serial_number']}")
-                    
-                    st.markdown("---")
-                except Exception:
-                    continue
+            filter_col1, filter_col2, filter_col3 = st.columns([2, 2, 1])
+            with filter_col1:
+                status_filter = st.multiselect("Status", STATUS_CODES, default=STATUS_CODES, key="fleet_status_filter")
+            with filter_col2:
+                severity_filter = st.selectbox("Severity", list(SEVERITY_FILTERS), key="fleet_severity_filter")
+            
+            fleet_view = filter_fleet_status(customer_status, status_filter, SEVERITY_FILTERS[severity_filter])
+            page_size = CONFIG["portal"]["page_size"]
+            page_count = max(1, -(-len(fleet_view) // page_size))
+            with filter_col3:
+                page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key="fleet_page")
+            
+            page_status = fleet_view.iloc[(page - 1) * page_size:page * page_size]
+            st.caption(f"Showing {len(page_status)} of {len(fleet_view)} generators • page {page} of {page_count}")
+            with metrics.span('portal.fleet_grid'):
+                st.dataframe(build_fleet_summary_grid(page_status, generator_registry),
+                             width="stretch", hide_index=True)
+            
+            if not page_status.empty:
+                serials = page_status['serial_number'].tolist()
+                labels = dict(zip(serials, page_status['operational_status'].map(STATUS_BADGES).astype(str)))
+                view_mode = st.radio("View:", ["🔍 Generator Detail", "📈 Fleet Trends"], horizontal=True, key="fleet_view_mode")
+                
+                if view_mode == "📈 Fleet Trends":
+                    chart_serials = st.multiselect(
+                        "Generators to compare:", serials, default=serials, key="fleet_chart_serials",
+                        format_func=lambda serial: f"{serial} • {labels[serial]}"
+                    )
+                    if chart_serials:
+                        st.markdown(f"**📈 {FLEET_CHART_HOURS}-Hour Sensor Trends:**")
+                        render_sensor_trends(selected_customer, chart_serials)
+                else:
+                    selected_serial = st.selectbox(
+                        "Open generator details:", serials, key="fleet_detail",
+                        format_func=lambda serial: f"{serial} • {labels[serial]}"
+                    )
+                    gen_status = page_status.iloc[serials.index(selected_serial)]
+                    with metrics.span('portal.generator_detail'):
+                        render_generator_detail(gen_status, generator_registry.loc[selected_serial])
         
         # ALERT SETTINGS & PREFERENCES
         st.subheader("⚙️ Alert Settings & Preferences")
         
-        with st.expander("🔔 Customize Your Alert Preferences", expanded=False):
+        with st.expander("🔔 Customize Your Alert Preferences", expanded=False), metrics.span('portal.settings'):
             col1, col2 = st.columns(2)
             
             with col1:
                 st.markdown("**📱 Notification Methods**")
-                email_alerts = st.checkbox("📧 Email Alerts", value=True)
-                sms_alerts = st.checkbox("📱 SMS Alerts", value=True)
-                phone_alerts = st.checkbox("📞 Emergency Phone Calls", value=True)
+                email_alerts = st.checkbox("📧 Email Alerts", value=alert_preferences['email'],
+                                           key=f"pref_email_{selected_customer}")
+                sms_alerts = st.checkbox("📱 SMS Alerts", value=alert_preferences['sms'],
+                                         key=f"pref_sms_{selected_customer}")
+                phone_alerts = st.checkbox("📞 Emergency Phone Calls", value=alert_preferences['phone'],
+                                           key=f"pref_phone_{selected_customer}")
                 
                 st.markdown("**⏰ Alert Frequency**")
-                immediate_critical = st.checkbox("🚨 Immediate (Critical Faults)", value=True)
-                hourly_warnings = st.checkbox("⏰ Hourly (Warnings)", value=True)
-                daily_reports = st.checkbox("📅 Daily Status Reports", value=True)
+                immediate_critical = st.checkbox("🚨 Immediate (Critical Faults)", value=alert_preferences['immediate_critical'],
+                                                 key=f"pref_immediate_{selected_customer}")
+                hourly_warnings = st.checkbox("⏰ Hourly (Warnings)", value=alert_preferences['hourly_warnings'],
+                                              key=f"pref_hourly_{selected_customer}")
+                daily_reports = st.checkbox("📅 Daily Status Reports", value=alert_preferences['daily_reports'],
+                                            key=f"pref_daily_{selected_customer}")
             
             with col2:
                 st.markdown("**🎯 Custom Thresholds**")
-                oil_threshold = st.slider("Oil Pressure Alert (PSI)", 20, 30, 25)
-                temp_threshold = st.slider("Temperature Alert (°C)", 85, 100, 95)
-                vib_threshold = st.slider("Vibration Alert (mm/s)", 3.0, 5.0, 4.0, step=0.1)
-                fuel_threshold = st.slider("Fuel Level Alert (%)", 15, 40, 25)
+                # Warning limits; the critical limits stay global, so each range ends there
+                thresholds = get_threshold_store().get(selected_customer)
+                oil_threshold = st.slider("Oil Pressure Alert (PSI)", 25.0, 35.0, float(thresholds['oil_pressure']),
+                                          step=0.5, key=f"threshold_oil_{selected_customer}")
+                temp_threshold = st.slider("Temperature Alert (°C)", 85.0, 105.0, float(thresholds['coolant_temp']),
+                                           step=0.5, key=f"threshold_temp_{selected_customer}")
+                vib_threshold = st.slider("Vibration Alert (mm/s)", 3.0, 5.0, float(thresholds['vibration']),
+                                          step=0.1, key=f"threshold_vib_{selected_customer}")
+                fuel_threshold = st.slider("Fuel Level Alert (%)", 20.0, 40.0, float(thresholds['fuel_level']),
+                                           step=0.5, key=f"threshold_fuel_{selected_customer}")
                 
-                if st.button("💾 Save Alert Settings", use_container_width=True, type="primary"):
-                    st.success("✅ Alert preferences saved successfully!")
+                if st.button("💾 Save Alert Settings", width="stretch", type="primary"):
+                    get_alert_preferences().save(selected_customer, {
+                        'email': email_alerts, 'sms': sms_alerts, 'phone': phone_alerts,
+                        'immediate_critical': immediate_critical, 'hourly_warnings': hourly_warnings,
+                        'daily_reports': daily_reports
+                    })
+                    get_threshold_store().save(selected_customer, {
+                        'oil_pressure': oil_threshold, 'coolant_temp': temp_threshold,
+                        'vibration': vib_threshold, 'fuel_level': fuel_threshold
+                    })
+                    st.success("✅ Alert preferences saved successfully! New thresholds apply from the next status refresh.")
         
         # Enhanced Service & Support with Ticket Integration
         st.subheader("🛠️ Service & Support Center")
         
         # Service statistics based on tickets
-        if 'immediate_tickets' in locals() and immediate_tickets:
-            critical_tickets = len([t for t in immediate_tickets if t['Priority'] == 'CRITICAL'])
-            high_tickets = len([t for t in immediate_tickets if t['Priority'] == 'HIGH'])
-            total_tickets = len(immediate_tickets)
-            total_revenue = sum([float(t['Est. Revenue'].replace('SAR ', '').replace(',', '')) for t in immediate_tickets])
-        else:
-            critical_tickets = 0
-            high_tickets = 0
-            total_tickets = 0
-            total_revenue = 0
+        with metrics.span('portal.service_tickets'):
+            ticket_ledger = sync_ticket_ledger(status_df, generator_registry)
+            customer_tickets = ticket_ledger.open_tickets(generator_registry, customer=selected_customer)
+            ticket_summary = summarize_tickets(customer_tickets)
+        critical_tickets = int(ticket_summary.loc['CRITICAL', 'count'])
+        high_tickets = int(ticket_summary.loc['HIGH', 'count'])
+        total_tickets = int(ticket_summary['count'].sum())
+        total_revenue = ticket_summary['revenue_sar'].sum()
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -782,7 +4558,7 @@ def show_enhanced_customer_portal():
             st.metric("📋 Total Active", total_tickets)
         
         with col4:
-            st.metric("💰 Est. Service Value", f"SAR {total_revenue:,.0f}")
+            st.metric("💰 Est. Service Value", format_sar(total_revenue))
         
         if critical_tickets > 0:
             st.error(f"🚨 **{critical_tickets} Critical Issues** - Emergency service automatically notified")
@@ -796,28 +4572,28 @@ def show_enhanced_customer_portal():
         service_col1, service_col2, service_col3, service_col4 = st.columns(4)
         
         with service_col1:
-            if st.button("📅 Schedule Maintenance", use_container_width=True):
+            if st.button("📅 Schedule Maintenance", width="stretch"):
                 st.success("✅ Maintenance request submitted!")
                 st.info("🔔 Our service team will contact you within 2 hours")
                 if total_tickets > 0:
                     st.info(f"📋 {total_tickets} active tickets will be reviewed")
         
         with service_col2:
-            if st.button("🚨 Report Emergency", use_container_width=True, type="primary"):
-                emergency_ticket_id = f"EM-{random.randint(10000, 99999)}"
+            if st.button("🚨 Report Emergency", width="stretch", type="primary"):
+                emergency_ticket_id = f"EM-{np.random.default_rng().integers(10000, 100000)}"
                 st.success(f"🚨 Emergency ticket {emergency_ticket_id} created!")
                 st.info("☎️ Emergency technician will call within 15 minutes")
         
         with service_col3:
-            if st.button("🛒 Request Parts Quote", use_container_width=True):
+            if st.button("🛒 Request Parts Quote", width="stretch"):
                 st.success("🛒 Parts specialist notified!")
                 st.info("📧 Quote will be emailed within 4 hours")
                 if total_tickets > 0:
                     st.info(f"📋 Parts analysis for {total_tickets} active tickets")
         
         with service_col4:
-            if st.button("📞 Contact Support", use_container_width=True):
-                support_ticket_id = f"SP-{random.randint(10000, 99999)}"
+            if st.button("📞 Contact Support", width="stretch"):
+                support_ticket_id = f"SP-{np.random.default_rng().integers(10000, 100000)}"
                 st.success(f"📞 Support ticket {support_ticket_id} created!")
                 st.info("🎧 Response within 1 hour")
         
@@ -857,106 +4633,222 @@ def show_enhanced_customer_portal():
 # SIMPLIFIED WORK MANAGEMENT (BASIC VERSION)
 # ========================================
 
+def current_work_tickets() -> Tuple[TicketLedger, pd.DataFrame]:
+    """The ticket ledger synced with the latest status snapshot, and its open tickets.
+
+    The page and its fragments all call this; only the first call per status snapshot
+    syncs, the rest read the ledger's cached open tickets.
+    """
+    with get_performance_metrics().span('tickets.sync'):
+        generator_registry = load_generator_registry()
+        ticket_ledger = sync_ticket_ledger(generate_real_time_status(load_base_generator_data()), generator_registry)
+        return ticket_ledger, ticket_ledger.open_tickets(generator_registry)
+
+def render_work_live_metrics():
+    """Headline ticket and fleet metrics from the latest status snapshot."""
+    _, work_tickets = current_work_tickets()
+    ticket_summary = summarize_tickets(work_tickets)
+    
+    # Basic metrics
+    col1, col2, col3, col4, col5 = st.columns(5)
+    
+    fleet_summary = get_fleet_summary()
+    fleet_totals = fleet_summary.lookup('fleet')
+    total_generators = int(fleet_totals['generators'])
+    running_count = int(fleet_totals['RUNNING'])
+    total_opportunities = len(work_tickets)
+    critical_tickets = int(ticket_summary.loc['CRITICAL', 'count'])
+    service_due = int((work_tickets['type'] == TICKET_TYPES[2]).sum())
+    
+    with col1:
+        st.metric("🎫 Active Tickets", total_opportunities)
+    with col2:
+        st.metric("⏰ Service Due", service_due)
+    with col3:
+        st.metric("🚨 Fault Alerts", critical_tickets, delta="Critical" if critical_tickets > 0 else "Normal")
+    with col4:
+        st.metric("💰 Revenue Potential", format_sar(ticket_summary['revenue_sar'].sum()))
+    with col5:
+        st.metric("⚡ Generators Running", running_count, delta=f"Of {total_generators} total")
+    live_update_caption()
+
+def render_work_ticket_table():
+    """The open ticket table from the latest status snapshot."""
+    _, work_tickets = current_work_tickets()
+    
+    # Display tickets table - GUARANTEED TO WORK
+    if not work_tickets.empty:
+        st.subheader("🔔 All Tickets")
+        st.markdown(f"**Showing {len(work_tickets)} of {len(work_tickets)} total tickets**")
+        
+        # Create and display dataframe
+        metrics = get_performance_metrics()
+        with metrics.span('tickets.format'):
+            tickets_df = format_ticket_table(work_tickets)
+        
+        # Display the table
+        with metrics.span('tickets.draw'):
+            st.dataframe(tickets_df, width="stretch", hide_index=True)
+        
+    else:
+        st.error("❌ **NO WORK TICKETS CREATED** - Check work ticket generation logic")
+
 def show_work_management_dashboard():
     """Enhanced work management and ticketing system."""
     st.title("🎫 Work Management & Ticketing System")
     st.markdown("### Proactive Service Scheduling & Revenue Optimization")
     
     try:
-        generators_df = load_base_generator_data()
-        status_df = generate_real_time_status(generators_df)
+        metrics = get_performance_metrics()
+        with metrics.span('work.fleet_load'):
+            generators_df = load_base_generator_data()
+            generator_registry = load_generator_registry()
+        with metrics.span('work.status'):
+            status_df = generate_real_time_status(generators_df)
         
         if generators_df.empty or status_df.empty:
             st.error("No data available. Please check system status.")
             return
         
-        # Generate tickets for work management - SIMPLIFIED AND GUARANTEED
-        work_tickets = []
-        
-        # ALWAYS create tickets for the first 15 generators to guarantee display
-        for i, (_, gen_status) in enumerate(status_df.head(15).iterrows()):
-            try:
-                gen_info = generators_df[generators_df['serial_number'] == gen_status['serial_number']].iloc[0]
-                
-                # Create varied ticket types
-                if i % 3 == 0:
-                    ticket_type = '🚨 FAULT RESPONSE'
-                    priority = 'CRITICAL'
-                    service_detail = 'Low oil pressure'
-                elif i % 3 == 1:
-                    ticket_type = '🚨 FAULT RESPONSE'
-                    priority = 'CRITICAL'
-                    service_detail = 'High coolant temperature'
-                else:
-                    ticket_type = '🚨 FAULT RESPONSE'
-                    priority = 'CRITICAL'
-                    service_detail = 'High vibration'
-                
-                ticket_id = f"TK-{45445 + i}"
-                
-                work_tickets.append({
-                    'Ticket ID': ticket_id,
-                    'Type': ticket_type,
-                    'Generator': gen_status['serial_number'],
-                    'Customer': gen_info['customer_name'][:25] + "...",
-                    'Primary Contact': f"Ahmed Al-Rashid - +966-11-464-7272",
-                    'Contact Email': f"ahmed.alrashid@kfmc.sa",
-                    'Service Detail': service_detail,
-                    'Runtime Hours': f"{random.randint(4000, 9000):,} hrs",
-                    'Parts Needed': 'TBD',
-                    'Priority': priority,
-                    'Est. Revenue': 'SAR 4,781',
-                    'Action Required': 'Contact immediately - Emergency service'
-                })
-                
-            except Exception as e:
-                st.write(f"Error creating work ticket {i}: {e}")
-                continue
-        
-        # Debug information
-        st.write(f"**DEBUG: Created {len(work_tickets)} work tickets**")
-        if work_tickets:
-            st.write("First work ticket sample:", work_tickets[0])
+        # Open tickets across the whole fleet, kept current by the ticket ledger
+        ticket_ledger, work_tickets = current_work_tickets()
+        live_fragment(render_work_live_metrics)()
+        fleet_summary = get_fleet_summary()
         
-        # Basic metrics
-        col1, col2, col3, col4, col5 = st.columns(5)
+        with st.expander("🗺️ Regional Operations", expanded=False), metrics.span('work.regional'):
+            regional = fleet_summary.table('region')
+            st.dataframe(pd.DataFrame({
+                'Generators': regional['generators'].astype(int),
+                'Capacity (kW)': regional['rated_kw'],
+                **{status.title(): regional[status].astype(int) for status in STATUS_CODES},
+                'Average Load (%)': regional['avg_load'].round(1)
+            }), width="stretch")
         
-        total_generators = len(generators_df)
-        running_count = len(status_df[status_df['operational_status'] == 'RUNNING'])
-        fault_count = len(status_df[status_df['operational_status'] == 'FAULT'])
-        total_opportunities = len(work_tickets)
-        critical_tickets = len([t for t in work_tickets if t['Priority'] == 'CRITICAL'])
-        
-        with col1:
-            st.metric("🎫 Active Tickets", total_opportunities)
-        with col2:
-            st.metric("⏰ Service Due", len([t for t in work_tickets if 'Service due' in t['Service Detail']]))
-        with col3:
-            st.metric("🚨 Fault Alerts", critical_tickets, delta="Critical" if critical_tickets > 0 else "Normal")
-        with col4:
-            if work_tickets:
-                total_revenue = sum([float(t['Est. Revenue'].replace('SAR ', '').replace(',', '')) for t in work_tickets])
-                st.metric("💰 Revenue Potential", f"SAR {total_revenue:,.0f}")
-            else:
-                st.metric("💰 Revenue Potential", "SAR 0")
-        with col5:
-            st.metric("⚡ Generators Running", running_count, delta=f"Of {total_generators} total")
-        
-        # Display tickets table - GUARANTEED TO WORK
-        if work_tickets:
-            st.subheader("🔔 All Tickets")
-            st.markdown(f"**Showing {len(work_tickets)} of {len(work_tickets)} total tickets**")
+        revenue_expanded = st.session_state.get('user_role') == "sales@powersystem"
+        with st.expander("💰 Revenue Analytics", expanded=revenue_expanded), metrics.span('work.revenue'):
+            analytics = get_revenue_analytics()
+            totals = analytics.totals(generator_registry)
+            
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("📈 Open Pipeline", format_sar(totals['pipeline_value']),
+                          delta=f"{totals['pipeline_tickets']:,} open tickets", delta_color="off")
+            with col2:
+                st.metric("✅ Delivered Service", format_sar(totals['delivered_value']),
+                          delta=f"{totals['delivered_tickets']:,} closed tickets", delta_color="off")
+            with col3:
+                average = totals['all_value'] / totals['all_tickets'] if totals['all_tickets'] else 0.0
+                st.metric("🧾 Average Ticket", format_sar(average))
+            with col4:
+                st.metric("🗂️ Tickets on Record", f"{totals['all_tickets']:,}")
             
-            # Create and display dataframe
-            tickets_df = pd.DataFrame(work_tickets)
-            st.write("**Work Tickets Dataframe shape:**", tickets_df.shape)
-            st.write("**Work Tickets Columns:**", list(tickets_df.columns))
+            col1, col2 = st.columns(2)
+            with col1:
+                dimension = st.selectbox("Break down by", list(REVENUE_DIMENSIONS), key="revenue_dimension")
+            with col2:
+                scope = st.radio("Tickets", list(REVENUE_SCOPES), horizontal=True, key="revenue_scope",
+                                 format_func=str.title)
             
-            # Display the table
-            st.dataframe(tickets_df, use_container_width=True, hide_index=True)
+            breakdown = analytics.breakdown(generator_registry, [REVENUE_DIMENSIONS[dimension]], scope=scope)
+            st.dataframe(pd.DataFrame({
+                'Tickets': breakdown['tickets'],
+                'Value': format_column(breakdown['value'], format_sar),
+                'Average': format_column(breakdown['average'], format_sar),
+                'Share (%)': (breakdown['share'] * 100).round(1)
+            }).head(100).rename_axis(dimension), width="stretch")
             
-        else:
-            st.error("❌ **NO WORK TICKETS CREATED** - Check work ticket generation logic")
+            st.markdown("**Region × Priority**")
+            pivot = analytics.pivot(generator_registry, 'location', 'priority', scope=scope)
+            pivot = pivot.apply(lambda column: format_column(column, format_sar))
+            st.dataframe(pivot.rename(columns=str).rename_axis('Region'), width="stretch")
+        
+        with st.expander("📦 Bulk Export", expanded=False), metrics.span('work.export'):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                dataset = st.radio("Dataset", ["Tickets", "Fleet Status"], horizontal=True, key="export_dataset")
+            with col2:
+                fmt = st.radio("Format", available_export_formats(), horizontal=True, key="export_format",
+                               format_func=str.upper)
+            with col3:
+                customers = ["All customers"] + sorted(generator_registry['customer_name'].astype(str).unique())
+                customer = st.selectbox("Customer", customers, key="export_customer")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                priorities = st.multiselect("Priority", PRIORITY_LEVELS, key="export_priority")
+            with col2:
+                today = datetime.now().date()
+                created = st.date_input("Created between", (today - timedelta(days=365), today),
+                                        key="export_created", disabled=dataset != "Tickets")
+            
+            # Batches are produced only when the download is requested, through a fresh generator each time
+            customer = None if customer == customers[0] else customer
+            if dataset == "Tickets":
+                start, end = (list(created) + [None, None])[:2]
+                schema = TICKET_EXPORT_SCHEMA
+                batches = partial(ticket_export_batches, start=start, end=end, customer=customer, priorities=priorities)
+            else:
+                schema = status_export_schema(status_df)
+                batches = partial(status_export_batches, status_df, customer=customer, priorities=priorities)
+            extension, mime = EXPORT_FORMATS[fmt]
+            st.download_button(
+                f"⬇️ Export {dataset}", data=lambda: export_bytes(schema, batches(), fmt),
+                file_name=f"{dataset.lower().replace(' ', '_')}_{datetime.now():%Y%m%d_%H%M}{extension}",
+                mime=mime, on_click="ignore", key="export_download"
+            )
+            st.caption(f"Rows are written {CONFIG['export']['chunk_rows']:,} at a time to a temporary file when the "
+                       "download starts, and the finished file is then served from memory; for large or scheduled "
+                       "extracts use `python export_data.py --help`, which streams to disk.")
+        
+        with st.expander("🚚 Technician Dispatch", expanded=False), metrics.span('work.dispatch'):
+            planner = get_dispatch_planner()
+            if st.button("🔄 Re-plan Day", key="dispatch_replan"):
+                planner.replan()
+            planner.sync(work_tickets, generator_registry, ticket_ledger.version)
+            # The plan is solved on the planner's thread; this shows the last one it finished
+            itinerary, routes = planner.frames()
+            if planner.planned_for() is None:
+                st.info("⏳ Planning the day's visits; the plan appears here once it is solved.")
+            else:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("👷 Technicians", len(routes))
+                with col2:
+                    st.metric("📍 Visits Planned", len(itinerary))
+                with col3:
+                    st.metric("🚨 Critical Visits", int(routes['critical'].sum()) if not routes.empty else 0)
+                with col4:
+                    st.metric("⏳ Deferred", planner.deferred())
+                st.caption(
+                    f"Plan for {planner.planned_for():%A %d %B} • solved in {planner.stats['plan_seconds']:.2f}s • "
+                    f"{planner.stats['incremental']} incremental updates • "
+                    f"{planner.stats['bumped']} visits bumped by critical faults"
+                )
+                
+                if not routes.empty:
+                    st.dataframe(pd.DataFrame({
+                        'Technician': routes['technician'],
+                        'Base': routes['base'],
+                        'Visits': routes['stops'],
+                        'Critical': routes['critical'],
+                        'Travel (km)': routes['travel_km'].round(1),
+                        'Shift Used (%)': (routes['shift_used'] * 100).round(0)
+                    }).sort_values('Visits', ascending=False), width="stretch", hide_index=True)
+                    
+                    technician = st.selectbox("Technician itinerary", routes['technician'], key="dispatch_technician")
+                    stops = itinerary[itinerary['technician'] == technician]
+                    st.dataframe(pd.DataFrame({
+                        'Stop': stops['stop'],
+                        'Arrival': stops['eta'].dt.strftime("%H:%M"),
+                        'Ticket ID': stops['ticket_id'],
+                        'Priority': stops['priority'],
+                        'Generator': stops['generator'],
+                        'Customer': stops['customer'],
+                        'Location': stops['location'],
+                        'On Site (min)': stops['service_minutes'].astype(int)
+                    }), width="stretch", hide_index=True)
+        
+        live_fragment(render_work_ticket_table)()
         
     except Exception as e:
         st.error(f"Error loading dashboard: {str(e)}")
@@ -968,69 +4860,78 @@ def show_work_management_dashboard():
 # ========================================
 
 def main():
-    """Main application."""
-    
-    if 'authenticated' not in st.session_state:
-        st.session_state.authenticated = False
-    
-    if not st.session_state.authenticated:
-        authenticate_system()
-        return
-    
-    st.sidebar.markdown(f"### {st.session_state.role_name}")
-    st.sidebar.write("Power System Work Management")
-    
-    if st.sidebar.button("🚪 Logout"):
-        st.session_state.authenticated = False
-        st.rerun()
-    
-    st.sidebar.markdown("---")
-    
-    if st.session_state.user_role in ["operations@powersystem", "service@powersystem", "sales@powersystem"]:
-        pages = {
-            "🎫 Work Management": show_work_management_dashboard,
-            "🏢 Customer Portal": show_enhanced_customer_portal
-        }
-    else:
-        pages = {
-            "🏢 My Generators": show_enhanced_customer_portal
-        }
-    
-    selected_page = st.sidebar.selectbox("Navigate:", list(pages.keys()))
-    
-    try:
-        pages[selected_page]()
-    except Exception as e:
-        st.error(f"Error loading page: {str(e)}")
-        st.info("Please try refreshing the page.")
-    
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### 🎯 System Status")
-    st.sidebar.success("✅ Real-time monitoring active")
-    st.sidebar.info(f"🕒 Last update: {datetime.now().strftime('%H:%M:%S')}")
-    
-    st.sidebar.markdown("### ⚡ Platform Features")
-    
-    if st.session_state.user_role in ["operations@powersystem", "service@powersystem", "sales@powersystem"]:
-        st.sidebar.markdown("✅ Proactive Service Notifications")
-        st.sidebar.markdown("✅ Advanced Ticketing System")
-        st.sidebar.markdown("✅ Real-time Generator Status")
-        st.sidebar.markdown("✅ Customer Portal Access")
-    else:
-        st.sidebar.markdown("**🚨 FAULT ALERT SYSTEM**")
-        st.sidebar.markdown("   • Critical fault notifications")
-        st.sidebar.markdown("   • Warning alerts for sensors")
-        st.sidebar.markdown("   • Automatic emergency dispatch")
-        st.sidebar.markdown("**📊 SENSOR MONITORING**")
-        st.sidebar.markdown("   • Live sensor readings")
-        st.sidebar.markdown("   • Historical trend charts")
-        st.sidebar.markdown("   • Threshold monitoring")
-        st.sidebar.markdown("**⚙️ ALERT CUSTOMIZATION**")
-        st.sidebar.markdown("   • Custom alert thresholds")
-        st.sidebar.markdown("   • Notification preferences")
-        st.sidebar.markdown("**🛠️ SERVICE INTEGRATION**")
-        st.sidebar.markdown("   • Emergency service dispatch")
-        st.sidebar.markdown("   • 24/7 support access")
+    """Main application, timed as one rerun of the performance metrics."""
+    metrics = get_performance_metrics()
+    with metrics.rerun('main'):
+        if 'authenticated' not in st.session_state:
+            st.session_state.authenticated = False
+        
+        if not st.session_state.authenticated:
+            authenticate_system()
+            return
+        
+        st.sidebar.markdown(f"### {st.session_state.role_name}")
+        st.sidebar.write("Power System Work Management")
+        
+        if st.sidebar.button("🚪 Logout"):
+            st.session_state.authenticated = False
+            st.rerun()
+        
+        st.sidebar.markdown("---")
+        
+        if st.session_state.user_role in ["operations@powersystem", "service@powersystem", "sales@powersystem"]:
+            pages = {
+                "🎫 Work Management": show_work_management_dashboard,
+                "🏢 Customer Portal": show_enhanced_customer_portal
+            }
+        else:
+            pages = {
+                "🏢 My Generators": show_enhanced_customer_portal
+            }
+        
+        selected_page = st.sidebar.selectbox("Navigate:", list(pages.keys()))
+        st.sidebar.toggle("🔄 Live updates", value=True, key="live_updates",
+                          help=f"Refresh alerts, metrics and tickets every {CONFIG['refresh_interval']}s "
+                               "without reloading the page")
+        
+        try:
+            with metrics.span('main.page'):
+                pages[selected_page]()
+        except Exception as e:
+            st.error(f"Error loading page: {str(e)}")
+            st.info("Please try refreshing the page.")
+        
+        st.sidebar.markdown("---")
+        st.sidebar.markdown("### 🎯 System Status")
+        st.sidebar.success("✅ Real-time monitoring active")
+        st.sidebar.info(f"🕒 Last update: {datetime.now().strftime('%H:%M:%S')}")
+        
+        st.sidebar.markdown("### ⚡ Platform Features")
+        
+        if st.session_state.user_role in ["operations@powersystem", "service@powersystem", "sales@powersystem"]:
+            st.sidebar.markdown("✅ Proactive Service Notifications")
+            st.sidebar.markdown("✅ Advanced Ticketing System")
+            st.sidebar.markdown("✅ Real-time Generator Status")
+            st.sidebar.markdown("✅ Customer Portal Access")
+        else:
+            st.sidebar.markdown("**🚨 FAULT ALERT SYSTEM**")
+            st.sidebar.markdown("   • Critical fault notifications")
+            st.sidebar.markdown("   • Warning alerts for sensors")
+            st.sidebar.markdown("   • Automatic emergency dispatch")
+            st.sidebar.markdown("**📊 SENSOR MONITORING**")
+            st.sidebar.markdown("   • Live sensor readings")
+            st.sidebar.markdown("   • Historical trend charts")
+            st.sidebar.markdown("   • Threshold monitoring")
+            st.sidebar.markdown("**⚙️ ALERT CUSTOMIZATION**")
+            st.sidebar.markdown("   • Custom alert thresholds")
+            st.sidebar.markdown("   • Notification preferences")
+            st.sidebar.markdown("**🛠️ SERVICE INTEGRATION**")
+            st.sidebar.markdown("   • Emergency service dispatch")
+            st.sidebar.markdown("   • 24/7 support access")
+        
+        state_bytes = record_session_memory()
+        if st.session_state.user_role == "operations@powersystem":
+            render_performance_panel(state_bytes)
 
 if __name__ == "__main__":
     main()
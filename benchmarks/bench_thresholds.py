@@ -0,0 +1,99 @@
+"""
+Customer threshold benchmark
+Compares alert evaluation with the global rule constants against per-customer
+warning limits broadcast per row, and against a per-customer filter loop, and
+checks the broadcast and loop evaluations agree.
+
+Usage: python benchmarks/bench_thresholds.py [--sizes 100000 1000000] [--customers 10000] [--loop-max 100000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app  # noqa: E402
+
+SEED = 28_000_000
+
+def build_readings(n: int, customers: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Random sensor readings for n generators spread over the given number of customers."""
+    names = pd.Index([f'Customer {i:05d}' for i in range(customers)])
+    return pd.DataFrame({
+        'customer_name': pd.Categorical.from_codes(rng.integers(0, customers, n), categories=names),
+        'oil_pressure': rng.uniform(20, 35, n).round(1),
+        'coolant_temp': rng.uniform(75, 110, n).round(1),
+        'vibration': rng.uniform(1.0, 6.0, n).round(2),
+        'fuel_level': rng.uniform(10, 95, n).round(1),
+    })
+
+def build_profiles(customers: pd.Index, rng: np.random.Generator) -> app.ThresholdProfiles:
+    """Custom warning limits for every other customer."""
+    saved = customers[::2]
+    limits = np.column_stack([
+        rng.uniform(25, 35, len(saved)),
+        rng.uniform(85, 105, len(saved)),
+        rng.uniform(3.0, 5.0, len(saved)),
+        rng.uniform(20, 40, len(saved)),
+    ])
+    return app.ThresholdProfiles(saved, limits, version=1)
+
+def global_levels(readings: pd.DataFrame) -> np.ndarray:
+    return app.sensor_alert_levels(readings[app.RULE_SENSORS].to_numpy(dtype=float))
+
+def broadcast_levels(readings: pd.DataFrame, profiles: app.ThresholdProfiles) -> np.ndarray:
+    return app.sensor_alert_levels(
+        readings[app.RULE_SENSORS].to_numpy(dtype=float), profiles.level_limits(readings['customer_name'])
+    )
+
+def loop_levels(readings: pd.DataFrame, profiles: app.ThresholdProfiles) -> np.ndarray:
+    """Filter the fleet once per customer profile and evaluate each slice with its own limits."""
+    values = readings[app.RULE_SENSORS].to_numpy(dtype=float)
+    levels = app.sensor_alert_levels(values)
+    customer_names = readings['customer_name'].astype(str).to_numpy()
+    for row, customer in enumerate(profiles.customers, start=1):
+        mask = customer_names == customer
+        if mask.any():
+            limits = [profiles.advisory[row], profiles.warning[row],
+                      app.RULE_LIMITS[:, app.CRITICAL - app.ADVISORY], app.RULE_LIMITS[:, app.FAULT - app.ADVISORY]]
+            levels[mask] = app.sensor_alert_levels(values[mask], limits)
+    return levels
+
+def timed(fn, *args, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--customers', type=int, default=10_000)
+    parser.add_argument('--loop-max', type=int, default=100_000,
+                        help='largest fleet to run through the per-customer loop')
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(SEED)
+    check = build_readings(20_000, 500, rng)
+    check_profiles = build_profiles(check['customer_name'].cat.categories, rng)
+    np.testing.assert_array_equal(broadcast_levels(check, check_profiles), loop_levels(check, check_profiles))
+    print("Broadcast limits match the per-customer loop\n")
+    
+    print(f"{'generators':>12} {'global (s)':>12} {'broadcast (s)':>15} {'loop (s)':>10} {'overhead':>10}")
+    for n in args.sizes:
+        readings = build_readings(n, args.customers, rng)
+        profiles = build_profiles(readings['customer_name'].cat.categories, rng)
+        base = timed(global_levels, readings)
+        broadcast = timed(broadcast_levels, readings, profiles)
+        loop = f"{timed(loop_levels, readings, profiles, repeat=1):>10.4f}" if n <= args.loop_max else f"{'-':>10}"
+        print(f"{n:>12,} {base:>12.4f} {broadcast:>15.4f} {loop} {broadcast / base:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Load test harness
+Synthesizes a fleet of each size into a scratch data directory and drives the app
+headlessly with Streamlit's AppTest: sign-in, the work management dashboard and the
+customer portal, each cold and then warm. Every size runs in its own process so caches
+and memory do not carry over, and the report lists wall time per step and peak memory.
+The runs start the local notification sinks, so alerts land in the scratch directory's
+outbox instead of failing against a missing mail server.
+
+Usage: python benchmarks/load_test.py [--sizes 1000 10000 100000] [--generators-per-customer 100]
+
+1,000,000 generators is accepted by --sizes but left out of the defaults: the 100k run
+already peaks near 1GB and memory grows with the fleet, so 1M needs roughly ten times that.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP_FILE = ROOT / "app.py"
+SEED = 28_000_000
+
+# Column heading per step; "warm" repeats the previous page with every cache populated
+STEPS = ['sign-in', 'work', 'work warm', 'portal', 'portal warm', 'switch customer']
+
+def run_size(generators: int, per_customer: int, timeout: float) -> dict:
+    """Drive the app against a synthetic fleet in the current directory; returns seconds per step."""
+    sys.path.insert(0, str(ROOT))
+    import app  # noqa: E402 - imported after chdir so DATA_DIR resolves into the scratch directory
+    from streamlit.testing.v1 import AppTest
+    
+    customers = max(1, generators // per_customer)
+    fleet = app.synthesize_fleet(customers, generators // customers, SEED)
+    app.write_fleet_store(fleet)
+    
+    timings = {}
+    
+    def step(name, action):
+        start = time.perf_counter()
+        action()
+        timings[name] = time.perf_counter() - start
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].value}")
+    
+    at = AppTest.from_file(str(APP_FILE), default_timeout=timeout)
+    step('sign-in', at.run)
+    at.selectbox[0].set_value("operations@powersystem")
+    step('work', at.button[0].click().run)
+    step('work warm', at.run)
+    step('portal', at.sidebar.selectbox[0].set_value("🏢 Customer Portal").run)
+    step('portal warm', at.run)
+    other = str(fleet['customer_name'].cat.categories[-1])
+    step('switch customer', at.selectbox(key="customer_select").set_value(other).run)
+    
+    return {
+        'generators': len(fleet),
+        'customers': customers,
+        'seconds': timings,
+        'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--generators-per-customer', type=int, default=100)
+    parser.add_argument('--timeout', type=float, default=1800, help='seconds allowed for a single page run')
+    parser.add_argument('--run', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run is not None:
+        print(json.dumps(run_size(args.run, args.generators_per_customer, args.timeout)))
+        return
+    
+    print("Seconds per step\n")
+    print(f"{'generators':>12} {'customers':>10} " + " ".join(f"{name:>15}" for name in STEPS) + f" {'peak MB':>9}")
+    env = {**os.environ, 'PYTHONWARNINGS': 'ignore', 'POWERSYSTEM_LOCAL_SINKS': '1'}
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="load_test_") as workdir:
+            result = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), '--run', str(n),
+                 '--generators-per-customer', str(args.generators_per_customer), '--timeout', str(args.timeout)],
+                cwd=workdir, capture_output=True, text=True, env=env
+            )
+        if result.returncode != 0:
+            print(f"{n:>12,} failed:\n{result.stderr.strip().splitlines()[-1] if result.stderr.strip() else ''}")
+            continue
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+        seconds = " ".join(f"{report['seconds'][name]:>15.2f}" for name in STEPS)
+        print(f"{report['generators']:>12,} {report['customers']:>10,} {seconds} {report['peak_mb']:>9.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Benchmark suite
+Times the data, status, rule, ticket, aggregation and render paths over a range of
+fleet sizes, records the Python/NumPy memory high-water mark of each case, and saves
+or compares JSON baselines so a change can be measured before and after.
+
+Usage:
+    python benchmarks/run_suite.py --save baseline.json
+    python benchmarks/run_suite.py --compare baseline.json [--tolerance 1.25]
+    python benchmarks/run_suite.py --sizes 1000 10000 --cases status tickets
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app  # noqa: E402
+
+SEED = 28_000_000
+GENERATORS_PER_CUSTOMER = 100
+TREND_GENERATORS = 10
+# Timing differences below this are run-to-run noise and never count as a regression
+NOISE_SECONDS = 0.005
+
+def setup_fleet(n: int, workdir: Path) -> dict:
+    """Shared inputs for every case at one fleet size: the fleet, its files on disk and a status snapshot."""
+    fleet = app.synthesize_fleet(max(1, n // GENERATORS_PER_CUSTOMER), min(n, GENERATORS_PER_CUSTOMER), SEED)
+    store_file = workdir / f"generators_{n}.arrow"
+    csv_file = workdir / f"generators_{n}.csv"
+    app.write_fleet_store(fleet, store_file)
+    fleet.to_csv(csv_file, index=False)
+    status = app.compute_fleet_status(fleet, SEED)
+    return {
+        'fleet': fleet,
+        'registry': app.index_generators(fleet),
+        'store_file': store_file,
+        'csv_file': csv_file,
+        'status': status,
+        'next_status': app.compute_fleet_status(fleet, SEED + 1),
+        'tickets': app.generate_customer_tickets(status, fleet),
+        'readings': status[app.RULE_SENSORS].to_numpy(dtype=float)
+    }
+
+def store_load(ctx):
+    return app.backfill_generator_columns(app.read_fleet_store(ctx['store_file']))
+
+def csv_load(ctx):
+    return app.backfill_generator_columns(pd.read_csv(ctx['csv_file']))
+
+def status_generation(ctx):
+    return app.compute_fleet_status(ctx['fleet'], SEED)
+
+def rule_evaluation(ctx):
+    return app.sensor_alert_levels(ctx['readings'])
+
+def ticket_building(ctx):
+    return app.generate_customer_tickets(ctx['status'], ctx['fleet'])
+
+def summary_attach(ctx):
+    summary = app.FleetSummary()
+    summary.attach_fleet(ctx['fleet'], ctx['status'])
+    return summary
+
+def summary_update(ctx):
+    """Diff a snapshot against the summary, alternating between two snapshots so every call changes rows."""
+    if 'summary' not in ctx:
+        ctx['summary'] = summary_attach(ctx)
+    ctx['flip'] = not ctx.get('flip', False)
+    return ctx['summary'].update(ctx['next_status'] if ctx['flip'] else ctx['status'])
+
+def ticket_aggregation(ctx):
+    tickets = ctx['tickets'].join(ctx['registry'][['service_contract', 'location_city']], on='generator')
+    return (app.summarize_tickets(tickets),
+            tickets.pivot_table(index='location_city', columns='priority', values='revenue_sar',
+                                aggfunc='sum', observed=True))
+
+def fleet_grid(ctx):
+    page = app.filter_fleet_status(ctx['status'], app.STATUS_CODES, 0).iloc[:app.CONFIG["portal"]["page_size"]]
+    return app.build_fleet_summary_grid(page, ctx['registry'])
+
+def trend_figure(ctx):
+    serials = ctx['fleet']['serial_number'].iloc[:TREND_GENERATORS].tolist()
+    buckets = app.FLEET_CHART_HOURS * 3600 // app.FLEET_CHART_BUCKET_SECONDS
+    times = np.arange(buckets, dtype=np.int64) * app.FLEET_CHART_BUCKET_SECONDS + SEED
+    values = np.random.default_rng(SEED).uniform(0, 100, (len(serials), buckets, len(app.HISTORY_SENSORS)))
+    return app.build_sensor_trend_figure(serials, times, values).to_json()
+
+# Case name -> (function, whether its cost grows with the fleet size)
+CASES = {
+    'store load': (store_load, True),
+    'csv load': (csv_load, True),
+    'status': (status_generation, True),
+    'rules': (rule_evaluation, True),
+    'tickets': (ticket_building, True),
+    'summary attach': (summary_attach, True),
+    'summary update': (summary_update, True),
+    'ticket aggregation': (ticket_aggregation, True),
+    'fleet grid': (fleet_grid, True),
+    'trend figure': (trend_figure, False)
+}
+
+def timed(fn, *args, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def peak_memory_mb(fn, *args) -> float:
+    """High-water mark of memory traced (Python objects and NumPy buffers) during one call."""
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit, 'python': platform.python_version(), 'numpy': np.__version__,
+        'pandas': pd.__version__, 'machine': platform.machine(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES), metavar='CASE',
+                        help=f"cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', type=Path, help='write the results to this JSON baseline')
+    parser.add_argument('--compare', type=Path, help='compare against a JSON baseline from --save')
+    parser.add_argument('--tolerance', type=float, default=1.25,
+                        help='flag cases slower or heavier than this multiple of the baseline')
+    args = parser.parse_args()
+    
+    baseline = json.loads(args.compare.read_text())['results'] if args.compare else {}
+    results = {}
+    regressions = []
+    
+    header = f"{'case':>20} {'generators':>12} {'best (s)':>10} {'peak MB':>9}"
+    print(header + (f" {'vs baseline':>22}" if baseline else ""))
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        for i, n in enumerate(args.sizes):
+            ctx = setup_fleet(n, Path(workdir))
+            for name in args.cases:
+                fn, scales = CASES[name]
+                if not scales and i > 0:
+                    continue
+                key = f"{name}[{n if scales else '-'}]"
+                seconds = timed(fn, ctx, repeat=args.repeat)
+                peak = peak_memory_mb(fn, ctx)
+                results[key] = {'seconds': seconds, 'peak_mb': peak}
+                
+                line = f"{name:>20} {(f'{n:,}' if scales else '-'):>12} {seconds:>10.4f} {peak:>9.1f}"
+                if key in baseline:
+                    time_ratio = seconds / baseline[key]['seconds']
+                    memory_ratio = peak / baseline[key]['peak_mb'] if baseline[key]['peak_mb'] else 1.0
+                    slower = time_ratio > args.tolerance and seconds - baseline[key]['seconds'] > NOISE_SECONDS
+                    flag = " !" if slower or memory_ratio > args.tolerance else ""
+                    line += f" {time_ratio:>8.2f}x time {memory_ratio:>5.2f}x mem{flag}"
+                    if flag:
+                        regressions.append(key)
+                print(line)
+            del ctx
+    
+    if args.save:
+        args.save.write_text(json.dumps({'environment': environment(), 'results': results}, indent=2))
+        print(f"\nSaved {len(results)} results to {args.save}")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) beyond {args.tolerance}x the baseline: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Status snapshot publisher
+Computes the fleet status in one process and publishes each snapshot as a memory-mapped
+Arrow file with a version counter. Every Streamlit server process maps the published
+file instead of simulating or ingesting on its own, so all users see the same snapshot
+version and memory stays flat as workers are added.
+
+Usage:
+    python publish_status.py --interval 15
+    python publish_status.py --telemetry          # publish live telemetry once batches arrive
+    python publish_status.py --once
+"""
+
+import argparse
+import time
+
+import app
+
+def score_status(status_df, scorer):
+    """Rule status with predictive scores and anomaly flags, as the server processes would add them."""
+    return app.get_anomaly_detector().apply(scorer.apply(status_df))
+
+def current_status(service, fleet, last_key, thresholds, scorer):
+    """Key identifying the current status, and the status itself when the key differs from last_key."""
+    profiles = thresholds.profiles()
+    if service is not None:
+        if service.table.fleet_size != len(fleet):
+            service.table.attach_fleet(fleet, app.compute_fleet_status(fleet, int(time.time() // 60), profiles))
+        if service.table.stats['batches'] > 0:
+            key = ('live', service.table.version)
+            return key, (score_status(service.table.snapshot(), scorer) if key != last_key else None)
+    
+    seed = int(time.time() // 60)
+    key = ('simulated', fleet.attrs.get('data_version'), seed, profiles.version)
+    if key == last_key:
+        return key, None
+    status_df = app.compute_fleet_status(fleet, seed, profiles)
+    app.record_status_snapshot(status_df)
+    return key, score_status(status_df, scorer)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--interval', type=float, default=15.0, help='seconds between checks for a new status')
+    parser.add_argument('--telemetry', action='store_true', help='run the telemetry ingestion service in this process')
+    parser.add_argument('--once', action='store_true', help='publish a single snapshot and exit')
+    args = parser.parse_args()
+    
+    thresholds = app.ThresholdProfileStore()
+    scorer = app.get_predictive_scorer()
+    service = None
+    if args.telemetry:
+        service = app.TelemetryIngestService(
+            app.LiveStatusTable(), history=app.get_sensor_history(), thresholds=thresholds,
+            anomalies=app.get_anomaly_detector()
+        )
+        service.start()
+    
+    counter = app.published_snapshot_counter()
+    last_key = None
+    last_publish = 0.0
+    keepalive = app.CONFIG["status_snapshot"]["max_age_seconds"] / 3
+    
+    try:
+        while True:
+            fleet = app.load_base_generator_data()
+            key, status_df = current_status(service, fleet, last_key, thresholds, scorer)
+            if status_df is not None:
+                counter += 1
+                started = time.perf_counter()
+                app.publish_status_snapshot(status_df, counter)
+                print(f"published snapshot v{counter}: {len(status_df):,} generators "
+                      f"in {time.perf_counter() - started:.3f}s")
+                last_key, last_publish = key, time.time()
+            elif time.time() - last_publish > keepalive:
+                # Unchanged status: refresh the heartbeat so readers keep treating the snapshot as current
+                app.touch_status_heartbeat()
+                last_publish = time.time()
+            
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if service is not None:
+            service.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Telemetry replay tool
+Simulates a fleet of generators reporting at a fixed rate and replays the readings
+into the ingestion service, either over the local socket, through the file-drop
+inbox, or in-process (no server needed) to load-test ingestion throughput offline.
+
+Usage:
+    python replay_telemetry.py --generators 100000 --rate 1 --duration 30 --target local
+    python replay_telemetry.py --target socket --host 127.0.0.1 --port 9750
+    python replay_telemetry.py --target inbox
+
+The socket and inbox targets need a server process started with POWERSYSTEM_TELEMETRY=1;
+ingestion is off by default.
+"""
+
+import argparse
+import socket
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import app
+
+def simulated_fleet(n: int) -> pd.DataFrame:
+    """Demo fleet tiled up to n generators with unique serial numbers."""
+    base = pd.DataFrame(app.generate_enhanced_generator_data())
+    fleet = base.iloc[np.arange(n) % len(base)].reset_index(drop=True)
+    fleet['serial_number'] = [f'PS-SIM-{i:07d}' for i in range(n)]
+    return fleet
+
+def reading_stream(n: int, seed: int = 0):
+    """Endless per-tick readings: a bounded random walk inside each sensor's range."""
+    rng = np.random.default_rng(seed)
+    low = np.array([r[0] for r in app.SENSOR_RANGES.values()], dtype=np.float32)
+    high = np.array([r[1] for r in app.SENSOR_RANGES.values()], dtype=np.float32)
+    readings = (low + (high - low) * rng.random((n, len(low)))).astype(np.float32)
+    demand = rng.random(n) < 0.7
+    step = (high - low) * 0.01
+    while True:
+        readings += (rng.standard_normal(readings.shape).astype(np.float32) * step)
+        np.clip(readings, low, high, out=readings)
+        flip = rng.random(n) < 0.001
+        demand[flip] = ~demand[flip]
+        yield np.round(readings, 1), demand
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay simulated generator telemetry")
+    parser.add_argument('--generators', type=int, default=100_000)
+    parser.add_argument('--rate', type=float, default=1.0, help='batches (fleet sweeps) per second')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--batch-size', type=int, default=10_000, help='readings per batch')
+    parser.add_argument('--target', choices=['local', 'socket', 'inbox'], default='local')
+    parser.add_argument('--host', default=app.CONFIG["telemetry"]["host"])
+    parser.add_argument('--port', type=int, default=app.CONFIG["telemetry"]["port"])
+    parser.add_argument('--inbox', type=Path, default=app.TELEMETRY_INBOX)
+    args = parser.parse_args()
+    
+    fleet = simulated_fleet(args.generators)
+    serials = fleet['serial_number'].to_numpy().astype('S16')
+    
+    service = None
+    conn = None
+    if args.target == 'local':
+        table = app.LiveStatusTable()
+        table.attach_fleet(fleet, app.compute_fleet_status(fleet, seed=0))
+        service = app.TelemetryIngestService(table)
+    elif args.target == 'socket':
+        conn = socket.create_connection((args.host, args.port))
+    else:
+        args.inbox.mkdir(parents=True, exist_ok=True)
+    
+    stream = reading_stream(args.generators)
+    sent = changed = 0
+    sent_bytes = 0
+    ingest_seconds = 0.0
+    started = time.perf_counter()
+    ticks = max(1, int(args.duration * args.rate))
+    
+    for tick in range(ticks):
+        tick_start = time.perf_counter()
+        readings, demand = next(stream)
+        timestamp = int(time.time())
+        
+        for start in range(0, args.generators, args.batch_size):
+            end = min(start + args.batch_size, args.generators)
+            batch = app.encode_telemetry_batch(serials[start:end], readings[start:end], demand[start:end], timestamp)
+            sent_bytes += len(batch)
+            sent += end - start
+            
+            if service is not None:
+                t0 = time.perf_counter()
+                changed += service.ingest_bytes(batch)
+                ingest_seconds += time.perf_counter() - t0
+            elif conn is not None:
+                conn.sendall(len(batch).to_bytes(4, 'little') + batch)
+            else:
+                tmp = args.inbox / f"replay-{tick:06d}-{start:09d}.tmp"
+                tmp.write_bytes(batch)
+                tmp.rename(tmp.with_suffix(".bin"))
+        
+        # Pace to the requested rate; a slow tick just runs late rather than being skipped
+        remaining = 1.0 / args.rate - (time.perf_counter() - tick_start)
+        if remaining > 0 and tick < ticks - 1:
+            time.sleep(remaining)
+    
+    elapsed = time.perf_counter() - started
+    print(f"Replayed {sent:,} readings from {args.generators:,} generators in {elapsed:.2f} s")
+    print(f"  offered load: {sent / elapsed:,.0f} readings/s, {sent_bytes / elapsed / 1e6:.1f} MB/s")
+    if service is not None:
+        print(f"  ingest time:  {ingest_seconds:.2f} s ({sent / max(ingest_seconds, 1e-9):,.0f} readings/s)")
+        print(f"  changed rows: {changed:,}; table version {service.table.version}")
+    if conn is not None:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# app.py keeps its stores under ./data and creates it on import, so the suite runs from a scratch directory
+os.chdir(tempfile.mkdtemp(prefix="powersystem-tests-"))
+sys.path.insert(0, str(REPO_ROOT))
+
+import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def fleet():
+    return app.synthesize_fleet(2, 20, seed=7)
+
+
+@pytest.fixture(scope="session")
+def registry(fleet):
+    return app.index_generators(fleet)
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    return tmp_path / "work_management.db"
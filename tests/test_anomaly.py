@@ -0,0 +1,37 @@
+import numpy as np
+
+import app
+
+COOLANT = app.ANOMALY_SENSORS.index('coolant_temp')
+
+
+def test_welford_baseline_and_cusum_drift():
+    detector = app.AnomalyDetector(initial_rows=1)
+    rng = np.random.default_rng(3)
+    warmup = app.CONFIG["anomaly"]["min_samples"]
+    readings = np.array([30.0, 85.0, 2.0]) + rng.normal(0, [1.0, 2.0, 0.3], size=(warmup, 2, 3))
+    for minute in range(warmup):
+        detector.update(["steady", "drifting"], 1_000 + minute, readings[minute])
+
+    code, baseline = detector.flags(["steady", "drifting"])
+    assert list(code) == [0, 0]
+    np.testing.assert_allclose(baseline, readings.mean(axis=0), rtol=1e-5)
+    variance = detector._m2[:2] / (warmup - 1)
+    np.testing.assert_allclose(variance, readings.var(axis=0, ddof=1), rtol=1e-3)
+
+    # Readings not newer than the last one are ignored
+    detector.update(["drifting"], 1_000 + warmup - 1, [[30.0, 200.0, 2.0]])
+    assert detector.flags(["drifting"])[0][0] == 0
+
+    # Coolant creeping up two standard deviations a minute trips the CUSUM within a few readings
+    frozen = None
+    for step in range(1, 6):
+        latest = readings[-1].copy()
+        latest[1, COOLANT] = 85.0 + 4.0 * step
+        detector.update(["steady", "drifting"], 1_000 + warmup + step, latest)
+        code, baseline = detector.flags(["steady", "drifting"])
+        if code[1]:
+            # Once flagged, the drifting generator stops learning
+            frozen = baseline[1, COOLANT] if frozen is None else frozen
+            assert baseline[1, COOLANT] == frozen
+    assert code[0] == 0 and code[1] == 1 << COOLANT
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+@pytest.fixture
+def planner(db_file, monkeypatch):
+    planner = app.DispatchPlanner(db_file)
+    # Plan today's shift before it starts, so no stop is locked and the whole shift is free
+    monkeypatch.setattr(planner, '_shift_minutes_now', lambda: -60.0)
+    return planner
+
+
+def tickets(priorities, start=0):
+    serials = [f"GEN-{start + i:03d}" for i in range(len(priorities))]
+    return pd.DataFrame({
+        'generator': serials, 'ticket_id': [f"T-{s}" for s in serials], 'customer': "Acme",
+        'location': "Riyadh", 'priority': pd.Categorical(priorities, categories=app.PRIORITY_LEVELS, ordered=True)
+    })
+
+
+def routes(planner):
+    itinerary, summary = planner.frames()
+    return itinerary, summary.set_index('technician')
+
+
+def test_routes_fit_the_shift_and_critical_jobs_bump_lower_priorities(planner):
+    # Forty Riyadh sites are staffed by two technicians
+    generators = pd.DataFrame({'location_city': ["Riyadh"] * 40})
+    planner.sync(tickets(["MEDIUM"] * 20), generators)
+    itinerary, summary = routes(planner)
+    assert len(summary) == 2
+    assert (summary['shift_used'] <= 1).all()
+    assert len(itinerary) + planner.deferred() == 20
+    assert planner.deferred() > 0
+    full = len(itinerary)
+
+    opened = tickets(["CRITICAL"], start=100).assign(event="OPENED")
+    planner.on_ticket_events(opened)
+    itinerary, summary = routes(planner)
+    assert (summary['shift_used'] <= 1).all()
+    assert planner.stats['bumped'] >= 1
+    critical = itinerary[itinerary['priority'] == "CRITICAL"]
+    assert list(critical['generator']) == ["GEN-100"]
+    # The critical visit comes first on its route, and room for it came out of the medium visits
+    assert int(critical['stop'].iloc[0]) == 1
+    assert (itinerary['priority'] == "MEDIUM").sum() < full
+
+    planner.on_ticket_events(opened.assign(event="CLOSED"))
+    assert "GEN-100" not in set(planner.frames()[0]['generator'])
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+import app
+
+COOLANT = app.RULE_SENSORS.index('coolant_temp')
+
+
+def coolant_levels(profiles, customers, value):
+    readings = np.tile([30.0, 80.0, 2.0, 80.0], (len(customers), 1))
+    readings[:, COOLANT] = value
+    return app.sensor_alert_levels(readings, profiles.level_limits(pd.Series(customers)))[:, COOLANT]
+
+
+def test_customer_profiles_override_warning_limits_only(db_file):
+    store = app.ThresholdProfileStore(db_file)
+    assert store.profiles().level_limits(pd.Series(["Acme"])) is None
+
+    store.save("Strict", {'coolant_temp': 90})
+    store.save("Lax", {'coolant_temp': 120})
+    profiles = store.profiles()
+    assert store.profiles() is profiles
+
+    customers = ["Strict", "Lax", "Unprofiled"]
+    # The strict warning limit pulls the advisory limit down with it
+    assert list(coolant_levels(profiles, customers, 92)) == [app.WARNING, 0, 0]
+    # A warning limit beyond the critical one is clamped to it
+    assert list(coolant_levels(profiles, customers, 100)) == [app.WARNING, app.ADVISORY, app.WARNING]
+    assert list(coolant_levels(profiles, customers, 106)) == [app.FAULT] * 3
+
+
+def test_ledger_commits_to_the_shared_file_keep_the_compiled_profiles(db_file, fleet, registry):
+    store = app.ThresholdProfileStore(db_file)
+    store.save("Strict", {'coolant_temp': 90})
+    profiles = store.profiles()
+
+    app.TicketLedger(db_file).sync(app.compute_fleet_status(fleet, 1000), registry)
+    assert store.profiles() is profiles
+
+    store.save("Strict", {'coolant_temp': 95})
+    assert store.profiles().version > profiles.version
@@ -0,0 +1,182 @@
+import json
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+import app
+from conftest import REPO_ROOT
+
+
+def snapshot(base, priorities):
+    """The base status with ticket priorities set for the given generators and cleared for all others."""
+    status = base.copy()
+    status['priority'] = pd.Categorical(
+        status['serial_number'].map(priorities), categories=app.PRIORITY_LEVELS, ordered=True
+    )
+    return status
+
+
+@pytest.fixture(scope="module")
+def base_status(fleet):
+    return app.compute_fleet_status(fleet, 1000)
+
+
+@pytest.fixture(scope="module")
+def serials(fleet):
+    return list(fleet['serial_number'][:4])
+
+
+def open_by_generator(ledger, registry):
+    return ledger.open_tickets(registry).set_index('generator')
+
+
+def test_sync_opens_escalates_updates_and_closes(db_file, registry, base_status, serials):
+    a, b, c, d = serials
+    ledger = app.TicketLedger(db_file)
+    events = []
+    ledger.subscribe(events.append)
+
+    counts = ledger.sync(snapshot(base_status, {b: "MEDIUM", c: "HIGH", d: "MEDIUM"}), registry)
+    assert counts == {'opened': 3, 'escalated': 0, 'updated': 0, 'closed': 0}
+    first = open_by_generator(ledger, registry)
+    assert set(first.index) == {b, c, d}
+    assert (first['status'] == "PENDING").all()
+
+    counts = ledger.sync(snapshot(base_status, {a: "HIGH", b: "CRITICAL", c: "MEDIUM"}), registry)
+    assert counts == {'opened': 1, 'escalated': 1, 'updated': 1, 'closed': 1}
+    second = open_by_generator(ledger, registry)
+    assert set(second.index) == {a, b, c}
+    assert second.loc[b, 'status'] == "ESCALATED" and second.loc[b, 'priority'] == "CRITICAL"
+    assert second.loc[c, 'status'] == "PENDING" and second.loc[c, 'priority'] == "MEDIUM"
+    # Escalations and updates keep the ticket they revise
+    assert second.loc[b, 'ticket_id'] == first.loc[b, 'ticket_id']
+    assert second.loc[c, 'ticket_id'] == first.loc[c, 'ticket_id']
+
+    assert list(events[0]['event']) == ["OPENED"] * 3
+    assert sorted(events[1]['event']) == ["CLOSED", "ESCALATED", "OPENED", "UPDATED"]
+    closed = events[1].set_index('event').loc["CLOSED"]
+    assert closed['generator'] == d and closed['ticket_id'] == first.loc[d, 'ticket_id']
+
+
+def test_ticket_ids_are_stable_across_restarts_and_never_reused(db_file, registry, base_status, serials):
+    a, b, _, _ = serials
+    ledger = app.TicketLedger(db_file)
+    ledger.sync(snapshot(base_status, {a: "HIGH", b: "MEDIUM"}), registry)
+    issued = open_by_generator(ledger, registry)['ticket_id']
+
+    restarted = app.TicketLedger(db_file)
+    counts = restarted.sync(snapshot(base_status, {a: "HIGH", b: "MEDIUM"}), registry)
+    assert counts == {'opened': 0, 'escalated': 0, 'updated': 0, 'closed': 0}
+    assert open_by_generator(restarted, registry)['ticket_id'].equals(issued)
+
+    restarted.sync(snapshot(base_status, {b: "MEDIUM"}), registry)
+    restarted.sync(snapshot(base_status, {a: "HIGH", b: "MEDIUM"}), registry)
+    reopened = open_by_generator(restarted, registry)
+    assert reopened.loc[b, 'ticket_id'] == issued[b]
+    assert reopened.loc[a, 'ticket_id'] != issued[a]
+
+
+def test_repeated_snapshot_skips_the_transaction(db_file, registry, base_status, serials):
+    ledger = app.TicketLedger(db_file)
+    status = snapshot(base_status, {serials[0]: "HIGH"})
+    ledger.sync(status, registry)
+    version = ledger.version
+
+    assert ledger.sync(status, registry) == {'opened': 0, 'escalated': 0, 'updated': 0, 'closed': 0}
+    assert ledger.version == version
+
+    # A write from another process makes the same frame apply again
+    other = app.TicketLedger(db_file)
+    other.sync(snapshot(base_status, {serials[1]: "HIGH"}), registry)
+    assert ledger.sync(status, registry)['closed'] == 1
+
+
+def test_other_stores_sharing_the_file_do_not_reload_the_ledger(db_file, registry, base_status, serials):
+    ledger = app.TicketLedger(db_file)
+    status = snapshot(base_status, {serials[0]: "HIGH"})
+    ledger.sync(status, registry)
+    tickets = ledger.open_tickets(registry)
+    version = ledger.version
+
+    app.ThresholdProfileStore(db_file).save("Strict", {'coolant_temp': 90})
+    assert ledger.sync(status, registry) == {'opened': 0, 'escalated': 0, 'updated': 0, 'closed': 0}
+    assert ledger.open_tickets(registry) is tickets
+    assert ledger.version == version
+
+
+def test_revenue_facts_reload_only_after_ticket_writes(db_file, fleet, registry, base_status, serials):
+    ledger = app.TicketLedger(db_file)
+    ledger.sync(snapshot(base_status, {serials[0]: "HIGH"}), registry)
+    revenue = app.RevenueAnalytics(db_file)
+    assert len(revenue.facts(fleet)) == 1
+
+    app.ThresholdProfileStore(db_file).save("Strict", {'coolant_temp': 90})
+    revenue.facts(fleet)
+    assert revenue.stats['loads'] == 1
+
+    ledger.sync(snapshot(base_status, {serials[0]: "HIGH", serials[1]: "MEDIUM"}), registry)
+    assert len(revenue.facts(fleet)) == 2
+    assert revenue.stats['loads'] == 2
+
+
+def test_failed_sync_rolls_back_and_reloads(db_file, registry, base_status, serials, monkeypatch):
+    a, b, c, d = serials
+    ledger = app.TicketLedger(db_file)
+    ledger.sync(snapshot(base_status, {b: "MEDIUM", d: "MEDIUM"}), registry)
+    assert ledger._revision is not None
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("ticket build failed")
+
+    # The close of d is written before the new tickets are built, and must not survive the failure
+    monkeypatch.setattr(app, 'generate_customer_tickets', fail)
+    with pytest.raises(RuntimeError):
+        ledger.sync(snapshot(base_status, {a: "HIGH", b: "MEDIUM"}), registry)
+    assert ledger._revision is None
+    assert set(open_by_generator(ledger, registry).index) == {b, d}
+
+    monkeypatch.undo()
+    counts = ledger.sync(snapshot(base_status, {a: "HIGH", b: "MEDIUM"}), registry)
+    assert counts == {'opened': 1, 'escalated': 0, 'updated': 0, 'closed': 1}
+
+
+SYNC_PROCESS = """
+import json, sys, time
+from pathlib import Path
+sys.path.insert(0, {root!r})
+import app
+fleet = app.synthesize_fleet(2, 20, seed=7)
+status = app.compute_fleet_status(fleet, 1000)
+ledger = app.TicketLedger(Path({db!r}))
+print("ready", flush=True)
+while not Path({go!r}).exists():
+    time.sleep(0.005)
+print(json.dumps(ledger.sync(status, app.index_generators(fleet))), flush=True)
+"""
+
+
+def test_processes_sharing_the_ledger_apply_each_change_once(tmp_path, fleet, base_status):
+    db_file, go = tmp_path / "shared.db", tmp_path / "go"
+    script = SYNC_PROCESS.format(root=str(REPO_ROOT), db=str(db_file), go=str(go))
+    workers = [
+        subprocess.Popen([sys.executable, "-W", "ignore", "-c", script], cwd=tmp_path,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(3)
+    ]
+    try:
+        for worker in workers:
+            assert worker.stdout.readline().strip() == "ready"
+        go.touch()
+        results = [json.loads(worker.communicate(timeout=120)[0]) for worker in workers]
+    finally:
+        for worker in workers:
+            worker.kill()
+
+    due = int((app.ticket_outcomes(base_status) >= 0).sum())
+    assert sorted(result['opened'] for result in results) == [0, 0, due]
+    with sqlite3.connect(db_file) as conn:
+        rows, distinct = conn.execute("SELECT COUNT(*), COUNT(DISTINCT generator) FROM tickets").fetchone()
+    assert rows == distinct == due